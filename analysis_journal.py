@@ -0,0 +1,112 @@
+import os
+import json
+import logging
+
+# 혼자 분석하다가(다른 파일이 함께 진행 중이지 않을 때) 결과 없이 시작 기록만 이 횟수만큼 남은 파일은
+# 분석 중 프로세스를 죽이는 파일로 간주
+MAX_CRASH_ATTEMPTS = 2
+
+class AnalysisJournal:
+    """파일 단위 분석 결과를 기록하는 추가 전용(append-only) 저널
+
+    각 줄은 JSON 한 개이며 분석 시작('start')과 완료('done')를 기록한다.
+    미리 읽기/배치/병렬 분석처럼 여러 파일이 함께 진행 중일 때의 시작 기록은 solo=False로 남기며,
+    이런 기록만 남은 파일은 어느 파일 때문에 중단되었는지 알 수 없으므로 다음 실행에서 한 파일씩
+    따로 다시 분석한다. 혼자 분석하다 MAX_CRASH_ATTEMPTS번 중단된 파일만 실패로 처리한다.
+    중간에 프로세스가 종료되면 다음 실행에서 저널을 재생하여 이미 분석한 파일은
+    다시 디코딩하지 않는다. 파일 크기/수정 시각이 바뀐 파일의 기록은 무시한다.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def _file_stat(self, file_path):
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def load(self):
+        """저널 재생: (완료된 파일 → 특성, 반복해서 중단된 파일 집합, 한 파일씩 다시 분석할 파일 집합) 반환"""
+        results = {}
+        attempts = {}
+        if not os.path.exists(self.path):
+            return results, set(), set()
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    key = (entry['path'], entry['size'], entry['mtime_ns'])
+                    # 시작 기록에는 solo, 완료 기록에는 features가 반드시 있어야 함
+                    if entry['status'] == 'start' and not isinstance(entry['solo'], bool):
+                        raise ValueError(f"solo 값이 올바르지 않습니다: {entry['solo']!r}")
+                    if entry['status'] == 'done' and not isinstance(entry['features'], dict):
+                        raise ValueError("features가 올바르지 않습니다")
+                except (ValueError, KeyError, TypeError) as e:
+                    # 기록 도중 종료되어 잘린 마지막 줄이나 필수 필드가 빠진 기록
+                    logging.warning(f"분석 저널 {line_no}번째 줄을 건너뜁니다 (손상된 기록: {str(e)})")
+                    continue
+
+                if entry['status'] == 'start':
+                    attempts[key] = attempts.get(key, 0) + (1 if entry['solo'] else 0)
+                elif entry['status'] == 'done':
+                    results[key] = entry['features']
+                    attempts.pop(key, None)
+
+        replayed = {}
+        for (path, size, mtime_ns), features in results.items():
+            try:
+                if self._file_stat(path) == (size, mtime_ns):
+                    replayed[path] = features
+            except OSError:
+                continue
+
+        crashed = set()
+        suspects = set()
+        for (path, size, mtime_ns), count in attempts.items():
+            if count >= MAX_CRASH_ATTEMPTS:
+                crashed.add(path)
+            else:
+                suspects.add(path)
+
+        return replayed, crashed, suspects
+
+    def _append(self, entry):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _entry(self, file_path, status):
+        size, mtime_ns = self._file_stat(file_path)
+        return {'path': file_path, 'size': size, 'mtime_ns': mtime_ns, 'status': status}
+
+    def start(self, file_path, solo=True):
+        """분석 시작 기록 (결과 없이 남으면 다음 실행에서 중단된 파일로 판단)
+
+        solo: 다른 파일의 디코딩/분석이 함께 진행 중이지 않은지 (False면 중단 횟수에 세지 않음)
+        """
+        entry = self._entry(file_path, 'start')
+        entry['solo'] = solo
+        self._append(entry)
+
+    def record(self, file_path, features):
+        """분석 완료 기록"""
+        entry = self._entry(file_path, 'done')
+        entry['features'] = features
+        self._append(entry)
+
+    def clear(self):
+        """CSV로 압축(compaction)한 뒤 저널 비우기"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
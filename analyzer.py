@@ -1,4 +1,6 @@
+import io
 import os
+import time
 import logging
 import numpy as np
 import json
@@ -6,58 +8,335 @@ import librosa
 from mutagen import File
 from mutagen.mp3 import MP3
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from feature_cache import FeatureCache, content_hash_bytes, content_hash_fileobj
+from analysis_journal import AnalysisJournal
+from file_index import FileInventory
+from catalog_db import open_catalog
+from similarity_index import update_similarity_index
+from utils import csv_files
+from spectral import compute_spectral_features, compute_spectral_features_batch, ENGINE_TOLERANCE, HPSS_KERNEL_SIZE
+from streaming import stream_spectral_features, STREAM_BLOCK_FRAMES
+from metrics import StageMetrics, NULL_METRICS
+
+# 분석 알고리즘이 바뀌면 올려서 이전 특성 캐시를 무효화
+ANALYZER_VERSION = 1
+
+FEATURE_ENGINES = ('shared', 'legacy')
+
+# 분석 프로파일 (디코딩 샘플레이트, 리샘플러, STFT 크기)
+# - default: 22050Hz 고품질 리샘플링
+# - fast: 11025Hz 저비용 리샘플링 (soxr_lq), 앞 30초만, 프레임 간격 약 35ms (default 23ms)
+#   HPSS 필터 길이(hpss_kernel)는 default와 비슷한 시간 폭(약 0.8초)이 되도록 줄임
+#   5.5kHz 이상 성분이 빠져 타악기 에너지가 default의 약 0.64~0.67배로 측정되므로 drum_scale로 보정
+#   (장르 판별 기준 0.1과 플레이리스트 drum_range가 프로파일과 무관하게 같은 의미가 되도록)
+#   default 대비 BPM 차이는 프레임 해상도 때문에 최대 약 2 BPM, drum_intensity가 0.1의 ±5% 안인
+#   트랙은 장르가 바뀔 수 있음
+# - stream: 원본 샘플레이트로 곡 전체를 블록 단위 스트리밍 분석 (메모리 사용량 일정)
+# - metadata: 디코딩 없이 MP3 헤더와 파일명만 읽어 등록 (BPM/장르는 분석 대기 상태)
+ANALYSIS_PROFILES = {
+    'default': {'sr': 22050, 'res_type': 'soxr_hq', 'n_fft': 2048, 'hop_length': 512, 'duration': 60},
+    'fast': {'sr': 11025, 'res_type': 'soxr_lq', 'n_fft': 1024, 'hop_length': 384, 'duration': 30,
+             'hpss_kernel': 23, 'drum_scale': 1.54},
+    'stream': {'stream': True, 'block_frames': STREAM_BLOCK_FRAMES, 'duration': None},
+    'metadata': {'metadata_only': True, 'duration': None}
+}
+
+# 메타데이터만 등록되어 나중에 분석할 트랙의 장르 값
+PENDING_GENRE = 'Pending'
+
+# 분석 결과로 채워지는 tracks.csv 컬럼
+TRACK_FEATURE_COLUMNS = (
+    'bpm', 'duration_ms', 'genre', 'sub_genre',
+    'drum_intensity', 'harmonic_complexity', 'analysis_profile'
+)
+
+# 프로세스 풀 워커마다 하나씩 생성되는 분석기
+_worker_analyzer = None
+
+def _init_worker(config):
+    """프로세스 풀 워커 초기화"""
+    global _worker_analyzer
+    _worker_analyzer = LofiMusicAnalyzer(**config)
+
+def _worker_audio_features(file_paths):
+    """워커 프로세스에서 오디오 특성 추출 (batch_size개씩 묶어서 분석, 단계별 지표도 함께 반환)"""
+    features = _worker_analyzer.get_audio_features_batch(file_paths)
+    return features, _worker_analyzer.metrics.drain()
+
+class FeatureJobs:
+    """파일별 오디오 특성 추출 작업
+    
+    workers > 1이면 프로세스 풀에서 미리 실행하고, 직렬 분석이면 리더 스레드가 다음 파일들을
+    미리 읽고 디코딩하여(prefetch) 메인 스레드의 특성 계산과 파일 I/O가 겹치도록 한다.
+    batch_size > 1이면 분석 순서대로 batch_size개 파일을 묶어 한 번에 계산한다.
+    on_start(file_path, solo)는 파일의 디코딩이나 분석을 시작하기 직전에 호출된다 (분석 저널 기록용).
+    미리 읽기, 배치, 병렬 분석 중에는 다른 파일도 함께 진행 중이므로 solo=False로 호출한다.
+    """
+    def __init__(self, analyzer, file_paths, on_start=None):
+        self.analyzer = analyzer
+        self.on_start = on_start
+        self.executor = None
+        self.futures = {}
+        self.merged = set()
+        self.reader = None
+        self.prefetched = {}
+        self.serial = OrderedDict()
+        self.results = {}
+        self.window = max(analyzer.prefetch, analyzer.batch_size)
+        # 한 번에 한 파일만 디코딩/분석하는지 (미리 읽기, 배치, 병렬 분석이 아닐 때)
+        self.solo = True
+        
+        if analyzer.profile_params.get('metadata_only'):
+            # 헤더만 읽으므로 프로세스 풀이나 미리 읽기 없이 바로 처리 (저널에도 기록하지 않음)
+            self.on_start = None
+            return
+            
+        workers = min(analyzer.workers, len(file_paths))
+        if workers > 1:
+            logging.info(f"병렬 분석 시작: {len(file_paths)}개 파일, 워커 {workers}개, 배치 {analyzer.batch_size}개")
+            self.solo = False
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(analyzer.worker_config(),)
+            )
+            for start in range(0, len(file_paths), analyzer.batch_size):
+                batch = file_paths[start:start + analyzer.batch_size]
+                future = self.executor.submit(_worker_audio_features, batch)
+                for index, file_path in enumerate(batch):
+                    self.futures[file_path] = (future, index)
+            return
+            
+        prefetch = analyzer.prefetch > 0 and len(file_paths) > 1 and not analyzer.profile_params.get('stream')
+        if prefetch or analyzer.batch_size > 1:
+            self.serial = OrderedDict.fromkeys(file_paths)
+            self.solo = False
+        if prefetch:
+            # 스트리밍 프로파일은 디코딩과 분석이 한 번에 이루어지므로 미리 읽지 않음
+            logging.info(f"미리 읽기 시작: {len(file_paths)}개 파일, 리더 스레드 {analyzer.reader_threads}개, 최대 {self.window}개 대기")
+            self.reader = ThreadPoolExecutor(
+                max_workers=analyzer.reader_threads,
+                thread_name_prefix='audio-reader'
+            )
+            self.fill_prefetch()
+            
+    def fill_prefetch(self):
+        """디코딩된 오디오가 메모리에 최대 window개만 대기하도록 분석 순서대로 다음 파일 제출"""
+        if self.reader is None:
+            return
+        for file_path in self.serial:
+            if len(self.prefetched) >= self.window:
+                break
+            if file_path not in self.prefetched:
+                # 디코딩 도중 중단될 수도 있으므로 미리 읽기를 시작할 때 시작 기록을 남김
+                self.start(file_path)
+                self.prefetched[file_path] = self.reader.submit(self.analyzer.read_audio, file_path)
+                
+    def start(self, file_path):
+        if self.on_start is not None:
+            self.on_start(file_path, self.solo)
+            
+    def get(self, file_path):
+        """분석 결과 반환 (제출된 순서와 무관하게 요청한 파일의 결과를 기다림)"""
+        if file_path in self.results:
+            return self.results.pop(file_path)
+        if file_path in self.serial:
+            return self.get_serial(file_path)
+            
+        self.start(file_path)
+        job = self.futures.pop(file_path, None)
+        if job is None:
+            return self.analyzer.get_audio_features(file_path)
+            
+        future, index = job
+        try:
+            features, records = future.result()
+            if future not in self.merged:
+                # 워커가 기록한 단계별 지표는 배치마다 한 번만 합침
+                self.merged.add(future)
+                self.analyzer.metrics.extend(records)
+            return features[index]
+        except Exception as e:
+            # 워커가 비정상 종료된 경우 현재 프로세스에서 다시 분석
+            logging.error(f"병렬 분석 실패, 직접 분석으로 전환: {file_path} - {str(e)}")
+            return self.analyzer.get_audio_features(file_path)
+            
+    def get_serial(self, file_path):
+        """요청한 파일부터 분석 순서대로 batch_size개를 읽고(미리 읽은 결과 사용) 메인 스레드에서 계산"""
+        batch = [file_path]
+        for next_path in self.serial:
+            if len(batch) >= self.analyzer.batch_size:
+                break
+            if next_path != file_path:
+                batch.append(next_path)
+                
+        decoded_list = []
+        for path in batch:
+            del self.serial[path]
+            future = self.prefetched.pop(path, None)
+            if future is None:
+                # 미리 읽지 않은 파일은 배치로 함께 계산하기 직전에 시작 기록
+                self.start(path)
+            try:
+                decoded_list.append(future.result() if future is not None else self.analyzer.read_audio(path))
+            except Exception as e:
+                logging.error(f"오디오 분석 실패: {path} - {str(e)}")
+                decoded_list.append(None)
+        self.fill_prefetch()
+        
+        for path, features in zip(batch, self.analyzer.analyze_decoded_batch(decoded_list)):
+            self.results[path] = features
+        return self.results.pop(file_path)
+        
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.reader is not None:
+            self.reader.shutdown(wait=True, cancel_futures=True)
+            self.reader = None
+            self.prefetched = {}
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
 
 class LofiMusicAnalyzer:
-    def __init__(self, base_path):
+    def __init__(self, base_path, workers=None, use_cache=True, cache_dir=None, feature_engine='shared',
+                 profile='default', compact_every=0, prefetch=4, reader_threads=2, batch_size=1,
+                 metrics=False, trace_memory=False, catalog_db=False):
         self.base_path = base_path
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"지원하지 않는 분석 프로파일: {profile}")
+        self.profile = profile
+        self.profile_params = ANALYSIS_PROFILES[profile]
+        # 특성 추출 엔진 ('shared': STFT 한 번 공유, 'legacy': 기존 beat_track + hpss 경로)
+        if feature_engine not in FEATURE_ENGINES:
+            raise ValueError(f"지원하지 않는 특성 엔진: {feature_engine}")
+        self.feature_engine = feature_engine
+        # 병렬 분석 워커 수 (기본값: CPU 코어 수, 1이면 직렬 분석)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # 직렬 분석 시 미리 읽어 둘 파일 수와 리더 스레드 수 (0이면 미리 읽지 않음)
+        self.prefetch = max(0, prefetch)
+        self.reader_threads = max(1, reader_threads)
+        # 한 번에 묶어서 계산할 파일 수 (같은 길이의 클립끼리 배치로 계산)
+        self.batch_size = max(1, batch_size)
+        # 콘텐츠 해시 기반 특성 캐시 (파일명이 바뀌거나 csv_output을 다시 만들어도 재사용)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.feature_cache = FeatureCache(cache_dir) if use_cache else None
         self.output_dir = os.path.join(os.getcwd(), 'csv_output')
         os.makedirs(self.output_dir, exist_ok=True)
+        # 단계별 시간/메모리 계측 (metrics.jsonl, metrics.prom, 실행 후 요약 표)
+        self.use_metrics = metrics
+        self.trace_memory = trace_memory
+        self.metrics = StageMetrics(self.output_dir, trace_memory=trace_memory) if metrics else NULL_METRICS
         self.tracks = []
         self.episodes = []
         self.track_episodes = []
+        # SQLite 카탈로그 (catalog.sqlite3가 있거나 catalog_db=True면 CSV 대신 바뀐 행만 저장)
+        self.catalog = open_catalog(self.output_dir, create=catalog_db)
+        self.dirty_tracks = {}
+        self.dirty_episodes = {}
+        self.dirty_episode_tracks = set()
+        self.track_hashes = {}
+        # 파일 단위 분석 결과 저널 (compact_every개 폴더마다 CSV로 압축, 0이면 실행이 끝날 때 한 번)
+        self.journal = AnalysisJournal(os.path.join(self.output_dir, 'analysis_journal.jsonl'))
+        self.compact_every = max(0, compact_every)
+        # 파일 단위 변경 감지 인덱스
+        self.inventory = FileInventory(base_path, os.path.join(self.output_dir, 'file_index.csv'))
+        self.last_inventory_diff = None
         
     def analyze_genre(self, y, sr):
         """오디오 특성을 분석하여 장르 판별"""
+        if self.feature_engine == 'legacy':
+            return self.analyze_genre_legacy(y, sr)
+            
+        try:
+            features = compute_spectral_features(
+                y, sr,
+                n_fft=self.profile_params['n_fft'],
+                hop_length=self.profile_params['hop_length'],
+                kernel_size=self.profile_params.get('hpss_kernel', HPSS_KERNEL_SIZE),
+                metrics=self.metrics
+            )
+            return self.classify_genre(
+                features['tempo'],
+                features['percussive_rms'],
+                features['chroma_complexity']
+            )
+            
+        except Exception as e:
+            logging.error(f"장르 분석 실패: {str(e)}")
+            return self.default_genre_info()
+            
+    def analyze_genre_legacy(self, y, sr):
+        """기존 방식의 장르 판별 (원본 신호 beat_track + hpss + chroma_stft, 프로파일의 STFT 크기/간격 사용)"""
+        n_fft = self.profile_params['n_fft']
+        hop_length = self.profile_params['hop_length']
+        kernel_size = self.profile_params.get('hpss_kernel', HPSS_KERNEL_SIZE)
         try:
             # tempo 처리 수정
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+            with self.metrics.stage('beat'):
+                onset_env = librosa.onset.onset_strength(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length, aggregate=np.median)
+                tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
             if isinstance(tempo, np.ndarray):
                 tempo = float(tempo[0])  # 배열의 첫 번째 요소만 사용
             else:
                 tempo = float(tempo)
                 
-            y_harmonic, y_percussive = librosa.effects.hpss(y)
-            percussive_rms = float(np.sqrt(np.mean(y_percussive**2)))
+            with self.metrics.stage('hpss'):
+                # librosa.effects.hpss와 같은 계산 (STFT 크기/간격을 프로파일에 맞춤)
+                D = librosa.stft(y, n_fft=n_fft, hop_length=hop_length)
+                D_harmonic, D_percussive = librosa.decompose.hpss(D, kernel_size=kernel_size)
+                y_harmonic = librosa.istft(D_harmonic, n_fft=n_fft, hop_length=hop_length, length=len(y))
+                y_percussive = librosa.istft(D_percussive, n_fft=n_fft, hop_length=hop_length, length=len(y))
+                percussive_rms = float(np.sqrt(np.mean(y_percussive**2)))
             
-            chroma = librosa.feature.chroma_stft(y=y_harmonic, sr=sr)
-            chroma_complexity = float(np.std(chroma))
+            with self.metrics.stage('chroma'):
+                chroma = librosa.feature.chroma_stft(y=y_harmonic, sr=sr, n_fft=n_fft, hop_length=hop_length)
+                chroma_complexity = float(np.std(chroma))
             
-            if percussive_rms > 0.1 and 70 <= tempo <= 100:
-                genre = 'Lo-fi Hip Hop'
-                sub_genre = 'Hip Hop'
-            else:
-                genre = 'Lo-fi Jazz'
-                sub_genre = 'Jazz'
-                
-            return {
-                'genre': genre,
-                'sub_genre': sub_genre,
-                'tempo': round(tempo, 2),
-                'drum_intensity': round(percussive_rms, 3),
-                'harmonic_complexity': round(chroma_complexity, 3)
-            }
+            return self.classify_genre(tempo, percussive_rms, chroma_complexity)
             
         except Exception as e:
             logging.error(f"장르 분석 실패: {str(e)}")
-            return {
-                'genre': 'Lo-fi',
-                'sub_genre': 'Unknown',
-                'tempo': 0,
-                'drum_intensity': 0,
-                'harmonic_complexity': 0
-            }
+            return self.default_genre_info()
+            
+    def classify_genre(self, tempo, percussive_rms, chroma_complexity):
+        """템포와 타악기 에너지로 장르 판별"""
+        # 낮은 샘플레이트 프로파일은 고음역 타악기 에너지가 빠지므로 기본 프로파일 기준으로 보정
+        percussive_rms *= self.profile_params.get('drum_scale', 1.0)
+        if percussive_rms > 0.1 and 70 <= tempo <= 100:
+            genre = 'Lo-fi Hip Hop'
+            sub_genre = 'Hip Hop'
+        else:
+            genre = 'Lo-fi Jazz'
+            sub_genre = 'Jazz'
             
+        return {
+            'genre': genre,
+            'sub_genre': sub_genre,
+            'tempo': round(tempo, 2),
+            'drum_intensity': round(percussive_rms, 3),
+            'harmonic_complexity': round(chroma_complexity, 3)
+        }
+        
+    def default_genre_info(self):
+        return {
+            'genre': 'Lo-fi',
+            'sub_genre': 'Unknown',
+            'tempo': 0,
+            'drum_intensity': 0,
+            'harmonic_complexity': 0
+        }
+        
     def adjust_bpm(self, bpm):
         """BPM을 60-100 범위 내로 조정"""
         if bpm == 0:
@@ -72,17 +351,12 @@ class LofiMusicAnalyzer:
         return round(bpm, 2)
         
     def analyze_folders(self):
-        """폴더 분석 및 트랙 정보 수집"""
+        """폴더 분석 및 트랙 정보 수집 (중단된 경우 분석 저널에서 이어서 진행)"""
         # 기존 CSV 파일이 있다면 로드
-        if os.path.exists(os.path.join(self.output_dir, 'tracks.csv')):
-            existing_tracks = pd.read_csv(os.path.join(self.output_dir, 'tracks.csv')).to_dict('records')
-            existing_episodes = pd.read_csv(os.path.join(self.output_dir, 'episodes.csv')).to_dict('records')
-            existing_track_episodes = pd.read_csv(os.path.join(self.output_dir, 'track_episodes.csv')).to_dict('records')
-            
-            # 기존 데이터 복원
-            self.tracks = existing_tracks
-            self.episodes = existing_episodes
-            self.track_episodes = existing_track_episodes
+        if self.load_existing_csv():
+            existing_tracks = self.tracks
+            existing_episodes = self.episodes
+            existing_track_episodes = self.track_episodes
             
             # 마지막 ID들 찾기
             track_id = max([t['track_id'] for t in existing_tracks]) + 1 if existing_tracks else 1
@@ -114,152 +388,701 @@ class LofiMusicAnalyzer:
             except:
                 return 0
                 
+        # 파일 인덱스와 비교하여 추가/변경/삭제된 파일 확인 (scandir 한 번)
+        # (메타데이터 스캔은 콘텐츠 해시도 계산하지 않고 크기/수정 시각만 비교)
+        inventory_diff = self.inventory.diff(
+            known_folders=analyzed_folders,
+            hash_files=not self.profile_params.get('metadata_only')
+        )
+        self.last_inventory_diff = inventory_diff
+        for folder_name, file_name in inventory_diff.removed:
+            logging.warning(f"삭제된 파일: {folder_name}/{file_name}")
+            
         # 현재 폴더 목록 가져오기
-        current_folders = sorted([
-            f for f in os.listdir(self.base_path)
-            if os.path.isdir(os.path.join(self.base_path, f))
-            and f not in ['temp', 'video_result', 'python']
-        ], key=folder_sort_key)
+        current_folders = sorted(inventory_diff.folders, key=folder_sort_key)
         
-        # 새로 추가된 폴더만 분석
+        # 새로 추가된 폴더와, 기존 폴더 중 파일이 추가/변경된 폴더만 분석
         new_folders = [f for f in current_folders if f not in analyzed_folders]
-        if not new_folders:
-            logging.info("새로 추가된 폴더가 없습니다.")
+        changed_folders = inventory_diff.changed_folders()
+        rescan_folders = [f for f in current_folders if f in analyzed_folders and f in changed_folders]
+        if not new_folders and not rescan_folders:
+            logging.info("새로 추가되거나 변경된 파일이 없습니다.")
+            self.inventory.save(inventory_diff.snapshot())
+            self.journal.clear()
             return
             
-        logging.info(f"새로 분석할 폴더: {sorted(new_folders)}")
+        if new_folders:
+            logging.info(f"새로 분석할 폴더: {sorted(new_folders)}")
+        if rescan_folders:
+            logging.info(f"파일이 추가/변경된 기존 폴더: {rescan_folders}")
+        target_folders = [f for f in current_folders if f in new_folders or f in rescan_folders]
+        changed_files = set(
+            os.path.join(self.base_path, folder_name, file_name)
+            for folder_name, file_name in inventory_diff.changed
+        )
+        
+        # 이전 실행이 중단되었다면 저널에 기록된 분석 결과 복원
+        replayed, crashed, suspects = self.journal.load()
+        if replayed:
+            logging.info(f"분석 저널에서 {len(replayed)}개 파일의 분석 결과를 복원합니다.")
+        for file_path in crashed:
+            logging.error(f"이전 분석 중 반복해서 중단된 파일은 건너뜁니다: {file_path}")
+            
+        # 내용이 바뀐 파일은 그 파일로 등록된 트랙의 특성을 다시 분석
+        track_rows = {f"{t['title']}_{t['artist']}": t for t in self.tracks}
         
-        for folder_name in new_folders:
+        def is_reanalysis(file_path, folder_name, file_name, track_key):
+            track = track_rows.get(track_key)
+            return (
+                file_path in changed_files and track is not None
+                and track['folder_name'] == folder_name and track['file_name'] == file_name
+            )
+            
+        # 분석 대상 파일을 먼저 확정 (ID 부여와 중복 판정은 직렬 실행과 같은 순서로 처리)
+        folder_files = {}
+        pending_paths = []
+        pending_keys = set(track_map)
+        for folder_name in target_folders:
             folder_path = os.path.join(self.base_path, folder_name)
-            logging.info(f"폴더 분석 중: {folder_name}")
-            
-            # 새로운 에피소드 추가
-            if folder_name not in episode_map:
-                self.episodes.append({
-                    'episode_id': episode_id,
-                    'episode_name': folder_name,
-                    'created_at': datetime.fromtimestamp(os.path.getctime(folder_path)).strftime('%Y-%m-%d %H:%M:%S')
-                })
-                episode_map[folder_name] = episode_id
-                episode_id += 1
-                
-            mp3_files = sorted([
-                f for f in os.listdir(folder_path)
-                if f.endswith('.mp3') and f.startswith('ES_')
-            ])
+            mp3_files = inventory_diff.folder_files(folder_name)
+            folder_files[folder_name] = mp3_files
             
-            for order, file_name in enumerate(mp3_files, 1):
+            for file_name in mp3_files:
+                title, artist = self.parse_file_name(file_name)
+                track_key = f"{title}_{artist}"
                 file_path = os.path.join(folder_path, file_name)
-                logging.info(f"파일 분석 중: {file_name}")
+                needs_analysis = track_key not in pending_keys or is_reanalysis(file_path, folder_name, file_name, track_key)
+                if needs_analysis:
+                    pending_keys.add(track_key)
+                    if file_path not in replayed and file_path not in crashed:
+                        pending_paths.append(file_path)
+                    
+        pending_paths = self.analyze_suspects(suspects, pending_paths, replayed)
+        folders_since_compaction = 0
+        unfinished_folders = set(target_folders)
+        with FeatureJobs(self, pending_paths, on_start=self.journal.start) as feature_jobs:
+            for folder_name in target_folders:
+                folder_path = os.path.join(self.base_path, folder_name)
+                logging.info(f"폴더 분석 중: {folder_name}")
                 
-                try:
-                    name_parts = file_name.replace('ES_', '').split(' - ')
-                    if len(name_parts) >= 2:
-                        title = name_parts[0].strip()
-                        artist = name_parts[-1].replace('.mp3', '').strip()
-                    else:
-                        title = os.path.splitext(file_name)[0].replace('ES_', '')
-                        artist = 'Unknown'
-                        
-                    track_key = f"{title}_{artist}"
+                # 기존 에피소드에 이미 있는 트랙과 다음 재생 순서 (새 에피소드는 파일 순서대로 번호를 매김)
+                existing_track_ids = set()
+                next_order = None
+                
+                # 새로운 에피소드 추가
+                if folder_name not in episode_map:
+                    episode_info = {
+                        'episode_id': episode_id,
+                        'episode_name': folder_name,
+                        'created_at': datetime.fromtimestamp(os.path.getctime(folder_path)).strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                    self.episodes.append(episode_info)
+                    self.dirty_episodes[episode_id] = episode_info
+                    episode_map[folder_name] = episode_id
+                    episode_id += 1
+                else:
+                    # 기존 에피소드는 행 순서와 ID를 그대로 두고 새로 추가된 트랙만 뒤에 이어 붙임
+                    next_order = 1
+                    for te in self.track_episodes:
+                        if te['episode_id'] == episode_map[folder_name]:
+                            existing_track_ids.add(te['track_id'])
+                            next_order = max(next_order, te['order_in_episode'] + 1)
+                self.dirty_episode_tracks.add(episode_map[folder_name])
+                    
+                mp3_files = folder_files[folder_name]
+                
+                for order, file_name in enumerate(mp3_files, 1):
+                    file_path = os.path.join(folder_path, file_name)
                     
-                    # 이미 분석된 트랙인지 확인
-                    if track_key not in track_map:
-                        audio_features = self.get_audio_features(file_path)
+                    try:
+                        title, artist = self.parse_file_name(file_name)
+                        track_key = f"{title}_{artist}"
                         
-                        track_info = {
-                            'track_id': track_id,
-                            'title': title,
-                            'artist': artist,
-                            'bpm': audio_features['bpm'],
-                            'duration_ms': audio_features['duration_ms'],
-                            'file_name': file_name,
-                            'folder_name': folder_name,
-                            'genre': audio_features['genre'],
-                            'sub_genre': audio_features['sub_genre'],
-                            'drum_intensity': audio_features['drum_intensity'],
-                            'harmonic_complexity': audio_features['harmonic_complexity']
-                        }
+                        # 이미 분석된 트랙인지 확인
+                        if track_key not in track_map:
+                            logging.info(f"파일 분석 중: {file_name}")
+                            audio_features = self.journaled_features(file_path, feature_jobs, replayed, crashed)
+                            
+                            track_info = {
+                                'track_id': track_id,
+                                'title': title,
+                                'artist': artist,
+                                'bpm': audio_features['bpm'],
+                                'duration_ms': audio_features['duration_ms'],
+                                'file_name': file_name,
+                                'folder_name': folder_name,
+                                'genre': audio_features['genre'],
+                                'sub_genre': audio_features['sub_genre'],
+                                'drum_intensity': audio_features['drum_intensity'],
+                                'harmonic_complexity': audio_features['harmonic_complexity'],
+                                'analysis_profile': audio_features['analysis_profile']
+                            }
+                            
+                            self.tracks.append(track_info)
+                            self.mark_track_dirty(track_info, inventory_diff.entries.get((folder_name, file_name)))
+                            track_rows[track_key] = track_info
+                            track_map[track_key] = track_id
+                            current_track_id = track_id
+                            track_id += 1
+                        else:
+                            if is_reanalysis(file_path, folder_name, file_name, track_key):
+                                logging.info(f"변경된 파일 재분석: {file_name}")
+                                audio_features = self.journaled_features(file_path, feature_jobs, replayed, crashed)
+                                track_rows[track_key].update({
+                                    key: audio_features[key] for key in TRACK_FEATURE_COLUMNS
+                                })
+                                self.mark_track_dirty(track_rows[track_key], inventory_diff.entries.get((folder_name, file_name)))
+                                changed_files.discard(file_path)
+                            current_track_id = track_map[track_key]
+                            
+                        if current_track_id in existing_track_ids:
+                            continue
+                        self.track_episodes.append({
+                            'track_episode_id': track_episode_id,
+                            'track_id': current_track_id,
+                            'episode_id': episode_map[folder_name],
+                            'order_in_episode': order if next_order is None else next_order
+                        })
+                        track_episode_id += 1
+                        if next_order is not None:
+                            next_order += 1
                         
-                        self.tracks.append(track_info)
-                        track_map[track_key] = track_id
-                        current_track_id = track_id
-                        track_id += 1
-                    else:
-                        current_track_id = track_map[track_key]
+                    except Exception as e:
+                        logging.error(f"파일 처리 실패: {file_name} - {str(e)}")
+                        continue
                         
-                    self.track_episodes.append({
-                        'track_episode_id': track_episode_id,
-                        'track_id': current_track_id,
-                        'episode_id': episode_map[folder_name],
-                        'order_in_episode': order
-                    })
-                    track_episode_id += 1
+                logging.info(f"{folder_name} 폴더 처리 완료: {len(mp3_files)}개 파일")
+                
+                # 주기적으로 완료된 폴더까지 CSV와 파일 인덱스에 반영하고 저널 비우기
+                unfinished_folders.discard(folder_name)
+                folders_since_compaction += 1
+                if self.compact_every and folders_since_compaction >= self.compact_every:
+                    if self.compact_journal():
+                        self.inventory.save(inventory_diff.snapshot(unfinished_folders))
+                        # 카탈로그가 다른 실행과 겹치지 않게 ID를 바꿨을 수 있으므로 ID 맵과 다음 ID를 다시 계산
+                        track_map, episode_map, track_id, episode_id, track_episode_id = self.next_ids()
+                    folders_since_compaction = 0
+            
+        # 분석 결과 저장
+        if folders_since_compaction:
+            if self.compact_journal():
+                self.inventory.save(inventory_diff.snapshot())
+        if self.feature_cache is not None:
+            self.feature_cache.prune()
+        logging.info(f"전체 분석 완료: 신규 {len(new_folders)}개 폴더, 재검사 {len(rescan_folders)}개 폴더 (전체 {len(current_folders)}개 폴더)")
+        if inventory_diff.removed:
+            logging.warning(f"삭제된 파일 {len(inventory_diff.removed)}개 (트랙 기록은 유지됩니다)")
+        self.metrics.report()
+        
+    def analyze_suspects(self, suspects, pending_paths, replayed):
+        """이전 실행이 중단될 때 함께 진행 중이던 파일을 한 파일씩 따로 분석하고 나머지 분석 대상 반환"""
+        isolated = [file_path for file_path in pending_paths if file_path in suspects]
+        if not isolated or self.profile_params.get('metadata_only'):
+            return pending_paths
+        logging.warning(f"이전 분석이 중단될 때 진행 중이던 파일 {len(isolated)}개를 한 파일씩 다시 분석합니다.")
+        for file_path in isolated:
+            # 다른 파일의 디코딩/분석이 진행 중이지 않으므로 다시 중단되면 이 파일의 중단 횟수로 셈
+            self.journal.start(file_path, solo=True)
+            audio_features = self.get_audio_features(file_path)
+            self.journal.record(file_path, audio_features)
+            replayed[file_path] = audio_features
+        return [file_path for file_path in pending_paths if file_path not in suspects]
+        
+    def journaled_features(self, file_path, feature_jobs, replayed, crashed):
+        """저널에 기록된 결과가 있으면 재사용하고, 없으면 분석 후 저널에 기록"""
+        if self.profile_params.get('metadata_only'):
+            # 헤더만 다시 읽으면 되므로 저널에 기록하지 않음
+            return feature_jobs.get(file_path)
+        if file_path in replayed:
+            return replayed[file_path]
+        if file_path in crashed:
+            return self.failed_audio_features()
+            
+        # 분석 시작 기록은 FeatureJobs가 실제로 분석을 시작할 때 남김 (배치는 묶인 파일 모두)
+        audio_features = feature_jobs.get(file_path)
+        self.journal.record(file_path, audio_features)
+        return audio_features
+        
+    def load_existing_csv(self):
+        """기존 CSV 파일(또는 SQLite 카탈로그)이 있으면 트랙/에피소드 기록 복원"""
+        if self.catalog is not None:
+            if self.catalog.is_empty():
+                return False
+            self.tracks = self.catalog.load_tracks()
+            self.episodes = self.catalog.load_episodes()
+            self.track_episodes = self.catalog.load_track_episodes()
+            return True
+        if not os.path.exists(os.path.join(self.output_dir, 'tracks.csv')):
+            return False
+        # 시작할 때 검사한 CSV를 다른 호출자와 같은 데이터프레임으로 공유
+        files = csv_files(self.output_dir)
+        self.tracks = files.frame('tracks.csv').to_dict('records')
+        self.episodes = files.frame('episodes.csv').to_dict('records')
+        self.track_episodes = files.frame('track_episodes.csv').to_dict('records')
+        return True
+        
+    def mark_track_dirty(self, track, inventory_entry=None):
+        """다음 저장 때 카탈로그에 기록할 트랙 (파일 인덱스 항목이 있으면 콘텐츠 해시도 기록)"""
+        self.dirty_tracks[track['track_id']] = track
+        if inventory_entry is not None and inventory_entry['content_hash']:
+            self.track_hashes[track['track_id']] = inventory_entry['content_hash']
+        
+    def is_pending(self, track):
+        """메타데이터만 등록되어 아직 오디오 분석이 필요한 트랙인지"""
+        return track.get('analysis_profile') == 'metadata'
+        
+    def analyze_pending(self):
+        """메타데이터 스캔으로 등록된 트랙(BPM/장르 대기)의 오디오 특성 분석
+        
+        트랙 순서(폴더 순서)대로 분석하며 결과를 저널에 기록하고 (compact_every개 폴더마다) CSV에 반영하므로
+        중간에 중단되어도 다시 실행하면 남은 트랙부터 이어서 분석한다.
+        """
+        if self.profile_params.get('metadata_only'):
+            raise ValueError("대기 트랙 분석에는 오디오를 디코딩하는 분석 프로파일이 필요합니다.")
+        if not self.load_existing_csv():
+            logging.info("분석할 트랙 정보가 없습니다.")
+            return 0
+            
+        pending_tracks = [t for t in self.tracks if self.is_pending(t)]
+        if not pending_tracks:
+            logging.info("분석 대기 중인 트랙이 없습니다.")
+            return 0
+        logging.info(f"분석 대기 트랙 {len(pending_tracks)}개 분석 시작 (프로파일: {self.profile})")
+        
+        replayed, crashed, suspects = self.journal.load()
+        track_paths = [
+            os.path.join(self.base_path, t['folder_name'], t['file_name'])
+            for t in pending_tracks
+        ]
+        pending_paths = [
+            file_path for file_path in track_paths
+            if os.path.exists(file_path) and file_path not in replayed and file_path not in crashed
+        ]
+        pending_paths = self.analyze_suspects(suspects, pending_paths, replayed)
+        
+        analyzed = 0
+        current_folder = None
+        folders_since_compaction = 0
+        with FeatureJobs(self, pending_paths, on_start=self.journal.start) as feature_jobs:
+            for track, file_path in zip(pending_tracks, track_paths):
+                if track['folder_name'] != current_folder:
+                    if current_folder is not None:
+                        folders_since_compaction += 1
+                        if self.compact_every and folders_since_compaction >= self.compact_every:
+                            self.compact_journal()
+                            folders_since_compaction = 0
+                    current_folder = track['folder_name']
                     
-                except Exception as e:
-                    logging.error(f"파일 처리 실패: {file_name} - {str(e)}")
+                if not os.path.exists(file_path):
+                    logging.warning(f"파일이 없어 분석을 건너뜁니다: {file_path}")
                     continue
                     
-            logging.info(f"{folder_name} 폴더 처리 완료: {len(mp3_files)}개 파일")
+                logging.info(f"대기 트랙 분석 중: {track['file_name']}")
+                audio_features = self.journaled_features(file_path, feature_jobs, replayed, crashed)
+                track.update({key: audio_features[key] for key in TRACK_FEATURE_COLUMNS})
+                self.mark_track_dirty(track)
+                analyzed += 1
+                
+        self.compact_journal()
+        if self.feature_cache is not None:
+            self.feature_cache.prune()
+        logging.info(f"대기 트랙 분석 완료: {analyzed}개")
+        self.metrics.report()
+        return analyzed
+        
+    def compact_journal(self):
+        """현재까지의 분석 결과를 CSV(또는 카탈로그)로 저장하고 저널 비우기"""
+        if self.save():
+            self.journal.clear()
+            return True
+        return False
             
-        # 분석 결과 저장
-        self.save_to_csv()
-        logging.info(f"전체 분석 완료: 기존 {len(analyzed_folders)}개 + 신규 {len(new_folders)}개 = 총 {len(analyzed_folders) + len(new_folders)}개 폴더")
+    def parse_file_name(self, file_name):
+        """파일명(ES_제목 - 아티스트.mp3)에서 제목과 아티스트 추출"""
+        name_parts = file_name.replace('ES_', '').split(' - ')
+        if len(name_parts) >= 2:
+            title = name_parts[0].strip()
+            artist = name_parts[-1].replace('.mp3', '').strip()
+        else:
+            title = os.path.splitext(file_name)[0].replace('ES_', '')
+            artist = 'Unknown'
+        return title, artist
+        
+    def worker_config(self):
+        """프로세스 풀 워커에서 분석기를 다시 만들기 위한 설정"""
+        return {
+            'base_path': self.base_path,
+            'workers': 1,
+            'prefetch': 0,
+            'use_cache': self.use_cache,
+            'cache_dir': self.cache_dir,
+            'feature_engine': self.feature_engine,
+            'profile': self.profile,
+            'metrics': self.use_metrics,
+            'trace_memory': self.trace_memory
+        }
+        
+    def analysis_params(self):
+        """분석 결과에 영향을 주는 파라미터 (특성 캐시 키에 포함)"""
+        return {
+            'version': ANALYZER_VERSION,
+            'engine': self.feature_engine,
+            'profile': self.profile,
+            **self.profile_params
+        }
         
     def get_audio_features(self, file_path):
-        """오디오 파일 분석"""
+        """오디오 파일 분석 (같은 내용의 파일은 특성 캐시에서 바로 반환)"""
         try:
-            y, sr = librosa.load(file_path, duration=60)
-            audio = MP3(file_path)
-            duration_ms = int(audio.info.length * 1000)
-            
-            genre_info = self.analyze_genre(y, sr)
-            bpm = self.adjust_bpm(genre_info['tempo'])
-            
-            return {
-                'bpm': bpm,
-                'duration_ms': duration_ms,
-                'genre': genre_info['genre'],
-                'sub_genre': genre_info['sub_genre'],
-                'drum_intensity': genre_info['drum_intensity'],
-                'harmonic_complexity': genre_info['harmonic_complexity']
-            }
+            return self.analyze_decoded(self.read_audio(file_path))
             
         except Exception as e:
             logging.error(f"오디오 분석 실패: {file_path} - {str(e)}")
-            return {
-                'bpm': 0,
-                'duration_ms': 0,
-                'genre': 'Unknown',
-                'sub_genre': 'Unknown',
-                'drum_intensity': 0,
-                'harmonic_complexity': 0
-            }
+            return self.failed_audio_features()
             
-    def save_to_csv(self):
-        """분석 결과를 CSV로 저장"""
+    def read_audio(self, file_path):
+        """파일을 한 번만 열어 콘텐츠 해시, 재생 시간, 디코딩까지 처리 (리더 스레드에서 실행 가능)
+        
+        NAS 같은 원격 저장소에서는 파일을 여는 횟수가 곧 왕복 지연이므로 내용을 한 번 읽은 뒤
+        메모리에서 해시/태그/디코딩을 모두 수행한다. 캐시에 있는 파일은 디코딩하지 않는다.
+        """
+        decoded = {'file_path': file_path, 'file_hash': None, 'features': None}
+        if self.profile_params.get('metadata_only'):
+            decoded['features'] = self.metadata_features(file_path)
+            return decoded
+            
+        with self.metrics.track(file_path):
+            if self.profile_params.get('stream'):
+                return self.read_audio_stream(decoded)
+            return self.read_audio_clip(decoded)
+            
+    def read_audio_clip(self, decoded):
+        """파일 내용을 한 번 읽어 메모리에서 해시/재생 시간/디코딩 (분석 프로파일의 앞부분 클립)"""
+        file_path = decoded['file_path']
+        with self.metrics.stage('open') as stage:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            stage['bytes_read'] = len(data)
+            
+        if self.feature_cache is not None:
+            with self.metrics.stage('hash'):
+                decoded['file_hash'] = content_hash_bytes(data)
+            decoded['features'] = self.cached_features(file_path, decoded['file_hash'])
+            if decoded['features'] is not None:
+                return decoded
+                
+        buffer = io.BytesIO(data)
+        decoded['duration_ms'] = int(MP3(buffer).info.length * 1000)
         try:
-            pd.DataFrame(self.tracks).to_csv(
-                os.path.join(self.output_dir, 'tracks.csv'),
-                index=False,
-                encoding='utf-8-sig'
+            buffer.seek(0)
+            decoded['y'], decoded['sr'] = self.load_audio(buffer)
+        except Exception as e:
+            # 메모리에서 디코딩할 수 없는 형식은 경로로 다시 시도 (audioread 등 다른 디코더 사용)
+            logging.warning(f"메모리 디코딩 실패, 파일 경로로 다시 시도: {os.path.basename(file_path)} - {str(e)}")
+            decoded['y'], decoded['sr'] = self.load_audio(file_path)
+        return decoded
+        
+    def read_audio_stream(self, decoded):
+        """스트리밍 프로파일: 열린 파일 하나로 해시, 재생 시간, 블록 단위 분석 (곡 전체를 메모리에 올리지 않음)"""
+        file_path = decoded['file_path']
+        with open(file_path, 'rb') as f:
+            if self.feature_cache is not None:
+                with self.metrics.stage('hash'):
+                    decoded['file_hash'] = content_hash_fileobj(f)
+                decoded['features'] = self.cached_features(file_path, decoded['file_hash'])
+                if decoded['features'] is not None:
+                    return decoded
+                    
+            with self.metrics.stage('open'):
+                decoded['duration_ms'] = int(MP3(f).info.length * 1000)
+                f.seek(0)
+            # 스트리밍 분석은 디코딩과 특성 계산이 블록 단위로 번갈아 일어나므로 한 단계로 기록
+            with self.metrics.stage('stream', bytes_read=os.fstat(f.fileno()).st_size):
+                decoded['stream_features'] = stream_spectral_features(f, block_frames=self.profile_params['block_frames'])
+        return decoded
+        
+    def cached_features(self, file_path, file_hash):
+        features = self.feature_cache.get(file_hash, self.analysis_params())
+        if features is not None:
+            logging.info(f"특성 캐시 사용: {os.path.basename(file_path)}")
+        return features
+        
+    def load_audio(self, source):
+        """분석 프로파일에 맞춰 오디오 디코딩 (원본 샘플레이트로 디코딩한 뒤 리샘플링, librosa.load와 같은 결과)"""
+        with self.metrics.stage('decode'):
+            y, native_sr = librosa.load(source, sr=None, duration=self.profile_params['duration'])
+        with self.metrics.stage('resample'):
+            y = librosa.resample(
+                y,
+                orig_sr=native_sr,
+                target_sr=self.profile_params['sr'],
+                res_type=self.profile_params['res_type']
             )
+        return y, self.profile_params['sr']
+        
+    def analyze_decoded(self, decoded):
+        """read_audio 결과로 특성 계산 후 캐시에 저장"""
+        if decoded['features'] is not None:
+            return decoded['features']
             
-            pd.DataFrame(self.episodes).to_csv(
-                os.path.join(self.output_dir, 'episodes.csv'),
-                index=False,
-                encoding='utf-8-sig'
+        with self.metrics.track(decoded['file_path']):
+            return self.build_features(decoded, self.analyze_decoded_genre(decoded))
+            
+    def analyze_decoded_genre(self, decoded):
+        if 'stream_features' in decoded:
+            stream_features = decoded['stream_features']
+            genre_info = self.classify_genre(
+                stream_features['tempo'],
+                stream_features['percussive_rms'],
+                stream_features['chroma_complexity']
             )
+        else:
+            genre_info = self.analyze_genre(decoded['y'], decoded['sr'])
+        return genre_info
+        
+    def build_features(self, decoded, genre_info):
+        """장르 분석 결과로 트랙 특성을 만들고 캐시에 저장"""
+        features = {
+            'bpm': self.adjust_bpm(genre_info['tempo']),
+            'duration_ms': decoded['duration_ms'],
+            'genre': genre_info['genre'],
+            'sub_genre': genre_info['sub_genre'],
+            'drum_intensity': genre_info['drum_intensity'],
+            'harmonic_complexity': genre_info['harmonic_complexity'],
+            'analysis_profile': self.profile
+        }
+        
+        if decoded['file_hash'] is not None:
+            self.feature_cache.put(decoded['file_hash'], self.analysis_params(), features)
+        return features
+        
+    def get_audio_features_batch(self, file_paths):
+        """여러 파일을 읽은 뒤 같은 길이의 클립끼리 묶어 한 번에 분석 (입력 순서대로 특성 반환)"""
+        decoded_list = []
+        for file_path in file_paths:
+            try:
+                decoded_list.append(self.read_audio(file_path))
+            except Exception as e:
+                logging.error(f"오디오 분석 실패: {file_path} - {str(e)}")
+                decoded_list.append(None)
+        return self.analyze_decoded_batch(decoded_list)
+        
+    def analyze_decoded_batch(self, decoded_list):
+        """read_audio 결과 목록의 특성 계산
+        
+        shared 엔진은 샘플레이트와 길이가 같은 클립(대부분 앞 60초)을 트랙 수 × 샘플 수 배열로
+        쌓아 compute_spectral_features_batch 한 번으로 계산한다. 캐시 적중, 스트리밍/legacy 분석,
+        길이가 다른 짧은 곡은 파일별로 계산한다. 읽기에 실패한 항목(None)은 실패 특성을 반환한다.
+        """
+        features = [None] * len(decoded_list)
+        groups = {}
+        for i, decoded in enumerate(decoded_list):
+            if decoded is None:
+                features[i] = self.failed_audio_features()
+            elif decoded['features'] is None and 'y' in decoded and self.feature_engine == 'shared':
+                groups.setdefault((decoded['sr'], len(decoded['y'])), []).append(i)
+            else:
+                features[i] = self.analyze_decoded_safe(decoded)
+                
+        for (sr, _), indices in groups.items():
+            if len(indices) == 1:
+                features[indices[0]] = self.analyze_decoded_safe(decoded_list[indices[0]])
+                continue
+                
+            try:
+                with self.metrics.track(f"batch({len(indices)})"):
+                    batch_features = compute_spectral_features_batch(
+                        np.stack([decoded_list[i]['y'] for i in indices]),
+                        sr,
+                        n_fft=self.profile_params['n_fft'],
+                        hop_length=self.profile_params['hop_length'],
+                        kernel_size=self.profile_params.get('hpss_kernel', HPSS_KERNEL_SIZE),
+                        metrics=self.metrics
+                    )
+            except Exception as e:
+                logging.error(f"배치 특성 계산 실패, 파일별로 다시 계산: {str(e)}")
+                batch_features = [None] * len(indices)
+                
+            for i, spectral_features in zip(indices, batch_features):
+                if spectral_features is None:
+                    features[i] = self.analyze_decoded_safe(decoded_list[i])
+                else:
+                    features[i] = self.build_features(decoded_list[i], self.classify_genre(**spectral_features))
+        return features
+        
+    def analyze_decoded_safe(self, decoded):
+        try:
+            return self.analyze_decoded(decoded)
+        except Exception as e:
+            logging.error(f"오디오 분석 실패: {decoded['file_path']} - {str(e)}")
+            return self.failed_audio_features()
+            
+    def metadata_features(self, file_path):
+        """MP3 헤더에서 재생 시간만 읽고 BPM/장르는 분석 대기로 표시"""
+        audio = MP3(file_path)
+        return {
+            'bpm': 0,
+            'duration_ms': int(audio.info.length * 1000),
+            'genre': PENDING_GENRE,
+            'sub_genre': PENDING_GENRE,
+            'drum_intensity': 0,
+            'harmonic_complexity': 0,
+            'analysis_profile': self.profile
+        }
+        
+    def failed_audio_features(self):
+        """분석에 실패한 파일의 기본 특성"""
+        return {
+            'bpm': 0,
+            'duration_ms': 0,
+            'genre': 'Unknown',
+            'sub_genre': 'Unknown',
+            'drum_intensity': 0,
+            'harmonic_complexity': 0,
+            'analysis_profile': self.profile
+        }
+        
+    def compare_feature_engines(self, file_paths):
+        """공유 STFT 엔진과 기존 경로의 속도와 결과 차이 비교"""
+        rows = []
+        for file_path in file_paths:
+            try:
+                y, sr = librosa.load(file_path, duration=60)
+            except Exception as e:
+                logging.error(f"비교용 오디오 로드 실패: {file_path} - {str(e)}")
+                continue
+                
+            start = time.perf_counter()
+            legacy = self.analyze_genre_legacy(y, sr)
+            legacy_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            shared = self.classify_genre(**compute_spectral_features(y, sr))
+            shared_seconds = time.perf_counter() - start
+            
+            drum_rel = abs(shared['drum_intensity'] - legacy['drum_intensity']) / max(legacy['drum_intensity'], 1e-3)
+            rows.append({
+                'file_name': os.path.basename(file_path),
+                'legacy_seconds': round(legacy_seconds, 4),
+                'shared_seconds': round(shared_seconds, 4),
+                'legacy_bpm': self.adjust_bpm(legacy['tempo']),
+                'shared_bpm': self.adjust_bpm(shared['tempo']),
+                'drum_intensity_rel_diff': round(drum_rel, 4),
+                'harmonic_complexity_diff': round(abs(shared['harmonic_complexity'] - legacy['harmonic_complexity']), 4),
+                'genre_match': shared['genre'] == legacy['genre']
+            })
+            
+        if not rows:
+            return None
             
-            pd.DataFrame(self.track_episodes).to_csv(
-                os.path.join(self.output_dir, 'track_episodes.csv'),
-                index=False,
-                encoding='utf-8-sig'
+        report = pd.DataFrame(rows)
+        legacy_total = report['legacy_seconds'].sum()
+        shared_total = report['shared_seconds'].sum()
+        summary = {
+            'files': len(report),
+            'legacy_seconds': round(float(legacy_total), 3),
+            'shared_seconds': round(float(shared_total), 3),
+            'speedup': round(float(legacy_total / shared_total), 2) if shared_total > 0 else None,
+            'max_bpm_diff': float((report['shared_bpm'] - report['legacy_bpm']).abs().max()),
+            'max_drum_intensity_rel_diff': float(report['drum_intensity_rel_diff'].max()),
+            'max_harmonic_complexity_diff': float(report['harmonic_complexity_diff'].max()),
+            'genre_match_rate': float(report['genre_match'].mean()),
+            'within_tolerance': bool(
+                (report['shared_bpm'] - report['legacy_bpm']).abs().max() <= ENGINE_TOLERANCE['bpm']
+                and report['drum_intensity_rel_diff'].max() <= ENGINE_TOLERANCE['drum_intensity_rel']
+                and report['harmonic_complexity_diff'].max() <= ENGINE_TOLERANCE['harmonic_complexity_abs']
             )
+        }
+        
+        logging.info(f"특성 엔진 비교: {summary['files']}개 파일, 기존 {summary['legacy_seconds']}초 / 공유 STFT {summary['shared_seconds']}초 ({summary['speedup']}배)")
+        logging.info(f"최대 차이: BPM {summary['max_bpm_diff']}, 드럼강도 {summary['max_drum_intensity_rel_diff']:.1%}, 하모닉복잡도 {summary['max_harmonic_complexity_diff']}, 장르 일치율 {summary['genre_match_rate']:.1%}")
+        return {'summary': summary, 'files': report}
+        
+    def save(self):
+        """분석 결과 저장 (SQLite 카탈로그는 바뀐 행만, CSV는 전체 다시 쓰기) 후 유사도 인덱스 갱신"""
+        changed_tracks = list(self.dirty_tracks.values())
+        saved = self.save_to_catalog() if self.catalog is not None else self.save_to_csv()
+        if saved:
+            # 유사도 인덱스에는 마지막 저장 이후 추가/변경된 트랙만 반영
+            update_similarity_index(self.output_dir, self.tracks, changed_tracks)
+            self.dirty_tracks = {}
+        return saved
+        
+    def save_to_catalog(self):
+        """마지막 저장 이후 바뀐 트랙/에피소드만 카탈로그에 한 트랜잭션으로 기록"""
+        try:
+            with self.metrics.stage('db_write'):
+                episode_tracks = {episode_id: [] for episode_id in self.dirty_episode_tracks}
+                if episode_tracks:
+                    for te in self.track_episodes:
+                        if te['episode_id'] in episode_tracks:
+                            episode_tracks[te['episode_id']].append(te)
+                remapped = self.catalog.save_changes(
+                    tracks=[(track, self.track_hashes.get(track_id)) for track_id, track in self.dirty_tracks.items()],
+                    episodes=list(self.dirty_episodes.values()),
+                    episode_tracks=episode_tracks
+                )
+                self.apply_catalog_ids(remapped)
+            logging.info(f"카탈로그 저장 완료: 트랙 {len(self.dirty_tracks)}개, 에피소드 {len(self.dirty_episodes)}개, 트랙 순서 {len(episode_tracks)}개 에피소드")
+            self.dirty_tracks = {}
+            self.dirty_episodes = {}
+            self.dirty_episode_tracks = set()
+            self.track_hashes = {}
+            return True
+        except Exception as e:
+            logging.error(f"카탈로그 저장 실패: {str(e)}")
+            return False
+            
+    def apply_catalog_ids(self, remapped):
+        """카탈로그가 부여한 ID로 메모리의 트랙/에피소드/트랙-에피소드 행 갱신 (다른 실행이 먼저 쓴 ID를 피한 경우)"""
+        if not any(remapped.values()):
+            return
+        for track in self.dirty_tracks.values():
+            track['track_id'] = remapped['tracks'].get(track['track_id'], track['track_id'])
+        for episode in self.dirty_episodes.values():
+            episode['episode_id'] = remapped['episodes'].get(episode['episode_id'], episode['episode_id'])
+        # 트랙-에피소드 행 ID는 이번에 다시 저장한 에피소드의 행만 바뀜
+        saved_episodes = {remapped['episodes'].get(episode_id, episode_id) for episode_id in self.dirty_episode_tracks}
+        for te in self.track_episodes:
+            te['track_id'] = remapped['tracks'].get(te['track_id'], te['track_id'])
+            te['episode_id'] = remapped['episodes'].get(te['episode_id'], te['episode_id'])
+            if te['episode_id'] in saved_episodes:
+                te['track_episode_id'] = remapped['track_episodes'].get(te['track_episode_id'], te['track_episode_id'])
+        logging.warning(f"다른 실행이 먼저 저장한 ID를 피해 새 ID를 부여했습니다: 트랙 {len(remapped['tracks'])}개, 에피소드 {len(remapped['episodes'])}개")
+        
+    def next_ids(self):
+        """메모리의 트랙/에피소드 기준 ID 맵과 다음 ID (트랙 맵, 에피소드 맵, 트랙 ID, 에피소드 ID, 트랙-에피소드 ID)"""
+        return (
+            {f"{t['title']}_{t['artist']}": t['track_id'] for t in self.tracks},
+            {e['episode_name']: e['episode_id'] for e in self.episodes},
+            max([t['track_id'] for t in self.tracks], default=0) + 1,
+            max([e['episode_id'] for e in self.episodes], default=0) + 1,
+            max([te['track_episode_id'] for te in self.track_episodes], default=0) + 1
+        )
+        
+    def save_to_csv(self):
+        """분석 결과를 CSV로 저장"""
+        try:
+            with self.metrics.stage('csv_write'):
+                written = {
+                    'tracks.csv': pd.DataFrame(self.tracks),
+                    'episodes.csv': pd.DataFrame(self.episodes),
+                    'track_episodes.csv': pd.DataFrame(self.track_episodes)
+                }
+                for file_name, df in written.items():
+                    df.to_csv(
+                        os.path.join(self.output_dir, file_name),
+                        index=False,
+                        encoding='utf-8-sig'
+                    )
+                # 다음 실행의 CSV 검사가 파일을 다시 읽지 않도록 매니페스트에 기록
+                csv_files(self.output_dir).record_written(written)
             
             logging.info(f"CSV 파일 저장 완료: {self.output_dir}")
+            return True
         except Exception as e:
             logging.error(f"CSV 저장 실패: {str(e)}")
+            return False
             
     def format_srt_timestamp(self, ms):
         """밀리초를 SRT 타임스탬프 형식(HH:MM:SS,mmm)으로 변환"""
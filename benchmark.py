@@ -0,0 +1,335 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import soundfile as sf
+import pandas as pd
+
+from metrics import STAGES, max_rss_bytes
+
+# 합성 음원 샘플레이트 (일반적인 MP3 음원과 같게)
+BENCH_SR = 44100
+
+# 합성 음원 템포 (adjust_bpm의 60-100 범위 안이라 기대값이 그대로 유지됨)
+BENCH_TEMPOS = [70, 72, 75, 78, 80, 82, 85, 88, 90, 92, 95]
+
+# 사인파 코드 진행 (Am - G - F - E, 한 소절씩)
+BENCH_CHORDS = [
+    (220.00, 261.63, 329.63),
+    (196.00, 246.94, 293.66),
+    (174.61, 220.00, 261.63),
+    (164.81, 207.65, 246.94)
+]
+
+# BPM 정확도 허용 오차 (상대 오차, 템포 추정의 프레임 해상도 고려)
+BPM_TOLERANCE = 0.03
+
+# 에피소드 폴더 하나에 넣을 파일 수
+FILES_PER_FOLDER = 100
+
+SCENARIOS = ['get_audio_features', 'analyze_genre', 'analyze_folders']
+
+def synth_track(bpm, seconds, seed, sr=BENCH_SR):
+    """클릭 트랙(알려진 BPM) + 사인파 코드 + 노이즈 베드로 로파이 비슷한 합성 음원 생성"""
+    rng = np.random.default_rng(seed)
+    n_samples = int(sr * seconds)
+    t = np.arange(n_samples) / sr
+    beat = 60.0 / bpm
+
+    # 노이즈 베드 (바이닐/테이프 히스)
+    y = 0.03 * rng.standard_normal(n_samples)
+
+    # 한 소절(4박)마다 바뀌는 사인파 코드
+    chord_index = ((t // (4 * beat)).astype(int) + seed) % len(BENCH_CHORDS)
+    for voice in range(3):
+        freqs = np.array([chord[voice] for chord in BENCH_CHORDS])[chord_index]
+        y += 0.08 * np.sin(2 * np.pi * freqs * t)
+
+    # 박마다 감쇠하는 노이즈 클릭 (첫 박 강세)
+    click_length = int(0.03 * sr)
+    envelope = np.exp(-np.arange(click_length) / (0.004 * sr))
+    for k, onset in enumerate(np.arange(0, seconds, beat)):
+        start = int(onset * sr)
+        length = min(click_length, n_samples - start)
+        gain = 0.9 if k % 4 == 0 else 0.6
+        y[start:start + length] += gain * envelope[:length] * rng.standard_normal(length)
+
+    y *= 0.9 / np.max(np.abs(y))
+    return y.astype(np.float32)
+
+def ordinal_folder(index):
+    """1st, 2nd, 3rd, 4th ... (analyze_folders의 폴더 정렬 규칙과 같은 이름)"""
+    if 10 <= index % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(index % 10, 'th')
+    return f"{index}{suffix}"
+
+def generate_dataset(data_dir, n_files, unique, seconds, seed=0):
+    """합성 음원 데이터셋 생성 (unique개만 새로 합성하고 나머지는 복사, 이미 있으면 재사용)
+
+    반환값은 데이터셋 폴더 기준 상대 경로 → 기대 BPM 목록 (파일명 순서)
+    """
+    manifest_path = os.path.join(data_dir, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('seconds') != seconds or manifest.get('unique') != unique or manifest.get('seed') != seed:
+            logging.info("합성 조건이 달라 데이터셋을 다시 만듭니다.")
+            shutil.rmtree(data_dir)
+            manifest = {}
+
+    files = manifest.get('files', [])
+    if len(files) >= n_files:
+        return files[:n_files]
+
+    os.makedirs(data_dir, exist_ok=True)
+    start = time.perf_counter()
+    for i in range(len(files), n_files):
+        bpm = BENCH_TEMPOS[i % len(BENCH_TEMPOS)] if i < unique else files[i % unique]['bpm']
+        folder = ordinal_folder(i // FILES_PER_FOLDER + 1)
+        file_name = f"ES_Bench {i:05d} - Synth {bpm}.mp3"
+        os.makedirs(os.path.join(data_dir, folder), exist_ok=True)
+        path = os.path.join(data_dir, folder, file_name)
+        if i < unique:
+            sf.write(path, synth_track(bpm, seconds, seed + i), BENCH_SR, format='MP3')
+        else:
+            # 처리량 측정용 복사본 (파일명이 달라 별도 트랙으로 분석됨)
+            shutil.copyfile(os.path.join(data_dir, files[i % unique]['path']), path)
+        files.append({'path': os.path.join(folder, file_name), 'bpm': bpm, 'unique': i < unique})
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'seconds': seconds, 'unique': unique, 'seed': seed, 'files': files}, f, ensure_ascii=False)
+    logging.info(f"합성 음원 {n_files}개 준비 완료 ({time.perf_counter() - start:.1f}초)")
+    return files
+
+def link_subset(data_dir, files, target_dir):
+    """데이터셋의 앞 N개 파일만 담은 폴더 구성 (하드 링크, 안 되면 복사)"""
+    if os.path.exists(target_dir):
+        shutil.rmtree(target_dir)
+    for entry in files:
+        source = os.path.join(data_dir, entry['path'])
+        target = os.path.join(target_dir, entry['path'])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+
+def bpm_accuracy(expected, measured):
+    """기대 BPM 대비 측정 BPM 정확도 (adjust_bpm 적용 후 값 비교)"""
+    errors = [abs(measured[name] - bpm) / bpm for name, bpm in expected.items() if name in measured]
+    if not errors:
+        return {'files': 0, 'accuracy': None, 'mean_abs_error': None}
+    abs_errors = [abs(measured[name] - bpm) for name, bpm in expected.items() if name in measured]
+    return {
+        'files': len(errors),
+        'accuracy': round(sum(error <= BPM_TOLERANCE for error in errors) / len(errors), 4),
+        'mean_abs_error': round(float(np.mean(abs_errors)), 3)
+    }
+
+def run_scenario(scenario, size, data_dir, args):
+    """시나리오 하나를 실행하여 처리량, 단계별 지연, 최대 RSS, BPM 정확도 측정 (별도 프로세스에서 호출)"""
+    from analyzer import LofiMusicAnalyzer
+    from streaming import stream_spectral_features
+
+    files = generate_dataset(data_dir, size, args.unique, args.seconds)
+    run_dir = tempfile.mkdtemp(prefix=f'lofi_bench_{scenario}_{size}_')
+    base_path = os.path.join(run_dir, 'reference')
+    link_subset(data_dir, files, base_path)
+    os.chdir(run_dir)
+
+    analyzer = LofiMusicAnalyzer(
+        base_path,
+        workers=args.workers,
+        use_cache=False,
+        feature_engine=args.feature_engine,
+        profile=args.profile,
+        metrics=True
+    )
+    expected = {os.path.basename(entry['path']): entry['bpm'] for entry in files if entry['unique']}
+    measured = {}
+
+    start = time.perf_counter()
+    if scenario == 'get_audio_features':
+        for entry in files:
+            features = analyzer.get_audio_features(os.path.join(base_path, entry['path']))
+            measured[os.path.basename(entry['path'])] = features['bpm']
+    elif scenario == 'analyze_genre' and analyzer.profile_params.get('stream'):
+        # 스트리밍 분석은 디코딩과 특성 계산이 블록 단위로 번갈아 일어나므로 파일 내용만 메모리에 올려
+        # 디스크 I/O를 제외하고 스트리밍 특성 추출 경로 전체를 반복 분석
+        contents = {}
+        for entry in files:
+            if entry['unique']:
+                with open(os.path.join(base_path, entry['path']), 'rb') as f:
+                    contents[os.path.basename(entry['path'])] = f.read()
+        names = list(contents)
+        block_frames = analyzer.profile_params['block_frames']
+        start = time.perf_counter()
+        for i in range(size):
+            name = names[i % len(names)]
+            with analyzer.metrics.stage('stream'):
+                stream_features = stream_spectral_features(io.BytesIO(contents[name]), block_frames=block_frames)
+            measured[name] = analyzer.adjust_bpm(stream_features['tempo'])
+    elif scenario == 'analyze_genre':
+        # 디코딩은 제외하고 고유 음원 클립만 메모리에 올려 반복 분석
+        clips = {}
+        for entry in files:
+            if entry['unique']:
+                decoded = analyzer.read_audio(os.path.join(base_path, entry['path']))
+                clips[os.path.basename(entry['path'])] = (decoded['y'], decoded['sr'])
+        names = list(clips)
+        start = time.perf_counter()
+        for i in range(size):
+            name = names[i % len(names)]
+            y, sr = clips[name]
+            measured[name] = analyzer.adjust_bpm(analyzer.analyze_genre(y, sr)['tempo'])
+    else:
+        analyzer.analyze_folders()
+        tracks_df = pd.read_csv(os.path.join(analyzer.output_dir, 'tracks.csv'))
+        measured = dict(zip(tracks_df['file_name'], tracks_df['bpm']))
+    seconds = time.perf_counter() - start
+
+    stage_latency = {
+        name: round(total['wall_seconds'] / total['calls'] * 1000, 2)
+        for name, total in analyzer.metrics.totals.items()
+    }
+    shutil.rmtree(run_dir, ignore_errors=True)
+    return {
+        'scenario': scenario,
+        'size': size,
+        'seconds': round(seconds, 3),
+        'tracks_per_second': round(size / seconds, 3) if seconds > 0 else None,
+        'stage_latency_ms': stage_latency,
+        'peak_rss_mb': round(max_rss_bytes() / 1048576, 1),
+        'bpm': bpm_accuracy(expected, measured),
+        'measured_bpm': {name: measured[name] for name in expected if name in measured}
+    }
+
+def compare_baseline(results, baseline_path):
+    """이전 벤치마크 결과와 파일별 BPM 비교 (속도 개선이 결과를 바꾸지 않았는지 확인)"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['scenario'], r['size']): r for r in json.load(f)['results']}
+
+    for result in results:
+        previous = baseline.get((result['scenario'], result['size']))
+        if previous is None:
+            continue
+        changed = sorted(
+            name for name, bpm in result['measured_bpm'].items()
+            if name in previous['measured_bpm'] and previous['measured_bpm'][name] != bpm
+        )
+        result['baseline'] = {
+            'speedup': round(result['tracks_per_second'] / previous['tracks_per_second'], 3)
+            if previous.get('tracks_per_second') else None,
+            'bpm_changed': changed
+        }
+
+def print_summary(results):
+    print(f"\n{'시나리오':<20} {'파일 수':>8} {'시간(s)':>10} {'트랙/초':>10} {'RSS(MB)':>10} {'BPM 정확도':>12} {'기준 대비':>10}")
+    for result in results:
+        accuracy = result['bpm']['accuracy']
+        baseline = result.get('baseline')
+        versus = ''
+        if baseline:
+            versus = f"{baseline['speedup']}x" + (f" (BPM 변경 {len(baseline['bpm_changed'])})" if baseline['bpm_changed'] else '')
+        print(
+            f"{result['scenario']:<20} {result['size']:>8} {result['seconds']:>10.2f} "
+            f"{result['tracks_per_second']:>10.2f} {result['peak_rss_mb']:>10.1f} "
+            f"{'-' if accuracy is None else f'{accuracy:.1%}':>12} {versus:>10}"
+        )
+
+    print(f"\n단계별 평균 지연 (ms)")
+    stages = [name for name in STAGES if any(name in r['stage_latency_ms'] for r in results)]
+    print(f"{'시나리오':<20} {'파일 수':>8} " + ' '.join(f"{name:>9}" for name in stages))
+    for result in results:
+        latency = result['stage_latency_ms']
+        print(
+            f"{result['scenario']:<20} {result['size']:>8} "
+            + ' '.join(f"{latency[name]:>9.1f}" if name in latency else f"{'-':>9}" for name in stages)
+        )
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='합성 음원으로 LofiMusicAnalyzer 처리량/정확도 측정')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000],
+                        help='측정할 파일 수 (기본값: 10 100 1000 5000)')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS,
+                        help='측정할 시나리오')
+    parser.add_argument('--seconds', type=float, default=30.0, help='합성 음원 길이 (초)')
+    parser.add_argument('--unique', type=int, default=50,
+                        help='새로 합성할 고유 음원 수 (나머지는 복사본, BPM 정확도는 고유 음원으로 계산)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'lofi_benchmark_data'),
+                        help='합성 음원 저장 위치 (다음 실행에서 재사용)')
+    parser.add_argument('--workers', type=int, default=1, help='analyze_folders 병렬 워커 수')
+    parser.add_argument('--feature-engine', choices=['shared', 'legacy'], default='shared')
+    parser.add_argument('--profile', choices=['default', 'fast', 'stream'], default='default')
+    parser.add_argument('--output', default='benchmark_results.json', help='결과 JSON 파일')
+    parser.add_argument('--baseline', default=None, help='비교할 이전 결과 JSON 파일')
+    parser.add_argument('--run-one', nargs=2, metavar=('SCENARIO', 'SIZE'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    data_dir = os.path.abspath(args.data_dir)
+
+    if args.run_one:
+        # 측정 하나를 별도 프로세스에서 실행 (최대 RSS가 이전 측정의 영향을 받지 않도록)
+        scenario, size = args.run_one[0], int(args.run_one[1])
+        print(json.dumps(run_scenario(scenario, size, data_dir, args), ensure_ascii=False))
+        return
+
+    logging.getLogger().setLevel(logging.INFO)
+    generate_dataset(data_dir, max(args.sizes), args.unique, args.seconds)
+
+    results = []
+    for size in sorted(args.sizes):
+        for scenario in args.scenarios:
+            logging.info(f"측정 중: {scenario} ({size}개 파일)")
+            command = [
+                sys.executable, os.path.abspath(__file__),
+                '--run-one', scenario, str(size),
+                '--data-dir', data_dir,
+                '--seconds', str(args.seconds),
+                '--unique', str(args.unique),
+                '--workers', str(args.workers),
+                '--feature-engine', args.feature_engine,
+                '--profile', args.profile
+            ]
+            completed = subprocess.run(
+                command, capture_output=True, text=True,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+            if completed.returncode != 0:
+                logging.error(f"측정 실패: {scenario} ({size}개 파일)\n{completed.stderr}")
+                continue
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    if args.baseline:
+        compare_baseline(results, args.baseline)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'settings': {
+                'seconds': args.seconds,
+                'unique': args.unique,
+                'workers': args.workers,
+                'feature_engine': args.feature_engine,
+                'profile': args.profile
+            },
+            'results': results
+        }, f, ensure_ascii=False, indent=2)
+
+    print_summary(results)
+    logging.info(f"벤치마크 결과 저장: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import time
+import argparse
+import numpy as np
+
+from playlist_selection import TrackSelector, usage_bucket_order
+
+# 합성 후보 트랙 재생 시간 범위 (ms, 1분 30초 ~ 5분)
+DURATION_RANGE = (90000, 300000)
+
+def synth_candidates(size, seed):
+    """BPM 순으로 정렬된 합성 후보 트랙 (track_id, bpm, duration_ms, 사용 횟수)"""
+    rng = np.random.default_rng(seed)
+    bpm = np.sort(rng.uniform(60, 100, size).round(1))
+    return [
+        {'track_id': i + 1, 'bpm': float(bpm[i]), 'duration_ms': int(duration), 'usage': int(usage)}
+        for i, (duration, usage) in enumerate(zip(
+            # 같은 길이의 트랙이 섞이도록 초 단위로 반올림
+            rng.integers(*DURATION_RANGE, size) // 1000 * 1000,
+            rng.choice(4, size, p=[0.5, 0.25, 0.15, 0.1])
+        ))
+    ]
+
+def list_select(tracks, target_ms):
+    """이전 create_playlist 방식 (선택할 때마다 후보 목록을 다시 만듦)"""
+    tracks = sorted(tracks, key=lambda x: (x['usage'], x['bpm']))
+    playlist = []
+    current_duration = 0
+    used_tracks = set()
+    while current_duration < target_ms:
+        available_tracks = [t for t in tracks if t['track_id'] not in used_tracks and t['usage'] < 3]
+        if not available_tracks:
+            break
+        remaining_time = target_ms - current_duration
+        suitable_duration_tracks = [t for t in available_tracks if t['duration_ms'] <= remaining_time]
+        if not suitable_duration_tracks:
+            track = min(available_tracks, key=lambda x: x['duration_ms'])
+        else:
+            track = suitable_duration_tracks[0]
+        playlist.append(track['track_id'])
+        used_tracks.add(track['track_id'])
+        current_duration += track['duration_ms']
+    return playlist
+
+def tree_select(tracks, target_ms):
+    """TrackSelector 방식 (사용 횟수 버킷 + 재생 시간 최솟값 트리)"""
+    track_ids = np.array([t['track_id'] for t in tracks])
+    usage = np.array([t['usage'] for t in tracks])
+    order = usage_bucket_order(usage)
+    durations = np.array([t['duration_ms'] for t in tracks])[order]
+    selector = TrackSelector(durations)
+    playlist = []
+    current_duration = 0
+    while current_duration < target_ms:
+        position = selector.pick(target_ms - current_duration)
+        if position is None:
+            break
+        playlist.append(int(track_ids[order[position]]))
+        current_duration += int(durations[position])
+    return playlist
+
+def measure(function, tracks, target_ms, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        picks = function(tracks, target_ms)
+        best = min(best, time.perf_counter() - start)
+    return best, picks
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='플레이리스트 트랙 선택 방식 비교 (합성 후보)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='후보 트랙 수 (기본값: 1000 10000 100000)')
+    parser.add_argument('--hours', type=float, nargs='+', default=[1.0, 24.0],
+                        help='목표 재생 시간 (시간, 기본값: 1 24)')
+    parser.add_argument('--repeat', type=int, default=3, help='측정 반복 횟수 (가장 빠른 값 사용)')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    print(f"{'후보 수':>10} {'목표(h)':>8} {'선택 수':>8} {'이전(ms)':>12} {'트리(ms)':>10} {'배속':>8} {'결과 동일':>8}")
+    for size in args.sizes:
+        tracks = synth_candidates(size, args.seed)
+        for hours in args.hours:
+            target_ms = int(hours * 3600000)
+            list_seconds, list_picks = measure(list_select, tracks, target_ms, args.repeat)
+            tree_seconds, tree_picks = measure(tree_select, tracks, target_ms, args.repeat)
+            print(
+                f"{size:>10} {hours:>8.1f} {len(tree_picks):>8} {list_seconds * 1000:>12.1f} "
+                f"{tree_seconds * 1000:>10.1f} {list_seconds / tree_seconds:>7.1f}x {str(list_picks == tree_picks):>8}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+import os
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+# csv_output 안의 SQLite 카탈로그 파일명 (이 파일이 있으면 CSV 대신 사용)
+CATALOG_DB_NAME = 'catalog.sqlite3'
+
+# CSV 내보내기/가져오기 컬럼 (기존 CSV와 같은 순서)
+TRACK_COLUMNS = [
+    'track_id', 'title', 'artist', 'bpm', 'duration_ms', 'file_name', 'folder_name',
+    'genre', 'sub_genre', 'drum_intensity', 'harmonic_complexity', 'analysis_profile'
+]
+EPISODE_COLUMNS = ['episode_id', 'episode_name', 'created_at']
+TRACK_EPISODE_COLUMNS = ['track_episode_id', 'track_id', 'episode_id', 'order_in_episode']
+USAGE_COLUMNS = ['track_id', 'title', 'artist', 'used_at', 'playlist_id']
+USAGE_STATS_COLUMNS = ['track_id', 'use_count', 'last_used_at', 'last_playlist_id']
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS tracks (
+        track_id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        artist TEXT NOT NULL,
+        bpm REAL,
+        duration_ms INTEGER,
+        file_name TEXT,
+        folder_name TEXT,
+        genre TEXT,
+        sub_genre TEXT,
+        drum_intensity REAL,
+        harmonic_complexity REAL,
+        analysis_profile TEXT,
+        file_hash TEXT,
+        UNIQUE (title, artist)
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_tracks_file_hash ON tracks(file_hash) WHERE file_hash IS NOT NULL;
+    CREATE INDEX IF NOT EXISTS idx_tracks_bpm ON tracks(bpm);
+    CREATE TABLE IF NOT EXISTS episodes (
+        episode_id INTEGER PRIMARY KEY,
+        episode_name TEXT NOT NULL UNIQUE,
+        created_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS track_episodes (
+        track_episode_id INTEGER PRIMARY KEY,
+        track_id INTEGER NOT NULL,
+        episode_id INTEGER NOT NULL,
+        order_in_episode INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_track_episodes_episode ON track_episodes(episode_id, order_in_episode);
+    CREATE INDEX IF NOT EXISTS idx_track_episodes_track ON track_episodes(track_id);
+    CREATE TABLE IF NOT EXISTS usage_history (
+        usage_id INTEGER PRIMARY KEY,
+        track_id INTEGER NOT NULL,
+        title TEXT,
+        artist TEXT,
+        used_at TEXT,
+        playlist_id TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_usage_history_track ON usage_history(track_id);
+    CREATE TABLE IF NOT EXISTS track_usage_stats (
+        track_id INTEGER PRIMARY KEY,
+        use_count INTEGER NOT NULL,
+        last_used_at TEXT,
+        last_playlist_id TEXT
+    );
+'''
+
+# 사용 이력 전체에서 트랙별 집계 다시 만들기 (사용 시각이 가장 늦은 기록, 같으면 나중에 추가된 기록)
+REBUILD_USAGE_STATS = '''
+    INSERT INTO track_usage_stats (track_id, use_count, last_used_at, last_playlist_id)
+    SELECT h.track_id, COUNT(*),
+        (SELECT used_at FROM usage_history l WHERE l.track_id = h.track_id ORDER BY used_at DESC, usage_id DESC LIMIT 1),
+        (SELECT playlist_id FROM usage_history l WHERE l.track_id = h.track_id ORDER BY used_at DESC, usage_id DESC LIMIT 1)
+    FROM usage_history h
+    GROUP BY h.track_id
+'''
+
+def catalog_path(csv_dir):
+    return os.path.join(csv_dir, CATALOG_DB_NAME)
+
+def open_catalog(csv_dir, create=False):
+    """카탈로그가 있으면(또는 create=True면) 열어서 반환, 아니면 None (CSV 사용)
+
+    새로 만든 카탈로그가 비어 있고 기존 CSV가 있으면 한 번 가져온다.
+    """
+    db_path = catalog_path(csv_dir)
+    if not create and not os.path.exists(db_path):
+        return None
+    catalog = CatalogDB(db_path)
+    if catalog.is_empty() and os.path.exists(os.path.join(csv_dir, 'tracks.csv')):
+        catalog.import_csv(csv_dir)
+    return catalog
+
+def _value(value):
+    """numpy 스칼라와 NaN을 SQLite에 넣을 수 있는 값으로 변환"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+def _rows(records, columns):
+    return [tuple(_value(record.get(column)) for column in columns) for record in records]
+
+class CatalogDB:
+    """트랙/에피소드/트랙-에피소드/사용 이력을 담는 SQLite 카탈로그
+
+    CSV 세 개를 매번 전체 다시 쓰는 대신 바뀐 행만 하나의 트랜잭션으로 기록한다.
+    WAL 모드와 BEGIN IMMEDIATE 트랜잭션으로 여러 프로세스가 동시에 써도 파일이 깨지지 않는다.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        self._conn_pid = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # 프로세스 풀로 넘길 때 연결과 락은 넘기지 않음
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_conn_pid'] = None
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """프로세스별 SQLite 연결 (fork 이후에는 새로 연결)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            # 트랜잭션은 transaction()에서 직접 시작
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            # 집계 테이블이 생기기 전에 만든 카탈로그는 이력에서 한 번 채움
+            if (conn.execute('SELECT 1 FROM track_usage_stats LIMIT 1').fetchone() is None
+                    and conn.execute('SELECT 1 FROM usage_history LIMIT 1').fetchone() is not None):
+                conn.execute(REBUILD_USAGE_STATS)
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """쓰기 트랜잭션 (예외가 나면 전체 롤백)"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def query_df(self, sql, params=()):
+        with self._lock:
+            return pd.read_sql_query(sql, self._connect(), params=params)
+
+    def is_empty(self):
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM tracks').fetchone()[0] == 0
+
+    def import_csv(self, csv_dir):
+        """기존 CSV(tracks/episodes/track_episodes/track_usage_history)를 한 번에 가져오기"""
+        tables = [
+            ('tracks.csv', 'tracks', TRACK_COLUMNS),
+            ('episodes.csv', 'episodes', EPISODE_COLUMNS),
+            ('track_episodes.csv', 'track_episodes', TRACK_EPISODE_COLUMNS),
+            ('track_usage_history.csv', 'usage_history', USAGE_COLUMNS)
+        ]
+        try:
+            with self.transaction() as conn:
+                for file_name, table, columns in tables:
+                    csv_path = os.path.join(csv_dir, file_name)
+                    if not os.path.exists(csv_path):
+                        continue
+                    records = pd.read_csv(csv_path).to_dict('records')
+                    conn.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        _rows(records, columns)
+                    )
+                    logging.info(f"카탈로그 가져오기: {file_name} {len(records)}행")
+                self._import_file_hashes(conn, os.path.join(csv_dir, 'file_index.csv'))
+                conn.execute('DELETE FROM track_usage_stats')
+                conn.execute(REBUILD_USAGE_STATS)
+            return True
+        except Exception as e:
+            logging.error(f"CSV 가져오기 실패: {str(e)}")
+            return False
+
+    def _import_file_hashes(self, conn, index_path):
+        """파일 인덱스의 콘텐츠 해시를 트랙에 연결 (같은 해시가 이미 있으면 건너뜀)"""
+        if not os.path.exists(index_path):
+            return
+        index_df = pd.read_csv(index_path, dtype={'content_hash': str}, keep_default_na=False)
+        for row in index_df.to_dict('records'):
+            if not row['content_hash']:
+                continue
+            conn.execute(
+                '''UPDATE tracks SET file_hash = ? WHERE folder_name = ? AND file_name = ?
+                   AND NOT EXISTS (SELECT 1 FROM tracks WHERE file_hash = ?)''',
+                (row['content_hash'], row['folder_name'], row['file_name'], row['content_hash'])
+            )
+
+    def export_csv(self, csv_dir):
+        """카탈로그를 기존 CSV 형식으로 내보내기 (호환용)"""
+        tables = [
+            ('tracks.csv', 'tracks', TRACK_COLUMNS, 'track_id'),
+            ('episodes.csv', 'episodes', EPISODE_COLUMNS, 'episode_id'),
+            ('track_episodes.csv', 'track_episodes', TRACK_EPISODE_COLUMNS, 'track_episode_id'),
+            ('track_usage_history.csv', 'usage_history', USAGE_COLUMNS, 'usage_id'),
+            ('track_usage_stats.csv', 'track_usage_stats', USAGE_STATS_COLUMNS, 'track_id')
+        ]
+        try:
+            for file_name, table, columns, order_by in tables:
+                self.query_df(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {order_by}").to_csv(
+                    os.path.join(csv_dir, file_name),
+                    index=False,
+                    encoding='utf-8-sig'
+                )
+            logging.info(f"카탈로그 CSV 내보내기 완료: {csv_dir}")
+            return True
+        except Exception as e:
+            logging.error(f"카탈로그 CSV 내보내기 실패: {str(e)}")
+            return False
+
+    def tracks_frame(self):
+        return self.query_df(f"SELECT {', '.join(TRACK_COLUMNS)} FROM tracks ORDER BY track_id")
+
+    def episodes_frame(self):
+        return self.query_df(f"SELECT {', '.join(EPISODE_COLUMNS)} FROM episodes ORDER BY episode_id")
+
+    def track_episodes_frame(self):
+        return self.query_df(f"SELECT {', '.join(TRACK_EPISODE_COLUMNS)} FROM track_episodes ORDER BY track_episode_id")
+
+    def load_tracks(self):
+        return self.tracks_frame().to_dict('records')
+
+    def load_episodes(self):
+        return self.episodes_frame().to_dict('records')
+
+    def load_track_episodes(self):
+        return self.track_episodes_frame().to_dict('records')
+
+    def save_changes(self, tracks=(), episodes=(), episode_tracks=None):
+        """바뀐 트랙/에피소드와 다시 구성한 에피소드별 트랙 목록을 한 트랜잭션으로 저장
+
+        tracks는 (트랙 딕셔너리, 파일 해시) 목록이며 해시가 None이면 기존 해시를 유지한다.
+        episode_tracks는 에피소드 ID → 트랙-에피소드 행 목록 (기존 행을 모두 바꿈).
+        트랙은 (title, artist), 에피소드는 episode_name으로 기존 행을 찾고, 없으면 트랜잭션
+        안에서 ID를 부여한다 (넘긴 ID가 비어 있으면 그대로, 다른 실행이 먼저 쓴 ID면 새 ID).
+        반환값은 테이블별 {넘긴 ID: 저장된 ID} 중 ID가 바뀐 항목.
+        """
+        remapped = {'tracks': {}, 'episodes': {}, 'track_episodes': {}}
+        with self.transaction() as conn:
+            columns = TRACK_COLUMNS + ['file_hash']
+            for track, file_hash in tracks:
+                values = dict(zip(TRACK_COLUMNS, _rows([track], TRACK_COLUMNS)[0]))
+                row = conn.execute('SELECT track_id FROM tracks WHERE title = ? AND artist = ?', (values['title'], values['artist'])).fetchone()
+                track_id = row[0] if row is not None else self._free_id(conn, 'tracks', 'track_id', values['track_id'])
+                if file_hash:
+                    owner = conn.execute('SELECT track_id FROM tracks WHERE file_hash = ?', (file_hash,)).fetchone()
+                    if owner is not None and owner[0] != track_id:
+                        logging.warning(f"같은 내용의 트랙이 이미 있어 파일 해시를 기록하지 않습니다: {track['file_name']} (track_id {owner[0]})")
+                        # 내용이 바뀐 트랙의 이전 해시도 남기지 않음
+                        conn.execute('UPDATE tracks SET file_hash = NULL WHERE track_id = ?', (track_id,))
+                        file_hash = None
+                if row is not None:
+                    updates = ', '.join(f'{column} = ?' for column in TRACK_COLUMNS[1:])
+                    conn.execute(
+                        f'UPDATE tracks SET {updates}, file_hash = COALESCE(?, file_hash) WHERE track_id = ?',
+                        tuple(values[column] for column in TRACK_COLUMNS[1:]) + (file_hash or None, track_id)
+                    )
+                else:
+                    track_id = conn.execute(
+                        f"INSERT INTO tracks ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        (track_id,) + tuple(values[column] for column in TRACK_COLUMNS[1:]) + (file_hash or None,)
+                    ).lastrowid
+                if track_id != values['track_id']:
+                    remapped['tracks'][values['track_id']] = track_id
+
+            for episode in _rows(episodes, EPISODE_COLUMNS):
+                episode_id, episode_name, created_at = episode
+                row = conn.execute('SELECT episode_id FROM episodes WHERE episode_name = ?', (episode_name,)).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE episodes SET created_at = ? WHERE episode_id = ?', (created_at, row[0]))
+                    saved_id = row[0]
+                else:
+                    saved_id = conn.execute(
+                        'INSERT INTO episodes (episode_id, episode_name, created_at) VALUES (?, ?, ?)',
+                        (self._free_id(conn, 'episodes', 'episode_id', episode_id), episode_name, created_at)
+                    ).lastrowid
+                if saved_id != episode_id:
+                    remapped['episodes'][episode_id] = saved_id
+
+            for episode_id, rows in (episode_tracks or {}).items():
+                episode_id = remapped['episodes'].get(_value(episode_id), _value(episode_id))
+                conn.execute('DELETE FROM track_episodes WHERE episode_id = ?', (episode_id,))
+                for track_episode_id, track_id, _, order in _rows(rows, TRACK_EPISODE_COLUMNS):
+                    saved_id = conn.execute(
+                        f"INSERT INTO track_episodes ({', '.join(TRACK_EPISODE_COLUMNS)}) VALUES (?, ?, ?, ?)",
+                        (self._free_id(conn, 'track_episodes', 'track_episode_id', track_episode_id),
+                         remapped['tracks'].get(track_id, track_id), episode_id, order)
+                    ).lastrowid
+                    if saved_id != track_episode_id:
+                        remapped['track_episodes'][track_episode_id] = saved_id
+        return remapped
+
+    def _free_id(self, conn, table, column, wanted):
+        """넘긴 ID가 비어 있으면 그대로, 이미 쓰였으면 None (SQLite가 새 ID 부여)"""
+        if wanted is None or conn.execute(f'SELECT 1 FROM {table} WHERE {column} = ?', (wanted,)).fetchone() is None:
+            return wanted
+        return None
+
+    def add_episode(self, episode_name, created_at, track_ids):
+        """새 에피소드와 트랙 순서 추가 (ID는 트랜잭션 안에서 부여), 에피소드 ID 반환"""
+        with self.transaction() as conn:
+            episode_id = conn.execute(
+                'INSERT INTO episodes (episode_name, created_at) VALUES (?, ?)',
+                (episode_name, created_at)
+            ).lastrowid
+            conn.executemany(
+                'INSERT INTO track_episodes (track_id, episode_id, order_in_episode) VALUES (?, ?, ?)',
+                [(_value(track_id), episode_id, order) for order, track_id in enumerate(track_ids, 1)]
+            )
+        return episode_id
+
+    def has_usage(self):
+        with self._lock:
+            return self._connect().execute('SELECT 1 FROM usage_history LIMIT 1').fetchone() is not None
+
+    def usage_counts(self):
+        """트랙 ID → 사용 횟수 (집계 테이블만 읽음)"""
+        with self._lock:
+            return dict(self._connect().execute('SELECT track_id, use_count FROM track_usage_stats'))
+
+    def usage_stats(self):
+        """트랙 ID → 사용 집계 행"""
+        return {
+            row['track_id']: row
+            for row in self.query_df(f"SELECT {', '.join(USAGE_STATS_COLUMNS)} FROM track_usage_stats").to_dict('records')
+        }
+
+    def append_usage(self, records):
+        """사용 이력 추가와 트랙별 집계 갱신 (한 트랜잭션)"""
+        rows = _rows(records, USAGE_COLUMNS)
+        with self.transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO usage_history ({', '.join(USAGE_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(
+                '''INSERT INTO track_usage_stats (track_id, use_count, last_used_at, last_playlist_id)
+                   VALUES (?, 1, ?, ?)
+                   ON CONFLICT(track_id) DO UPDATE SET
+                   use_count = use_count + 1,
+                   last_playlist_id = CASE WHEN excluded.last_used_at >= COALESCE(last_used_at, '')
+                       THEN excluded.last_playlist_id ELSE last_playlist_id END,
+                   last_used_at = MAX(COALESCE(last_used_at, ''), excluded.last_used_at)''',
+                [(track_id, used_at, playlist_id) for track_id, _, _, used_at, playlist_id in rows]
+            )
+
+    def close(self):
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._conn_pid = None
@@ -0,0 +1,112 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+
+SR = 22050
+
+# 에피소드 폴더 → (파일명, BPM, 길이(초)) 목록 (3rd의 Song 1 - Artist 1은 1st와 같은 트랙)
+AUDIO_LAYOUT = {
+    '1st': [('ES_Song 0 - Artist 0.mp3', 72, 8), ('ES_Song 1 - Artist 1.mp3', 88, 9), ('ES_Song 2 - Artist 2.mp3', 118, 10)],
+    '2nd': [('ES_Song 3 - Artist 0.mp3', 65, 9), ('ES_Song 4 - Artist 3.mp3', 92, 8), ('ES_Song 5 - Artist 1.mp3', 80, 10)],
+    '3rd': [('ES_Song 1 - Artist 1.mp3', 88, 9), ('ES_Song 6 - Artist 4.mp3', 100, 8), ('ES_Song 7 - Artist 2.mp3', 75, 9)],
+}
+
+def synth_track(bpm, seconds, seed):
+    """화음 위에 일정한 BPM으로 타악기 잡음을 얹은 합성 음원"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SR * seconds)) / SR
+    y = 0.05 * rng.standard_normal(len(t))
+    for freq in (220, 277, 330):
+        y += 0.1 * np.sin(2 * np.pi * freq * t)
+    for beat in np.arange(0, seconds, 60 / bpm):
+        start = int(beat * SR)
+        length = min(1500, len(y) - start)
+        y[start:start + length] += 0.8 * np.exp(-np.arange(length) / 250) * rng.standard_normal(length)
+    return (y / np.max(np.abs(y)) * 0.9).astype(np.float32)
+
+@pytest.fixture(scope='session')
+def audio_master(tmp_path_factory):
+    base = tmp_path_factory.mktemp('audio_master')
+    for seed, (folder, files) in enumerate(AUDIO_LAYOUT.items()):
+        os.makedirs(base / folder)
+        for index, (file_name, bpm, seconds) in enumerate(files):
+            sf.write(str(base / folder / file_name), synth_track(bpm, seconds, seed * 10 + index), SR, format='MP3')
+    return base
+
+@pytest.fixture
+def audio_tree(audio_master, tmp_path, monkeypatch):
+    """테스트마다 복사한 에피소드 폴더 (분석 결과 csv_output은 tmp_path/work 아래에 생김)"""
+    base = tmp_path / 'audio'
+    shutil.copytree(audio_master, base)
+    work = tmp_path / 'work'
+    work.mkdir()
+    monkeypatch.chdir(work)
+    return base
+
+GENRES = [('Lo-fi Hip Hop', 'Hip Hop'), ('Lo-fi Jazz', 'Jazz')]
+
+def write_catalog(csv_dir, n=400, seed=0, uses=None):
+    """합성 트랙 카탈로그 CSV와 사용 이력 (uses: 기록할 사용 횟수 합계, 기본값 n)"""
+    rng = np.random.default_rng(seed)
+    genres = rng.integers(0, len(GENRES), n)
+    tracks = pd.DataFrame({
+        'track_id': np.arange(1, n + 1),
+        'title': [f'Song {i}' for i in range(1, n + 1)],
+        'artist': [f'Artist {a}' for a in rng.integers(1, max(2, n // 8) + 1, n)],
+        'bpm': rng.uniform(65, 100, n).round(2),
+        'duration_ms': rng.integers(90, 240, n) * 1000,
+        'file_name': [f'ES_Song {i} - A.mp3' for i in range(1, n + 1)],
+        'folder_name': [f'{(i - 1) // 40 + 4}th' for i in range(1, n + 1)],
+        'genre': [GENRES[g][0] for g in genres],
+        'sub_genre': [GENRES[g][1] for g in genres],
+        'drum_intensity': rng.uniform(0.01, 0.3, n).round(3),
+        'harmonic_complexity': rng.uniform(0.2, 0.4, n).round(3),
+        'analysis_profile': 'default',
+    })
+    folders = list(dict.fromkeys(tracks['folder_name']))
+    episodes = pd.DataFrame({
+        'episode_id': range(1, len(folders) + 1),
+        'episode_name': folders,
+        'created_at': '2026-01-01 00:00:00',
+    })
+    track_episodes = pd.DataFrame({
+        'track_episode_id': tracks['track_id'],
+        'track_id': tracks['track_id'],
+        'episode_id': tracks['folder_name'].map(dict(zip(folders, episodes['episode_id']))),
+        'order_in_episode': tracks.groupby('folder_name').cumcount() + 1,
+    })
+    used = tracks.iloc[rng.integers(0, n, n if uses is None else uses)]
+    history = pd.DataFrame({
+        'track_id': used['track_id'].to_numpy(),
+        'title': used['title'].to_numpy(),
+        'artist': used['artist'].to_numpy(),
+        'used_at': '2026-01-02 00:00:00',
+        'playlist_id': 'initial',
+    })
+    os.makedirs(csv_dir, exist_ok=True)
+    for name, df in (('tracks.csv', tracks), ('episodes.csv', episodes), ('track_episodes.csv', track_episodes),
+                     ('track_usage_history.csv', history)):
+        df.to_csv(os.path.join(csv_dir, name), index=False, encoding='utf-8-sig')
+    return tracks
+
+class FakeSession:
+    """Bedrock을 호출하지 않는 AWS 세션"""
+    def client(self, *args, **kwargs):
+        return None
+
+@pytest.fixture
+def playlist_generator(tmp_path, monkeypatch):
+    """tmp_path/csv_output의 카탈로그로 PlaylistGenerator를 만드는 함수 (AWS 호출 없음)"""
+    from playlist_generator import PlaylistGenerator
+    monkeypatch.setattr(PlaylistGenerator, 'get_aws_session', lambda self: FakeSession())
+    monkeypatch.setattr(PlaylistGenerator, 'get_bedrock_response', lambda self, prompt: 'content')
+    csv_dir = str(tmp_path / 'csv_output')
+    base_path = str(tmp_path / 'audio')
+    os.makedirs(base_path, exist_ok=True)
+
+    def create(start_bpm=70, end_bpm=85, play_minutes=120, **kwargs):
+        return PlaylistGenerator(csv_dir, base_path, start_bpm, end_bpm, play_minutes, **kwargs)
+    return create
@@ -1,81 +1,150 @@
 import os
+import argparse
 import logging
 from analyzer import LofiMusicAnalyzer
 from playlist_generator import PlaylistGenerator
-from utils import check_csv_files, setup_logging
+from episode_planner import EpisodePlanner, load_episode_calendar
+from utils import check_csv_files, csv_files, setup_logging
+from usage_history import UsageHistory
+from catalog_db import USAGE_COLUMNS
+from track_catalog import load_track_catalog
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
-def generate_track_history(csv_dir):
-    """기존 플레이리스트 기록을 분석하여 트랙 사용 이력 생성"""
+# 플레이리스트 파일을 동시에 읽을 스레드 수 (파일 I/O 대기 위주)
+HISTORY_READ_THREADS = 8
+
+def read_playlist_usage(csv_dir, playlist_file):
+    """플레이리스트 파일 하나를 사용 기록 데이터프레임으로 변환 (실패하면 None)"""
+    try:
+        # 플레이리스트 타임스탬프 추출 (배치 생성 파일은 뒤에 에피소드 번호가 붙음)
+        timestamp = playlist_file.replace('playlist_tracks_', '').replace('.csv', '')
+        used_at = datetime.strptime(timestamp[:13], '%Y%m%d_%H%M').strftime('%Y-%m-%d %H:%M:%S')
+        playlist_df = pd.read_csv(os.path.join(csv_dir, playlist_file), usecols=['track_id', 'title', 'artist'])
+        playlist_df['used_at'] = used_at
+        playlist_df['playlist_id'] = timestamp
+        logging.info(f"플레이리스트 처리 완료: {playlist_file}")
+        return playlist_df
+    except Exception as e:
+        logging.error(f"플레이리스트 파일 처리 실패: {playlist_file} - {str(e)}")
+        return None
+
+def generate_track_history(csv_dir, catalog=None):
+    """플레이리스트 기록으로 트랙 사용 이력 생성 (catalog가 있으면 카탈로그에 기록)
+    
+    이력이 없으면 모든 플레이리스트와 미사용 트랙의 초기 기록으로 새로 만들고,
+    이후에는 아직 반영하지 않은 플레이리스트 파일만 읽어 이력에 추가한다.
+    """
     try:
+        usage_history = UsageHistory(csv_dir, catalog)
+        history_exists = usage_history.exists()
+        ingested = usage_history.ingested_playlists()
+        
         # 모든 플레이리스트 파일 찾기
         playlist_files = [f for f in os.listdir(csv_dir)
                         if f.startswith('playlist_tracks_') and f.endswith('.csv')]
         
-        # 전체 트랙 정보 로드
-        tracks_df = pd.read_csv(os.path.join(csv_dir, 'tracks.csv'))
-        
-        # 사용 이력 데이터프레임 초기화
-        history_records = []
-        
-        # 각 플레이리스트 파일 처리
-        for playlist_file in playlist_files:
-            try:
-                # 플레이리스트 타임스탬프 추출
-                timestamp = playlist_file.replace('playlist_tracks_', '').replace('.csv', '')
-                playlist_df = pd.read_csv(os.path.join(csv_dir, playlist_file))
-                
-                # 플레이리스트의 각 트랙에 대한 사용 기록 생성
-                for _, track in playlist_df.iterrows():
-                    history_records.append({
-                        'track_id': track['track_id'],
-                        'title': track['title'],
-                        'artist': track['artist'],
-                        'used_at': datetime.strptime(timestamp, '%Y%m%d_%H%M').strftime('%Y-%m-%d %H:%M:%S'),
-                        'playlist_id': timestamp
-                    })
-                logging.info(f"플레이리스트 처리 완료: {playlist_file}")
-            except Exception as e:
-                logging.error(f"플레이리스트 파일 처리 실패: {playlist_file} - {str(e)}")
-                continue
-        
-        # 사용 이력이 없는 트랙들에 대한 초기 기록 생성
-        used_track_ids = set(record['track_id'] for record in history_records)
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if history_exists and ingested is None:
+            # 반영 기록이 생기기 전에 만든 이력은 현재 플레이리스트가 모두 반영된 것으로 간주
+            usage_history.mark_ingested(playlist_files)
+            logging.info(f"기존 사용 이력에 반영된 플레이리스트 {len(playlist_files)}개를 기록했습니다.")
+            return True
+            
+        new_files = [f for f in playlist_files if f not in (ingested or set())] if history_exists else playlist_files
+        if history_exists and not new_files:
+            return True
+        if not history_exists:
+            logging.info("트랙 사용 이력 생성 시작")
+            
+        # 플레이리스트 파일을 동시에 읽어 한 번에 합치기
+        frames = []
+        if new_files:
+            with ThreadPoolExecutor(max_workers=min(HISTORY_READ_THREADS, len(new_files))) as executor:
+                frames = [df for df in executor.map(lambda f: read_playlist_usage(csv_dir, f), new_files) if df is not None]
+        history_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=USAGE_COLUMNS)
+        history_df = history_df[USAGE_COLUMNS]
         
-        for _, track in tracks_df.iterrows():
-            if track['track_id'] not in used_track_ids:
-                # 1st 폴더의 트랙은 제외
-                if track['folder_name'] != '1st':
-                    history_records.append({
-                        'track_id': track['track_id'],
-                        'title': track['title'],
-                        'artist': track['artist'],
-                        'used_at': current_time,
-                        'playlist_id': 'initial'
-                    })
+        if history_exists:
+            # 새 플레이리스트의 기록만 추가
+            usage_history.append(history_df.to_dict('records'))
+            usage_history.mark_ingested(new_files)
+            logging.info(f"새 플레이리스트 {len(new_files)}개의 사용 기록 {len(history_df)}건 추가")
+            return True
+            
+        # 전체 트랙 정보 로드
+        if catalog is not None:
+            tracks_df = pd.DataFrame(catalog.load_tracks())
+        else:
+            tracks_df = csv_files(csv_dir).frame('tracks.csv')
+            
+        # 사용 이력이 없는 트랙들에 대한 초기 기록 생성 (1st 폴더의 트랙은 제외)
+        used_track_ids = set(history_df['track_id'])
+        initial_df = tracks_df.loc[
+            ~tracks_df['track_id'].isin(used_track_ids) & (tracks_df['folder_name'] != '1st'),
+            ['track_id', 'title', 'artist']
+        ].copy()
+        initial_df['used_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        initial_df['playlist_id'] = 'initial'
+        history_df = pd.concat([history_df, initial_df], ignore_index=True) if len(history_df) else initial_df
         
-        # 사용 이력을 CSV로 저장
-        history_df = pd.DataFrame(history_records)
-        history_file = os.path.join(csv_dir, 'track_usage_history.csv')
-        history_df.to_csv(history_file, index=False, encoding='utf-8-sig')
+        # 사용 이력과 트랙별 사용 집계 저장
+        usage_history.write(history_df.to_dict('records'))
+        usage_history.mark_ingested(new_files)
         
         # 사용 통계 출력
-        total_tracks = len(tracks_df)
-        used_tracks = len(used_track_ids)
         logging.info(f"\n=== 트랙 사용 이력 생성 완료 ===")
-        logging.info(f"전체 트랙 수: {total_tracks}")
-        logging.info(f"사용된 트랙 수: {used_tracks}")
-        logging.info(f"초기 기록 생성 트랙 수: {len(history_records) - len(used_track_ids)}")
+        logging.info(f"전체 트랙 수: {len(tracks_df)}")
+        logging.info(f"사용된 트랙 수: {len(used_track_ids)}")
+        logging.info(f"초기 기록 생성 트랙 수: {len(initial_df)}")
         
         return True
     except Exception as e:
         logging.error(f"트랙 사용 이력 생성 실패: {str(e)}")
         return False
 
+def parse_args():
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description='로파이 음원 분석 및 플레이리스트 생성')
+    parser.add_argument('folder_name', nargs='?', help='챕터/콘텐츠를 다시 생성할 에피소드 폴더 (예: 17th)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='병렬 분석 워커 수 (기본값: CPU 코어 수, 1이면 직렬 분석)')
+    parser.add_argument('--feature-engine', choices=['shared', 'legacy'], default='shared',
+                        help='특성 추출 엔진 (shared: STFT 한 번 공유, legacy: 기존 방식)')
+    parser.add_argument('--profile', choices=['default', 'fast', 'stream', 'metadata'], default='default',
+                        help='분석 프로파일 (fast: 11025Hz 저비용 리샘플링, stream: 곡 전체 스트리밍 분석, '
+                             'metadata: 디코딩 없이 MP3 헤더/파일명만 등록)')
+    parser.add_argument('--analyze-pending', action='store_true',
+                        help='metadata 프로파일로 등록되어 BPM/장르가 비어 있는 트랙 분석')
+    parser.add_argument('--compact-every', type=int, default=0,
+                        help='분석 저널을 CSV로 압축하는 주기 (폴더 수, 기본값 0: 분석이 끝날 때 한 번)')
+    parser.add_argument('--prefetch', type=int, default=4,
+                        help='직렬 분석 시 미리 읽어 디코딩해 둘 파일 수 (0이면 미리 읽지 않음)')
+    parser.add_argument('--reader-threads', type=int, default=2,
+                        help='파일을 미리 읽는 리더 스레드 수')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='한 번에 묶어서 계산할 파일 수 (같은 길이의 클립끼리 배치 계산)')
+    parser.add_argument('--metrics', action='store_true',
+                        help='분석 단계별 시간/메모리 기록 (csv_output/metrics.jsonl, metrics.prom, 실행 후 요약 표)')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='--metrics와 함께 tracemalloc으로 단계별 최대 메모리 측정 (분석이 느려짐)')
+    parser.add_argument('--catalog-db', action='store_true',
+                        help='CSV 대신 SQLite 카탈로그(csv_output/catalog.sqlite3) 사용 (처음 한 번 기존 CSV를 가져옴, '
+                             '카탈로그 파일이 있으면 자동으로 사용)')
+    parser.add_argument('--export-csv', action='store_true',
+                        help='실행 후 카탈로그를 기존 CSV 형식(tracks/episodes/track_episodes/track_usage_history)으로 내보내기')
+    parser.add_argument('--episode-calendar', default=None,
+                        help='에피소드 일정 JSON 파일 ([{"start_bpm": 70, "end_bpm": 85, "play_minutes": 120}, ...])로 '
+                             '여러 에피소드의 트랙을 한 번에 배정하고 플레이리스트/챕터/폴더 생성')
+    parser.add_argument('--no-cache', action='store_true', help='오디오 특성 캐시를 사용하지 않음')
+    parser.add_argument('--cache-dir', default=None, help='오디오 특성 캐시 위치 (기본값: ~/.cache/lofi_music_maker)')
+    args = parser.parse_args()
+    if args.analyze_pending and args.profile == 'metadata':
+        parser.error('--analyze-pending은 오디오를 디코딩하는 프로파일(default, fast, stream)과 함께 사용해야 합니다.')
+    return args
+
 def main():
-    import sys
+    args = parse_args()
     # 로깅 설정
     setup_logging()
     
@@ -83,46 +152,63 @@ def main():
     csv_dir = os.path.join(os.getcwd(), 'csv_output')
 
 
-    if len(sys.argv) > 1:
-        folder_name = sys.argv[1]
-        process_specific_folder(folder_name, csv_dir, base_path)
+    if args.folder_name:
+        process_specific_folder(args.folder_name, csv_dir, base_path)
     else:
-        # CSV 파일 존재 여부 확인
-        csv_exists = check_csv_files(csv_dir)
-        
         # 기존 데이터 로드 또는 새로 분석 시작
-        analyzer = LofiMusicAnalyzer(base_path)
-        if csv_exists:
-            logging.info("기존 CSV 파일이 존재합니다. 새로운 폴더 확인 중...")
-            # 기존 데이터 로드
-            existing_tracks_df = pd.read_csv(os.path.join(csv_dir, 'tracks.csv'))
-            analyzed_folders = set(existing_tracks_df['folder_name'].unique())
-            
-            # 현재 폴더 목록 가져오기
-            current_folders = set([f for f in os.listdir(base_path)
-                                if os.path.isdir(os.path.join(base_path, f))
-                                and f not in ['temp', 'video_result', 'python']])
+        analyzer = LofiMusicAnalyzer(
+            base_path,
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            cache_dir=args.cache_dir,
+            feature_engine=args.feature_engine,
+            profile=args.profile,
+            compact_every=args.compact_every,
+            prefetch=args.prefetch,
+            reader_threads=args.reader_threads,
+            batch_size=args.batch_size,
+            metrics=args.metrics,
+            trace_memory=args.trace_memory,
+            catalog_db=args.catalog_db
+        )
+        # CSV 파일(또는 카탈로그) 존재 여부 확인
+        if analyzer.catalog is not None:
+            csv_exists = not analyzer.catalog.is_empty()
+        else:
+            csv_exists = check_csv_files(csv_dir)
             
-            # 새로 추가된 폴더 확인
-            new_folders = current_folders - analyzed_folders
-            if new_folders:
-                logging.info(f"새로 추가된 폴더 발견: {new_folders}")
-                analyzer.analyze_folders()  # 전체 분석 실행
-                analyzer.save_to_csv()
-                logging.info("새로운 폴더 분석 및 CSV 업데이트 완료")
-            else:
-                logging.info("새로 추가된 폴더가 없습니다.")
+        if csv_exists:
+            logging.info("기존 CSV 파일이 존재합니다. 추가/변경된 파일 확인 중...")
+            # 파일 인덱스로 추가/변경된 파일만 분석 (기존 폴더 안의 파일 변경도 감지)
+            analyzer.analyze_folders()
+            diff = analyzer.last_inventory_diff
+            if diff is not None and diff.has_changes():
+                logging.info("변경된 파일 분석 및 CSV 업데이트 완료")
         else:
             logging.info("CSV 파일이 없어 전체 음악 분석을 시작합니다.")
             analyzer.analyze_folders()
-            analyzer.save_to_csv()
+            analyzer.save()
             logging.info("음악 분석 및 CSV 생성 완료")
+            
+        if args.analyze_pending:
+            # metadata 프로파일로 등록된 트랙의 BPM/장르 채우기
+            analyzer.analyze_pending()
         
-        # 트랙 사용 이력 생성
-        history_file = os.path.join(csv_dir, 'track_usage_history.csv')
-        if not os.path.exists(history_file):
-            logging.info("트랙 사용 이력 생성 시작")
-            generate_track_history(csv_dir)
+        # 트랙 사용 이력 생성 (이미 있으면 새 플레이리스트 파일만 반영)
+        generate_track_history(csv_dir, analyzer.catalog)
+                
+        if args.export_csv:
+            if analyzer.catalog is not None:
+                analyzer.catalog.export_csv(csv_dir)
+            else:
+                logging.warning("카탈로그를 사용하지 않아 CSV 내보내기를 건너뜁니다 (CSV가 이미 최신 상태입니다).")
+                
+        if args.episode_calendar:
+            # 여러 에피소드를 한 번에 계획하고 생성 (CSV, 사용 집계, AWS 클라이언트를 한 번만 로드)
+            calendar = load_episode_calendar(args.episode_calendar)
+            if calendar:
+                generator = PlaylistGenerator(csv_dir=csv_dir, base_path=base_path)
+                EpisodePlanner(generator, calendar).run()
         
         # # 플레이리스트 생성
         # generator = PlaylistGenerator(
@@ -149,24 +235,11 @@ def main():
 def process_specific_folder(folder_name, csv_dir, base_path):
     """특정 폴더의 트랙들로 플레이리스트 생성"""
     try:
-        # 트랙 정보와 에피소드 정보 로드
-        tracks_df = pd.read_csv(os.path.join(csv_dir, 'tracks.csv'))
-        episodes_df = pd.read_csv(os.path.join(csv_dir, 'episodes.csv'))
-        track_episodes_df = pd.read_csv(os.path.join(csv_dir, 'track_episodes.csv'))
-        
-        # 에피소드 ID 찾기
-        episode_info = episodes_df[episodes_df['episode_name'] == folder_name].iloc[0]
-        episode_id = episode_info['episode_id']
-        
-        # 해당 에피소드의 트랙 ID 목록 가져오기 (order_in_episode로 정렬)
-        episode_tracks = track_episodes_df[track_episodes_df['episode_id'] == episode_id]
-        episode_tracks = episode_tracks.sort_values('order_in_episode')
+        # 트랙/에피소드 인덱스를 한 번 만들어 플레이리스트 생성기와 공유
+        track_catalog = load_track_catalog(csv_dir)
         
-        # 트랙 정보 가져오기 (순서 유지)
-        folder_tracks = []
-        for _, row in episode_tracks.iterrows():
-            track_info = tracks_df[tracks_df['track_id'] == row['track_id']].iloc[0].to_dict()
-            folder_tracks.append(track_info)
+        # 해당 에피소드의 트랙 정보 가져오기 (order_in_episode 순서, 트랙 ID 인덱스 조회)
+        folder_tracks = track_catalog.episode_tracks(folder_name)
             
         if not folder_tracks:
             logging.error(f"지정된 폴더 {folder_name}의 트랙을 찾을 수 없습니다.")
@@ -182,7 +255,8 @@ def process_specific_folder(folder_name, csv_dir, base_path):
             base_path=base_path,
             start_bpm=80,
             end_bpm=90,
-            play_minutes=120
+            play_minutes=120,
+            track_catalog=track_catalog
         )
         
         # 챕터 생성
@@ -0,0 +1,82 @@
+import json
+import logging
+from datetime import datetime, timedelta
+
+def load_episode_calendar(path):
+    """에피소드 일정 JSON 로드 ([{"start_bpm": 70, "end_bpm": 85, "play_minutes": 120}, ...])"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            calendar = json.load(f)
+        episodes = []
+        for entry in calendar:
+            episode = {
+                'start_bpm': float(entry['start_bpm']),
+                'end_bpm': float(entry['end_bpm']),
+                'play_minutes': float(entry['play_minutes'])
+            }
+            if episode['play_minutes'] <= 0 or episode['start_bpm'] > episode['end_bpm']:
+                raise ValueError(f"잘못된 에피소드 설정: {entry}")
+            episodes.append(episode)
+        return episodes
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.error(f"에피소드 일정 로드 실패: {path} - {str(e)}")
+        return None
+
+class EpisodePlanner:
+    """여러 에피소드의 트랙을 한 번에 배정하는 배치 플래너
+
+    일정 순서대로 에피소드마다 생성기의 select_playlist로 트랙을 고르므로 create_playlist와
+    같은 선택 규칙(fill_mode, 기준 트랙, 아티스트 간격/장르 비율/드럼 강도 제약, 재생 순서)을
+    그대로 따른다. 사용 횟수는 이번 배치에서 앞 에피소드가 고른 횟수까지 더해 넘기므로
+    같은 트랙이 여러 에피소드에 몰리지 않고 적게 쓰인 트랙부터 나뉘며, 배치 전체에서도
+    MAX_TRACK_USES 제한을 넘지 않는다. 에피소드 하나만 계획하면 create_playlist와 같은 트랙을 고른다.
+    """
+    def __init__(self, generator, calendar):
+        self.generator = generator
+        self.calendar = calendar
+
+    def plan(self):
+        """에피소드별 플레이리스트 (트랙 테이블 행 뷰 목록, 재생 순서, 고를 트랙이 없으면 빈 목록)"""
+        if not self.generator.load_tracks_from_csv():
+            return None
+
+        # 트랙 ID → 이번 배치까지 포함한 사용 횟수
+        projected = dict(self.generator.usage_history.usage_counts())
+        plans = []
+        for index, spec in enumerate(self.calendar, 1):
+            target_ms = int(spec['play_minutes'] * 60 * 1000)
+            playlist = self.generator.select_playlist(spec['start_bpm'], spec['end_bpm'], target_ms, usage_counts=projected)
+            if not playlist:
+                logging.warning(f"에피소드 {index}: 적절한 BPM 범위의 트랙이 없습니다.")
+                plans.append([])
+                continue
+            for track in playlist:
+                projected[track['track_id']] = projected.get(track['track_id'], 0) + 1
+            current_ms = sum(track['duration_ms'] for track in playlist)
+            logging.info(f"에피소드 {index} 계획 완료: {len(playlist)}곡, {str(timedelta(milliseconds=current_ms))} / {str(timedelta(milliseconds=target_ms))}")
+            plans.append(playlist)
+        return plans
+
+    def run(self):
+        """전체 에피소드 계획 후 에피소드마다 챕터, 콘텐츠, 사용 이력, 폴더를 차례로 생성"""
+        plans = self.plan()
+        if plans is None:
+            return None
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+        results = []
+        for index, (spec, playlist) in enumerate(zip(self.calendar, plans), 1):
+            if not playlist:
+                results.append(None)
+                continue
+            target_ms = int(spec['play_minutes'] * 60 * 1000)
+            underfilled = self.generator.check_underfilled(playlist, target_ms)
+            # 같은 분에 여러 에피소드를 만들므로 파일명에 에피소드 번호를 붙임
+            result = self.generator.publish_playlist(playlist, target_ms, f"{timestamp}_{index:02d}")
+            if result is not None:
+                result['underfilled'] = underfilled
+            results.append(result)
+            if result is None:
+                logging.error(f"에피소드 {index} 생성 실패")
+        logging.info(f"배치 에피소드 생성 완료: {sum(result is not None for result in results)} / {len(results)}개")
+        return results
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import hashlib
+import threading
+
+# 콘텐츠 해시에 사용할 샘플 크기 (앞/가운데/뒤 각각)
+HASH_SAMPLE_BYTES = 1 << 20
+
+# 캐시 기본 최대 크기
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def default_cache_dir():
+    """캐시 기본 위치 (csv_output을 다시 만들어도 유지되도록 사용자 홈 아래에 둠)"""
+    return os.environ.get('LOFI_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'lofi_music_maker'
+    )
+
+def _hash_samples(size, samples):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode())
+    for sample in samples:
+        digest.update(sample)
+    return digest.hexdigest()
+
+def _sample_offsets(size):
+    """파일 크기에 따른 샘플 위치 (작은 파일은 전체를 한 번에 읽음)"""
+    if size <= HASH_SAMPLE_BYTES * 3:
+        return [(0, size)]
+    return [
+        (0, HASH_SAMPLE_BYTES),
+        ((size - HASH_SAMPLE_BYTES) // 2, HASH_SAMPLE_BYTES),
+        (size - HASH_SAMPLE_BYTES, HASH_SAMPLE_BYTES)
+    ]
+
+def content_hash(file_path):
+    """파일 크기와 앞/가운데/뒤 샘플로 계산하는 빠른 콘텐츠 해시"""
+    with open(file_path, 'rb') as f:
+        return content_hash_fileobj(f)
+
+def content_hash_fileobj(f):
+    """이미 열려 있는 파일 객체로 content_hash 계산 (파일 위치는 처음으로 되돌림)"""
+    size = os.fstat(f.fileno()).st_size
+    samples = []
+    for offset, length in _sample_offsets(size):
+        f.seek(offset)
+        samples.append(f.read(length))
+    f.seek(0)
+    return _hash_samples(size, samples)
+
+def content_hash_bytes(data):
+    """메모리에 읽어 둔 파일 내용으로 content_hash와 같은 값을 계산"""
+    size = len(data)
+    view = memoryview(data)
+    return _hash_samples(size, [view[offset:offset + length] for offset, length in _sample_offsets(size)])
+
+def params_version(params):
+    """분석 파라미터 딕셔너리를 캐시 키용 짧은 해시로 변환"""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+class FeatureCache:
+    """콘텐츠 해시 + 분석 파라미터 버전을 키로 하는 오디오 특성 디스크 캐시"""
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, prune_interval=256):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.db_path = os.path.join(self.cache_dir, 'features.sqlite3')
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._conn = None
+        self._conn_pid = None
+        self._puts = 0
+        # 리더 스레드와 메인 스레드가 같은 연결을 사용
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # 프로세스 풀로 넘길 때 연결과 락은 넘기지 않음
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_conn_pid'] = None
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """프로세스별 SQLite 연결 (fork 이후에는 새로 연결)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS features (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_features_last_access ON features(last_access)')
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def make_key(self, file_hash, params):
+        return f"{file_hash}:{params_version(params)}"
+
+    def get(self, file_hash, params):
+        """캐시된 특성 반환 (없으면 None)"""
+        key = self.make_key(file_hash, params)
+        try:
+            with self._lock:
+                return self._get(key)
+        except Exception as e:
+            logging.warning(f"특성 캐시 조회 실패: {str(e)}")
+            return None
+
+    def _get(self, key):
+        conn = self._connect()
+        row = conn.execute('SELECT value FROM features WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute('UPDATE features SET last_access = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, file_hash, params, features):
+        """분석 결과를 캐시에 저장"""
+        key = self.make_key(file_hash, params)
+        value = json.dumps(features, ensure_ascii=False)
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO features (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                        (key, value, len(key) + len(value), time.time())
+                    )
+                self._puts += 1
+            if self._puts % self.prune_interval == 0:
+                self.prune()
+        except Exception as e:
+            logging.warning(f"특성 캐시 저장 실패: {str(e)}")
+
+    def prune(self):
+        """최대 크기를 넘으면 오래 사용하지 않은 항목부터 삭제 (최대 크기의 90%까지)"""
+        try:
+            with self._lock:
+                return self._prune()
+        except Exception as e:
+            logging.warning(f"특성 캐시 정리 실패: {str(e)}")
+            return 0
+
+    def _prune(self):
+        conn = self._connect()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM features').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * 0.9)
+        with conn:
+            stale_keys = []
+            for key, size in conn.execute('SELECT key, size FROM features ORDER BY last_access'):
+                if total <= target:
+                    break
+                stale_keys.append((key,))
+                total -= size
+            conn.executemany('DELETE FROM features WHERE key = ?', stale_keys)
+        logging.info(f"특성 캐시 정리: {len(stale_keys)}개 항목 삭제")
+        return len(stale_keys)
+
+    def close(self):
+        if self._conn is not None and self._conn_pid == os.getpid():
+            self.prune()
+            self._conn.close()
+        self._conn = None
+        self._conn_pid = None
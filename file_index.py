@@ -0,0 +1,157 @@
+import os
+import logging
+import pandas as pd
+
+from feature_cache import content_hash
+
+# 에피소드 폴더가 아닌 폴더
+EXCLUDED_FOLDERS = ['temp', 'video_result', 'python']
+
+INDEX_COLUMNS = ['folder_name', 'file_name', 'size', 'mtime_ns', 'content_hash']
+
+def is_track_file(file_name):
+    return file_name.endswith('.mp3') and file_name.startswith('ES_')
+
+class InventoryDiff:
+    """이전 인덱스와 현재 파일 목록의 차이"""
+    def __init__(self, folders, entries, previous, added, changed, removed):
+        self.folders = folders
+        self.entries = entries
+        self.previous = previous or {}
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+
+    def folder_files(self, folder_name):
+        """폴더의 음원 파일명 목록 (정렬)"""
+        return sorted(file_name for (folder, file_name) in self.entries if folder == folder_name)
+
+    def changed_folders(self):
+        """파일이 추가되거나 변경된 폴더"""
+        return set(folder for folder, _ in self.added) | set(folder for folder, _ in self.changed)
+
+    def has_changes(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def snapshot(self, pending_folders=()):
+        """저장할 인덱스 (아직 처리하지 않은 폴더는 이전 인덱스 항목을 유지하여 다음 실행에서 다시 감지)"""
+        entries = {key: entry for key, entry in self.entries.items() if key[0] not in pending_folders}
+        entries.update({key: entry for key, entry in self.previous.items() if key[0] in pending_folders})
+        return entries
+
+class FileInventory:
+    """음원 파일 인덱스 (경로, 크기, 수정 시각, 콘텐츠 해시)
+
+    scandir 한 번으로 에피소드 폴더의 파일 목록과 stat을 수집하고, 크기나 수정 시각이
+    바뀐 파일만 콘텐츠 해시를 다시 계산하여 추가/변경/삭제된 파일을 찾는다.
+    """
+    def __init__(self, base_path, index_path):
+        self.base_path = base_path
+        self.index_path = index_path
+
+    def load(self):
+        """저장된 인덱스 로드: (폴더명, 파일명) → 항목"""
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            index_df = pd.read_csv(
+                self.index_path,
+                dtype={'folder_name': str, 'file_name': str, 'content_hash': str},
+                keep_default_na=False
+            )
+            return {
+                (row['folder_name'], row['file_name']): row
+                for row in index_df.to_dict('records')
+            }
+        except Exception as e:
+            logging.error(f"파일 인덱스 로드 실패: {str(e)}")
+            return None
+
+    def scan(self):
+        """에피소드 폴더를 scandir로 한 번 훑어 폴더 목록과 (폴더명, 파일명) → 크기/수정 시각 수집"""
+        folder_names = []
+        entries = {}
+        with os.scandir(self.base_path) as folders:
+            for folder in folders:
+                if not folder.is_dir() or folder.name in EXCLUDED_FOLDERS:
+                    continue
+                folder_names.append(folder.name)
+                with os.scandir(folder.path) as files:
+                    for entry in files:
+                        if not entry.is_file() or not is_track_file(entry.name):
+                            continue
+                        stat = entry.stat()
+                        entries[(folder.name, entry.name)] = {
+                            'folder_name': folder.name,
+                            'file_name': entry.name,
+                            'size': stat.st_size,
+                            'mtime_ns': stat.st_mtime_ns,
+                            'content_hash': ''
+                        }
+        return folder_names, entries
+
+    def diff(self, known_folders=(), hash_files=True):
+        """이전 인덱스와 비교하여 추가/변경/삭제된 파일 반환
+
+        인덱스가 아직 없으면 이미 분석된 폴더(known_folders)의 파일은 변경 없음으로 보고
+        기준 인덱스만 만든다 (해시는 이후 크기/수정 시각이 바뀔 때 계산).
+        hash_files가 False면 해시를 계산하지 않고 크기/수정 시각만으로 판단한다 (메타데이터 스캔용).
+        """
+        previous = self.load()
+        folders, current = self.scan()
+        added, changed = [], []
+
+        for key, entry in current.items():
+            if previous is None:
+                if key[0] not in known_folders:
+                    added.append(key)
+                continue
+
+            old = previous.get(key)
+            if old is None:
+                added.append(key)
+                continue
+
+            if old['size'] == entry['size'] and old['mtime_ns'] == entry['mtime_ns']:
+                entry['content_hash'] = old['content_hash']
+                continue
+
+            if not hash_files:
+                changed.append(key)
+                continue
+
+            # 크기나 수정 시각이 바뀐 파일만 해시 비교 (내용이 같으면 변경 아님)
+            entry['content_hash'] = self.hash_file(key)
+            if not old['content_hash'] or entry['content_hash'] != old['content_hash']:
+                changed.append(key)
+
+        removed = sorted(key for key in (previous or {}) if key not in current)
+
+        if hash_files:
+            for key in added:
+                entry = current[key]
+                if not entry['content_hash']:
+                    entry['content_hash'] = self.hash_file(key)
+
+        logging.info(f"파일 인덱스: 전체 {len(current)}개, 추가 {len(added)}개, 변경 {len(changed)}개, 삭제 {len(removed)}개")
+        return InventoryDiff(folders, current, previous, sorted(added), sorted(changed), removed)
+
+    def hash_file(self, key):
+        try:
+            return content_hash(os.path.join(self.base_path, *key))
+        except OSError as e:
+            logging.error(f"파일 해시 계산 실패: {key[1]} - {str(e)}")
+            return ''
+
+    def save(self, entries):
+        """인덱스 저장"""
+        try:
+            pd.DataFrame(list(entries.values()), columns=INDEX_COLUMNS).to_csv(
+                self.index_path,
+                index=False,
+                encoding='utf-8-sig'
+            )
+            return True
+        except Exception as e:
+            logging.error(f"파일 인덱스 저장 실패: {str(e)}")
+            return False
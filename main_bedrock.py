@@ -1,10 +1,19 @@
 import os
 import json
+import sqlite3
 import boto3
-import librosa
+import soundfile as sf
+from audioread.exceptions import DecodeError
+from librosa.util.exceptions import ParameterError
 from mutagen.mp3 import MP3
 from datetime import timedelta
 import xml.etree.ElementTree as ET  # 이 줄을 추가
+from feature_cache import FeatureCache, content_hash
+from streaming import stream_spectral_features
+from playlist_order import order_tracks
+
+# get_music_info BPM/특성 분석 파라미터 (분석 방식이 바뀌면 version을 올려 캐시 무효화)
+BPM_CACHE_PARAMS = {'source': 'main_bedrock.get_music_info', 'sr': None, 'mode': 'stream', 'version': 3}
 
 def get_aws_session():
     """AWS 세션 생성"""
@@ -30,10 +39,34 @@ def create_youtube_chapters(tracks):
     
     return "\n".join(chapters)
 
-def get_music_info(folder_path):
+def get_bpm(file_path, feature_cache):
+    """BPM과 재생 순서 정렬에 쓰는 드럼 강도/화성 복잡도 분석 (이미 분석한 음원은 캐시에서 가져옴)"""
+    try:
+        file_hash = content_hash(file_path)
+        cached = feature_cache.get(file_hash, BPM_CACHE_PARAMS)
+        if cached is not None:
+            return cached
+        # 곡 전체를 블록 단위로 스트리밍 분석 (긴 곡도 메모리 사용량 일정)
+        features = stream_spectral_features(file_path)
+        result = {
+            'bpm': round(float(features['tempo'])),
+            'drum_intensity': round(features['percussive_rms'], 3),
+            'harmonic_complexity': round(features['chroma_complexity'], 3)
+        }
+        feature_cache.put(file_hash, BPM_CACHE_PARAMS, result)
+        return result
+    except (OSError, sqlite3.Error, sf.SoundFileError, DecodeError, ParameterError, ValueError) as e:
+        # 읽을 수 없거나 분석할 수 없는 음원은 BPM 0으로 두고 계속 진행
+        print(f"BPM 분석 실패 {os.path.basename(file_path)}: {e}")
+        return {'bpm': 0, 'drum_intensity': None, 'harmonic_complexity': None}
+
+def get_music_info(folder_path, feature_cache=None, metadata_only=False):
+    """폴더의 MP3 정보 수집 (metadata_only면 BPM 분석 없이 헤더의 재생 시간만 사용)"""
     tracks = []
+    if feature_cache is None and not metadata_only:
+        feature_cache = FeatureCache()
     
-    for filename in os.listdir(folder_path):
+    for filename in sorted(os.listdir(folder_path)):
         if filename.endswith(".mp3"):
             file_path = os.path.join(folder_path, filename)
             
@@ -41,18 +74,16 @@ def get_music_info(folder_path):
                 audio = MP3(file_path)
                 duration = int(audio.info.length)
                 
-                # BPM 분석
-                try:
-                    y, sr = librosa.load(file_path, sr=None)
-                    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-                    bpm = round(float(tempo))
-                except:
-                    bpm = 0
+                # BPM 분석 (metadata_only면 분석하지 않고 0으로 둠)
+                features = {'bpm': 0} if metadata_only else get_bpm(file_path, feature_cache)
+                bpm = features['bpm']
                 
                 title = filename.replace("ES_", "").replace(".mp3", "")
                 tracks.append({
                     "title": title,
                     "bpm": bpm,
+                    "drum_intensity": features.get('drum_intensity'),
+                    "harmonic_complexity": features.get('harmonic_complexity'),
                     "duration": duration,
                     "path": file_path
                 })
@@ -62,16 +93,19 @@ def get_music_info(folder_path):
             except Exception as e:
                 print(f"오류 발생 {filename}: {e}")
     
-    # BPM 기준으로 정렬
-    tracks_sorted_by_bpm = sorted(tracks, key=lambda x: x["bpm"])
+    # 가장 느린 BPM → 가장 빠른 BPM으로 BPM/드럼/화성이 부드럽게 이어지도록 정렬
+    # (metadata_only면 정렬할 특성이 없으므로 파일 이름 순서 유지)
+    analyzed = [track["bpm"] for track in tracks if track["bpm"]]
+    if analyzed:
+        tracks = order_tracks(tracks, min(analyzed), max(analyzed))
     
     # 정렬된 트랙에 시작 시간 추가
     start_time = 0
-    for track in tracks_sorted_by_bpm:
+    for track in tracks:
         track["start_time"] = start_time
         start_time += track["duration"]
     
-    return tracks_sorted_by_bpm
+    return tracks
 
 def create_srt(tracks):
     srt_output = ""
@@ -95,10 +129,11 @@ def create_srt(tracks):
     return srt_output
 
 def create_prompt(tracks):
-    """BPM 순으로 정렬된 트랙 리스트로 프롬프트 생성"""
+    """재생 순서대로 정렬된 트랙 리스트로 프롬프트 생성 (BPM을 분석하지 않은 트랙은 길이만 표시)"""
     total_duration = sum(track['duration'] for track in tracks)
     tracks_list = "\n".join([
-        f"- {track['title']} (BPM: {track['bpm']}, 길이: {str(timedelta(seconds=track['duration']))})"
+        f"- {track['title']} (BPM: {track['bpm']}, 길이: {str(timedelta(seconds=track['duration']))})" if track['bpm']
+        else f"- {track['title']} (길이: {str(timedelta(seconds=track['duration']))})"
         for track in tracks
     ])
     
@@ -107,7 +142,7 @@ def create_prompt(tracks):
 
 플레이리스트 정보:
 총 재생시간: {str(timedelta(seconds=total_duration))}
-수록곡 (BPM 순):
+수록곡:
 {tracks_list}
 
 다음 형식으로 한글로 응답해주세요:
@@ -237,7 +272,7 @@ def create_premiere_xml(tracks):
         print(f"XML 생성 중 오류 발생: {str(e)}")
         return None
 
-def main():
+def main(folder_path='../audio_lofi_jazz/reference/12th', feature_cache=None):
     # AWS 프로파일 설정
     try:
         session = get_aws_session()
@@ -245,11 +280,9 @@ def main():
         print(f"AWS 세션 생성 실패: {e}")
         return
 
-    # 폴더 경로 설정
-    folder_path = '../audio_lofi_jazz/reference/12th'
-    
-    # 음악 정보 수집
-    tracks = get_music_info(folder_path)
+    # 음악 정보 수집 (챕터, SRT, XML이 BPM 흐름 순서를 따르도록 특성 캐시를 거쳐 분석,
+    # 한 번 분석한 음원은 디코딩하지 않고 캐시에서 가져옴)
+    tracks = get_music_info(folder_path, feature_cache)
 
     # 유튜브 챕터 생성
     chapters = create_youtube_chapters(tracks)
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 분석 파이프라인 단계 (요약 표와 Prometheus 스냅샷의 출력 순서)
+STAGES = ['open', 'hash', 'decode', 'resample', 'stft', 'beat', 'hpss', 'chroma', 'stream', 'csv_write', 'db_write']
+
+# 요약 표에 표시할 가장 느린 파일 수
+SLOWEST_FILES = 5
+
+def max_rss_bytes():
+    """프로세스 최대 상주 메모리 (resource 모듈이 없는 환경에서는 0)"""
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+class NullMetrics:
+    """계측을 사용하지 않을 때의 빈 구현 (호출 비용만 있고 기록하지 않음)"""
+    enabled = False
+
+    def stage(self, name, bytes_read=0):
+        return nullcontext({})
+
+    def track(self, label):
+        return nullcontext()
+
+    def extend(self, records):
+        pass
+
+    def drain(self):
+        return []
+
+    def report(self):
+        return None
+
+NULL_METRICS = NullMetrics()
+
+class StageMetrics:
+    """분석 단계별 경과/CPU 시간, 읽은 바이트 수, 최대 메모리 기록
+
+    stage()로 감싼 구간마다 한 건씩 기록하며, track()으로 지정한 파일명을 함께 남긴다.
+    CPU 시간은 스레드 기준(time.thread_time)이라 리더 스레드의 디코딩도 따로 집계된다.
+    메모리는 단계가 끝날 때의 프로세스 최대 상주 메모리(max_rss_bytes)를 기록하고,
+    trace_memory=True면 tracemalloc으로 단계 안에서 늘어난 최대 메모리(peak_bytes)도 기록한다.
+    tracemalloc은 분석 시간이 두 배 가까이 늘어나며 여러 스레드가 동시에 실행되는 구간은 근삿값이다.
+    report()는 기록을 JSON lines 파일에 추가하고 Prometheus 텍스트 형식 스냅샷과 요약 표를 남긴다.
+    """
+    enabled = True
+
+    def __init__(self, output_dir=None, trace_memory=False):
+        self.output_dir = output_dir
+        self.records = []
+        self.totals = {}
+        self.file_totals = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def __getstate__(self):
+        # 프로세스 풀로 넘길 때 기록과 락은 넘기지 않음
+        state = self.__dict__.copy()
+        state['records'] = []
+        state['totals'] = {}
+        state['file_totals'] = {}
+        del state['_lock']
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def track(self, label):
+        """이 스레드에서 기록하는 단계에 붙일 파일명 지정"""
+        previous = getattr(self._local, 'label', None)
+        self._local.label = label
+        try:
+            yield
+        finally:
+            self._local.label = previous
+
+    @contextmanager
+    def stage(self, name, bytes_read=0):
+        """단계 하나의 시간/메모리 측정 (예외가 나도 기록)
+
+        with 문이 돌려주는 딕셔너리의 'bytes_read'를 바꾸면 단계 안에서 읽은 양을 기록할 수 있다.
+        """
+        extra = {'bytes_read': bytes_read}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield extra
+        finally:
+            record = {
+                'ts': round(time.time(), 3),
+                'pid': os.getpid(),
+                'file': getattr(self._local, 'label', None),
+                'stage': name,
+                'wall_seconds': round(time.perf_counter() - wall_start, 6),
+                'cpu_seconds': round(time.thread_time() - cpu_start, 6),
+                'bytes_read': int(extra['bytes_read']),
+                'peak_bytes': 0,
+                'max_rss_bytes': max_rss_bytes()
+            }
+            if self.trace_memory:
+                record['peak_bytes'] = max(0, tracemalloc.get_traced_memory()[1] - start_memory)
+            self.extend([record])
+
+    def extend(self, records):
+        """기록 추가 (워커 프로세스가 돌려준 기록도 같은 방식으로 합침)"""
+        with self._lock:
+            for record in records:
+                self.records.append(record)
+                total = self.totals.setdefault(record['stage'], {
+                    'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                    'bytes_read': 0, 'peak_bytes': 0, 'max_rss_bytes': 0, 'max_wall_seconds': 0.0
+                })
+                total['calls'] += 1
+                total['wall_seconds'] += record['wall_seconds']
+                total['cpu_seconds'] += record['cpu_seconds']
+                total['bytes_read'] += record['bytes_read']
+                total['peak_bytes'] = max(total['peak_bytes'], record['peak_bytes'])
+                total['max_rss_bytes'] = max(total['max_rss_bytes'], record['max_rss_bytes'])
+                total['max_wall_seconds'] = max(total['max_wall_seconds'], record['wall_seconds'])
+                if record['file']:
+                    self.file_totals[record['file']] = self.file_totals.get(record['file'], 0.0) + record['wall_seconds']
+
+    def drain(self):
+        """아직 파일로 내보내지 않은 기록을 꺼내고 비움"""
+        with self._lock:
+            records, self.records = self.records, []
+        return records
+
+    def stage_order(self):
+        known = [name for name in STAGES if name in self.totals]
+        return known + sorted(name for name in self.totals if name not in STAGES)
+
+    def report(self):
+        """기록을 metrics.jsonl에 추가하고 metrics.prom 스냅샷 저장, 요약 표 로그 출력"""
+        records = self.drain()
+        if self.output_dir:
+            try:
+                with open(os.path.join(self.output_dir, 'metrics.jsonl'), 'a', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                with open(os.path.join(self.output_dir, 'metrics.prom'), 'w', encoding='utf-8') as f:
+                    f.write(self.prometheus_text())
+            except Exception as e:
+                logging.error(f"분석 지표 저장 실패: {str(e)}")
+        self.log_summary()
+        return self.totals
+
+    def prometheus_text(self):
+        """단계별 누적 지표를 Prometheus 텍스트 형식으로 변환"""
+        metrics = [
+            ('lofi_stage_calls_total', 'counter', '단계 실행 횟수', 'calls'),
+            ('lofi_stage_wall_seconds_total', 'counter', '단계 경과 시간 합계', 'wall_seconds'),
+            ('lofi_stage_cpu_seconds_total', 'counter', '단계 CPU 시간 합계', 'cpu_seconds'),
+            ('lofi_stage_bytes_read_total', 'counter', '단계에서 읽은 바이트 수', 'bytes_read'),
+            ('lofi_stage_peak_memory_bytes', 'gauge', '단계 실행 중 최대 추가 메모리 (tracemalloc)', 'peak_bytes'),
+            ('lofi_stage_max_rss_bytes', 'gauge', '단계 종료 시점의 프로세스 최대 상주 메모리', 'max_rss_bytes'),
+            ('lofi_stage_max_wall_seconds', 'gauge', '단계 1회 최대 경과 시간', 'max_wall_seconds')
+        ]
+        lines = []
+        for metric, metric_type, help_text, key in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for name in self.stage_order():
+                lines.append(f'{metric}{{stage="{name}"}} {self.totals[name][key]}')
+        return '\n'.join(lines) + '\n'
+
+    def log_summary(self):
+        if not self.totals:
+            return
+        logging.info("\n=== 분석 단계별 지표 ===")
+        logging.info(f"{'단계':<10} {'횟수':>6} {'경과(s)':>10} {'평균(ms)':>10} {'최대(ms)':>10} {'CPU(s)':>10} {'읽기(MB)':>10} {'추가메모리(MB)':>14} {'RSS(MB)':>10}")
+        for name in self.stage_order():
+            total = self.totals[name]
+            logging.info(
+                f"{name:<10} {total['calls']:>6} {total['wall_seconds']:>10.2f} "
+                f"{total['wall_seconds'] / total['calls'] * 1000:>10.1f} {total['max_wall_seconds'] * 1000:>10.1f} "
+                f"{total['cpu_seconds']:>10.2f} {total['bytes_read'] / 1048576:>10.1f} {total['peak_bytes'] / 1048576:>14.1f} "
+                f"{total['max_rss_bytes'] / 1048576:>10.1f}"
+            )
+        slowest = sorted(self.file_totals.items(), key=lambda item: item[1], reverse=True)[:SLOWEST_FILES]
+        if slowest:
+            logging.info("가장 오래 걸린 파일:")
+            for label, seconds in slowest:
+                logging.info(f"  {seconds:.2f}초 - {label}")
@@ -0,0 +1,55 @@
+import os
+import json
+import logging
+import hashlib
+import numpy as np
+
+# 결정적 모드 결과 캐시 위치 (csv_dir 아래)
+PLAYLIST_CACHE_DIR = 'playlist_cache'
+
+def catalog_version(table, usage_counts):
+    """트랙 테이블 내용과 트랙별 사용 횟수로 계산하는 카탈로그/이력 버전"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in table.column_names:
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(table.columns[name]).tobytes())
+        if name in table.vocab:
+            digest.update(json.dumps(table.vocab[name].tolist(), ensure_ascii=False, default=str).encode())
+    usage = np.array(sorted((int(track_id), int(count)) for track_id, count in usage_counts.items()), dtype=np.int64)
+    digest.update(usage.tobytes())
+    return digest.hexdigest()
+
+class PlaylistCache:
+    """(생성 파라미터, 시드, 카탈로그 버전) 키로 선택한 트랙, 챕터, 유튜브 콘텐츠를 저장하는 디스크 캐시
+
+    항목 하나를 csv_dir/playlist_cache/키.json 파일 하나로 저장한다.
+    """
+    def __init__(self, csv_dir):
+        self.cache_dir = os.path.join(csv_dir, PLAYLIST_CACHE_DIR)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        """캐시 항목 (없거나 읽을 수 없으면 None)"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"플레이리스트 캐시 로드 실패, 다시 생성합니다: {path} - {str(e)}")
+            return None
+
+    def put(self, key, entry):
+        """캐시 항목 저장 (임시 파일에 쓴 뒤 교체)"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self.path(key)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"플레이리스트 캐시 저장 실패: {str(e)}")
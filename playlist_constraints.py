@@ -0,0 +1,139 @@
+import logging
+from collections import deque
+import numpy as np
+
+from playlist_selection import TrackSelector
+
+class PlaylistConstraints:
+    """플레이리스트 제약 조건
+
+    artist_gap: 같은 아티스트 트랙 사이에 있어야 하는 최소 트랙 수 (0이면 제한 없음)
+    genre_ratios: 장르별 목표 트랙 비율 (예: {'Lo-fi Hip Hop': 0.6, 'Lo-fi Jazz': 0.4}, 없는 장르는 제외)
+    drum_range: 허용하는 드럼 강도 범위 (최소, 최대)
+    """
+    def __init__(self, artist_gap=0, genre_ratios=None, drum_range=None):
+        self.artist_gap = max(0, int(artist_gap))
+        self.genre_ratios = None
+        if genre_ratios:
+            total = float(sum(genre_ratios.values()))
+            if total <= 0:
+                raise ValueError(f"잘못된 장르 비율: {genre_ratios}")
+            self.genre_ratios = {genre: ratio / total for genre, ratio in genre_ratios.items() if ratio > 0}
+        self.drum_range = tuple(drum_range) if drum_range else None
+
+    def selection_active(self):
+        """선택 순서에 영향을 주는 제약(아티스트 간격, 장르 비율)이 있는지"""
+        return bool(self.artist_gap or self.genre_ratios)
+
+    def candidate_mask(self, drum_intensity, genres):
+        """후보별 허용 여부 (드럼 강도 범위 안, 목표 비율이 있는 장르)"""
+        mask = np.ones(len(drum_intensity), dtype=bool)
+        if self.drum_range:
+            low, high = self.drum_range
+            mask &= (drum_intensity >= low) & (drum_intensity <= high)
+        if self.genre_ratios:
+            mask &= np.isin(genres, list(self.genre_ratios))
+        return mask
+
+def spacing_violations(artists, gap):
+    """같은 아티스트가 gap곡 안에 다시 나오는 횟수 (아티스트 코드 배열, 음수는 비교하지 않음)"""
+    artists = np.asarray(artists)
+    violations = 0
+    for distance in range(1, min(gap, len(artists) - 1) + 1):
+        violations += int(((artists[distance:] == artists[:-distance]) & (artists[distance:] >= 0)).sum())
+    return violations
+
+class ConstrainedSelector:
+    """아티스트 간격과 장르 비율을 지키며 트랙을 하나씩 고르는 선택 엔진
+
+    장르마다 TrackSelector(재생 시간 최솟값 트리)를 두고, 목표 비율 대비 가장 부족한 장르에서
+    create_playlist와 같은 규칙(남은 시간에 맞는 첫 트랙, 없으면 가장 짧은 트랙)으로 고른다.
+    방금 나온 아티스트의 트랙은 artist_gap곡이 지날 때까지 트리에서 빼 두었다가 다시 넣으므로
+    고른 뒤 검사해서 버리는 재시도 없이 선택마다 제약을 만족한다.
+    """
+    def __init__(self, durations, artists, genres, constraints):
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.artists = np.asarray(artists)
+        self.gap = constraints.artist_gap
+        genres = np.asarray(genres, dtype=object)
+        self.ratios = constraints.genre_ratios or {None: 1.0}
+
+        # 장르 → (후보 위치 배열, 선택 엔진), 후보 위치 → (장르, 장르 안 위치)
+        self.groups = {}
+        self.location = {}
+        for genre in self.ratios:
+            positions = np.arange(len(self.durations)) if genre is None else np.flatnonzero(genres == genre)
+            self.groups[genre] = (positions, TrackSelector(self.durations[positions]))
+            self.location.update((position, (genre, local)) for local, position in enumerate(positions.tolist()))
+        self.counts = {genre: 0 for genre in self.ratios}
+        self.picked = np.zeros(len(self.durations), dtype=bool)
+
+        # 아티스트 → 후보 위치 목록, 최근 artist_gap곡의 아티스트 (이 아티스트 트랙은 트리에서 빠져 있음)
+        self.artist_positions = {}
+        if self.gap:
+            for position, artist in enumerate(self.artists.tolist()):
+                self.artist_positions.setdefault(artist, []).append(position)
+        self.recent = deque()
+        self.exhausted = set()
+        # 고를 트랙이 없어 아티스트 간격을 한 곡씩 줄인 횟수
+        self.relaxed = 0
+
+    def __len__(self):
+        return sum(len(selector) for _, selector in self.groups.values())
+
+    def pick(self, remaining_ms):
+        """고른 후보 위치 (남은 후보가 하나도 없으면 None)
+
+        아티스트 간격 때문에 모든 장르에서 고를 트랙이 없으면 가장 오래전에 나온 아티스트부터
+        한 명씩 다시 허용하며(간격을 한 곡씩 줄임) 다시 고른다. 줄인 간격은 이후 선택에서
+        아티스트가 다시 쌓이면서 원래대로 돌아온다.
+        """
+        while True:
+            position = self.pick_genre(remaining_ms, final=not self.recent)
+            if position is not None or not self.recent:
+                break
+            self.release(self.recent.popleft())
+            self.relaxed += 1
+        if position is None:
+            return None
+        self.block_artist(self.artists[position])
+        return position
+
+    def pick_genre(self, remaining_ms, final):
+        """목표 비율 대비 가장 부족한 장르부터 고를 수 있는 트랙 선택 (final이면 빈 장르를 경고)"""
+        total = sum(self.counts.values()) + 1
+        # 목표 비율 대비 가장 부족한 장르부터 (같으면 비율 지정 순서)
+        for genre in sorted(self.ratios, key=lambda g: self.counts[g] - self.ratios[g] * total):
+            positions, selector = self.groups[genre]
+            local = selector.pick(remaining_ms)
+            if local is None:
+                if final and genre not in self.exhausted and len(self.ratios) > 1:
+                    self.exhausted.add(genre)
+                    logging.warning(f"장르 '{genre}'의 사용 가능한 트랙이 없어 목표 비율을 맞추지 못할 수 있습니다.")
+                continue
+            position = int(positions[local])
+            self.picked[position] = True
+            self.counts[genre] += 1
+            return position
+        return None
+
+    def block_artist(self, artist):
+        """방금 고른 아티스트의 트랙을 빼고, artist_gap곡 전에 나온 아티스트의 트랙을 다시 넣음"""
+        if not self.gap:
+            return
+        # 아티스트 정보가 없는 트랙(-1)은 빼지 않지만 간격 계산에는 한 곡으로 셈
+        for position in self.artist_positions[artist] if artist >= 0 else ():
+            genre, local = self.location.get(position, (None, None))
+            if local is not None and not self.picked[position] and self.groups[genre][1].index.contains(local):
+                self.groups[genre][1].index.remove(local)
+        self.recent.append(artist)
+        if len(self.recent) > self.gap:
+            self.release(self.recent.popleft())
+
+    def release(self, artist):
+        """빼 두었던 아티스트의 아직 고르지 않은 트랙을 다시 넣음"""
+        for position in self.artist_positions[artist] if artist >= 0 else ():
+            genre, local = self.location.get(position, (None, None))
+            index = self.groups[genre][1].index if local is not None else None
+            if index is not None and not self.picked[position] and not index.contains(local):
+                index.add(local, self.durations[position])
@@ -5,17 +5,59 @@ import random
 import time
 import boto3
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from botocore.exceptions import ClientError
+from catalog_db import open_catalog
+from usage_history import UsageHistory
+from utils import csv_files
+from track_catalog import load_track_catalog
+from playlist_selection import DURATION_TOLERANCE_SECONDS, TrackSelector, exact_fill, usage_bucket_order
+from playlist_order import order_tracks
+from playlist_constraints import PlaylistConstraints, ConstrainedSelector
+from playlist_cache import PlaylistCache, catalog_version
+from feature_cache import params_version
+from similarity_index import load_similarity_index
+
+# 기준 트랙 하나당 후보로 사용할 비슷한 트랙 수
+SEED_NEIGHBORS = 200
 
 class PlaylistGenerator:
-    def __init__(self, csv_dir, base_path, start_bpm=70, end_bpm=85, play_minutes=120):
+    def __init__(self, csv_dir, base_path, start_bpm=70, end_bpm=85, play_minutes=120, track_catalog=None,
+                 fill_mode='greedy', duration_tolerance_seconds=DURATION_TOLERANCE_SECONDS, order_mode='flow',
+                 seed_track_ids=None, seed_neighbors=SEED_NEIGHBORS, constraints=None,
+                 random_seed=None, catalog_version=None, dry_run=False):
         self.csv_dir = csv_dir
         self.base_path = base_path
         self.tracks = None
+        # 트랙 인덱스 (create_track.py에서 이미 만든 것이 있으면 공유)
+        self.track_catalog = track_catalog
         self.start_bpm = start_bpm
         self.end_bpm = end_bpm
         self.target_duration_ms = play_minutes * 60 * 1000
+        # 트랙 선택 방식 (greedy: 남은 시간에 맞는 트랙을 차례로 선택, exact: 목표 시간 ± 허용 오차에 맞는 조합 선택)
+        self.fill_mode = fill_mode
+        self.duration_tolerance_seconds = duration_tolerance_seconds
+        # 재생 순서 (flow: start_bpm → end_bpm으로 BPM/드럼/화성/장르가 부드럽게 이어지도록 정렬, selection: 선택 순서 유지)
+        self.order_mode = order_mode
+        # 기준 트랙 (지정하면 기준 트랙과 특성이 비슷한 트랙만 후보로 사용)
+        self.seed_track_ids = list(seed_track_ids or [])
+        self.seed_neighbors = seed_neighbors
+        self.similarity_index = None
+        # 아티스트 간격, 장르 비율, 드럼 강도 범위 제약 (기본값은 제약 없음)
+        self.constraints = constraints or PlaylistConstraints()
+        # 결정적 모드 (시드를 지정하면 같은 사용 횟수 트랙의 순서를 시드로 섞고,
+        # (파라미터, 시드, 카탈로그 버전)별 결과를 캐시해 다시 실행하면 그대로 반환)
+        self.random_seed = random_seed
+        # 카탈로그/이력 버전 (지정하지 않으면 트랙 테이블과 사용 횟수로 계산)
+        self.catalog_version = catalog_version
+        self.playlist_cache = PlaylistCache(csv_dir)
+        # 시험 실행 (트랙 선택과 챕터만 만들고 Bedrock 호출, 파일 저장, 사용 이력 기록은 하지 않음)
+        self.dry_run = dry_run
+        # SQLite 카탈로그가 있으면 CSV 대신 사용
+        self.catalog = open_catalog(csv_dir)
+        # 추가 전용 사용 이력과 트랙별 사용 집계
+        self.usage_history = UsageHistory(csv_dir, self.catalog)
         self.session = self.get_aws_session()
         self.bedrock = self.session.client('bedrock-runtime', region_name='ap-northeast-2')
         
@@ -33,107 +75,253 @@ class PlaylistGenerator:
         if not self.load_tracks_from_csv():
             return None
             
-        # BPM 범위로 트랙 필터링
-        suitable_tracks = [
-            track for track in self.tracks
-            if self.start_bpm <= track['bpm'] <= self.end_bpm
-        ]
+        # 결정적 모드: 같은 파라미터, 시드, 카탈로그 버전의 결과가 있으면 다시 계산하지 않음
+        cache_key = None
+        if self.random_seed is not None:
+            cache_key = self.playlist_cache_key()
+            cached = self.playlist_cache.get(cache_key)
+            playlist = self.cached_playlist(cached) if cached else None
+            if playlist:
+                logging.info(f"캐시된 플레이리스트 사용: {cache_key}")
+                return self.finish_playlist(playlist, cache_key, cached)
+                
+        playlist = self.select_playlist()
+        if playlist:
+            return self.finish_playlist(playlist, cache_key)
+            
+        return None
+        
+    def select_playlist(self, start_bpm=None, end_bpm=None, target_duration_ms=None, usage_counts=None):
+        """BPM 범위, 사용 횟수, 제약 조건으로 트랙을 고르고 재생 순서를 정한 플레이리스트 (없으면 None)
+
+        BPM 범위, 목표 시간, 트랙별 사용 횟수를 주면 생성기 설정 대신 사용한다
+        (배치 에피소드 계획에서 에피소드별 설정과 배치 안의 사용 횟수를 넘길 때).
+        """
+        start_bpm = self.start_bpm if start_bpm is None else start_bpm
+        end_bpm = self.end_bpm if end_bpm is None else end_bpm
+        target_duration_ms = self.target_duration_ms if target_duration_ms is None else target_duration_ms
+        
+        # BPM 범위로 트랙 필터링 (정렬 인덱스 구간 조회, 트랙 테이블 행 번호)
+        table = self.track_catalog.table
+        candidates = self.track_catalog.bpm_indices(start_bpm, end_bpm)
         
-        if not suitable_tracks:
+        if self.seed_track_ids:
+            # 기준 트랙과 비슷한 트랙만 남김 (BPM 순서 유지)
+            candidates = candidates[np.isin(candidates, self.similar_track_rows(self.seed_track_ids))]
+            
+        # 드럼 강도 범위 밖이거나 목표 비율에 없는 장르의 트랙 제외
+        candidates = candidates[self.constraints.candidate_mask(
+            table.columns['drum_intensity'][candidates], table.values('genre', candidates)
+        )]
+            
+        if not len(candidates):
             logging.error("적절한 BPM 범위의 트랙이 없습니다.")
             return None
             
-        # 트랙 사용 이력 로드
-        history_file = os.path.join(self.csv_dir, 'track_usage_history.csv')
-        if os.path.exists(history_file):
-            history_df = pd.read_csv(history_file)
-            usage_counts = history_df['track_id'].value_counts()
-        else:
-            usage_counts = pd.Series(dtype=int)
-            
-        # 사용 횟수가 적은 순서로 정렬 (같은 사용 횟수면 BPM으로 정렬)
-        suitable_tracks.sort(key=lambda x: (usage_counts.get(x['track_id'], 0), x['bpm']))
+        # 트랙별 사용 횟수 (이력 전체가 아니라 집계만 읽음)
+        if usage_counts is None:
+            usage_counts = self.usage_history.usage_counts()
+        usage = np.array([usage_counts.get(track_id, 0) for track_id in table.columns['track_id'][candidates].tolist()], dtype=np.int64)
+            
+        # 사용 횟수가 적은 순서로 정렬 (3회 미만 사용된 트랙만, 같은 사용 횟수는 BPM 순 유지)
+        rng = np.random.default_rng(self.random_seed) if self.random_seed is not None else None
+        order = usage_bucket_order(usage, rng)
+        candidates = candidates[order]
+        usage = usage[order]
+        durations = table.columns['duration_ms'][candidates]
         
         playlist = []
         current_duration = 0
-        used_tracks = set()
         
-        # 목표 시간에 도달할 때까지 반복
-        while current_duration < self.target_duration_ms:
-            # 사용 가능한 트랙 필터링 (3회 미만 사용된 트랙만)
-            available_tracks = [
-                t for t in suitable_tracks
-                if t['track_id'] not in used_tracks and
-                usage_counts.get(t['track_id'], 0) < 3
-            ]
-            
-            if not available_tracks:
-                # 모든 트랙을 다 사용했거나, 남은 트랙이 없는 경우
-                logging.warning(f"더 이상 사용 가능한 트랙이 없습니다. 현재 재생시간: {str(timedelta(milliseconds=current_duration))}")
-                break
+        # 목표 시간 맞춤 모드: 허용 오차 안에서 사용 횟수가 적은 조합을 먼저 찾음
+        positions = None
+        if self.fill_mode == 'exact' and self.constraints.selection_active():
+            logging.warning("아티스트 간격/장르 비율 제약이 있으면 목표 시간 맞춤 모드를 쓸 수 없어 기존 방식으로 선택합니다.")
+        elif self.fill_mode == 'exact':
+            positions = exact_fill(durations, usage, target_duration_ms, self.duration_tolerance_seconds * 1000)
+            if positions is None:
+                logging.warning(f"목표 시간 ±{self.duration_tolerance_seconds}초 안에 맞는 트랙 조합이 없어 기존 방식으로 선택합니다.")
                 
-            # 남은 시간을 고려하여 적절한 길이의 트랙 선택
-            remaining_time = self.target_duration_ms - current_duration
-            
-            # 남은 시간에 맞는 트랙 찾기
-            suitable_duration_tracks = [
-                t for t in available_tracks
-                if t['duration_ms'] <= remaining_time
-            ]
-            
-            if not suitable_duration_tracks:
-                # 남은 시간에 맞는 트랙이 없으면 가장 짧은 트랙 선택
-                track = min(available_tracks, key=lambda x: x['duration_ms'])
+        if positions is not None:
+            for position in positions:
+                current_duration = self.append_track(playlist, table.row(candidates[position]), int(usage[position]), current_duration)
+            logging.info(f"목표 시간 맞춤 선택 완료: 목표와 {(current_duration - target_duration_ms) / 1000:+.1f}초 차이")
+        else:
+            # 재생 시간 최솟값 트리로 남은 시간에 맞는 트랙을 선택당 O(log n)에 찾음
+            # 아티스트 간격/장르 비율 제약이 있으면 장르별 트리에서 제약을 지키는 트랙만 고름
+            if self.constraints.selection_active():
+                selector = ConstrainedSelector(
+                    durations, table.columns['artist'][candidates], table.values('genre', candidates), self.constraints
+                )
             else:
-                # 남은 시간에 맞는 트랙 중 첫 번째 선택
-                track = suitable_duration_tracks[0]
-                
-            usage_count = usage_counts.get(track['track_id'], 0)
-            logging.info(f"트랙 선택: {track['title']} (이전 사용: {usage_count}회, 길이: {str(timedelta(milliseconds=track['duration_ms']))})")
-            
-            playlist.append(track)
-            used_tracks.add(track['track_id'])
-            current_duration += track['duration_ms']
+                selector = TrackSelector(durations)
             
-            # 현재 진행상황 로깅
-            progress_percent = (current_duration / self.target_duration_ms) * 100
-            logging.info(f"현재 진행률: {progress_percent:.1f}% ({str(timedelta(milliseconds=current_duration))} / {str(timedelta(milliseconds=self.target_duration_ms))})")
+            # 목표 시간에 도달할 때까지 반복
+            while current_duration < target_duration_ms:
+                # 남은 시간에 맞는 트랙 중 첫 번째, 없으면 가장 짧은 트랙 선택
+                position = selector.pick(target_duration_ms - current_duration)
+                
+                if position is None:
+                    # 모든 트랙을 다 사용했거나, 남은 트랙이 없는 경우
+                    logging.warning(f"더 이상 사용 가능한 트랙이 없습니다. 현재 재생시간: {str(timedelta(milliseconds=current_duration))}")
+                    break
+                    
+                current_duration = self.append_track(playlist, table.row(candidates[position]), int(usage[position]), current_duration)
+                
+            if getattr(selector, 'relaxed', 0):
+                logging.warning(f"아티스트 간격을 지키는 트랙이 없어 간격을 {selector.relaxed}번 한 곡씩 줄여 선택했습니다.")
             
         if playlist:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M')
-            
-            # 챕터 생성
-            chapters = self.generate_chapters(playlist)
-            if chapters:
-                self.save_chapter_files(chapters, timestamp)
+            if self.order_mode == 'flow':
+                # 전환 비용 행렬 위에서 최근접 이웃 + 2-opt/Or-opt로 재생 순서 결정
+                playlist = order_tracks(playlist, start_bpm, end_bpm, artist_gap=self.constraints.artist_gap)
+                logging.info(f"BPM 흐름에 맞춰 트랙 순서 정렬 완료 ({start_bpm} → {end_bpm} BPM)")
                 
-            # Bedrock 프롬프트 생성 및 응답 받기
-            prompt = self.create_rag_prompt(playlist, self.target_duration_ms)
-            content = self.get_bedrock_response(prompt)
+            return playlist
+                
+        return None
+        
+    def playlist_cache_key(self):
+        """결정적 모드 캐시 키 (생성 파라미터, 시드, 카탈로그/이력 버전)"""
+        version = self.catalog_version or catalog_version(self.track_catalog.table, self.usage_history.usage_counts())
+        return params_version({
+            'start_bpm': self.start_bpm,
+            'end_bpm': self.end_bpm,
+            'target_duration_ms': self.target_duration_ms,
+            'fill_mode': self.fill_mode,
+            'duration_tolerance_seconds': self.duration_tolerance_seconds,
+            'order_mode': self.order_mode,
+            'seed_track_ids': self.seed_track_ids,
+            'seed_neighbors': self.seed_neighbors,
+            'constraints': vars(self.constraints),
+            'random_seed': self.random_seed,
+            'catalog_version': version
+        })
+        
+    def cached_playlist(self, cached):
+        """캐시 항목의 트랙 ID로 찾은 플레이리스트 (없는 트랙이 있으면 None)"""
+        indices = [self.track_catalog.index_of(track_id) for track_id in cached['track_ids']]
+        if not indices or None in indices:
+            return None
+        return self.track_catalog.table.rows(indices)
+        
+    def finish_playlist(self, playlist, cache_key, cached=None):
+        """선택한 플레이리스트 게시 (시험 실행이면 챕터만 생성), 결정적 모드면 결과를 캐시에 저장"""
+        cached = cached or {}
+        underfilled = self.check_underfilled(playlist, self.target_duration_ms)
+            
+        if cached.get('published'):
+            # 이미 게시한 결과는 사용 이력을 다시 기록하지 않고 그대로 반환
+            logging.info("이미 게시한 플레이리스트입니다. 캐시된 결과를 반환합니다.")
+            return {
+                'playlist': playlist,
+                'content': cached.get('content'),
+                'chapters': cached.get('chapters'),
+                'next_episode': cached.get('next_episode'),
+                'underfilled': underfilled
+            }
             
-            if content:
-                # 결과 저장
-                self.save_results(playlist, content)
+        chapters = cached.get('chapters') or self.generate_chapters(playlist)
+        if self.dry_run:
+            logging.info(f"시험 실행: {len(playlist)}곡 선택 (Bedrock 호출과 파일 저장 생략)")
+            result = {'playlist': playlist, 'content': cached.get('content'), 'chapters': chapters, 'next_episode': None}
+        else:
+            result = self.publish_playlist(playlist, self.target_duration_ms, chapters=chapters, content=cached.get('content'))
+        if result is not None:
+            # 목표 시간보다 짧은 플레이리스트는 결과에 표시 (호출하는 쪽에서 다시 생성하거나 거부할 수 있도록)
+            result['underfilled'] = underfilled
+            
+        if cache_key:
+            published = not self.dry_run and result is not None
+            entry = {
+                'track_ids': [int(track['track_id']) for track in playlist],
+                'chapters': chapters,
+                'content': result['content'] if result else cached.get('content'),
+                'next_episode': result['next_episode'] if published else None,
+                'published': published
+            }
+            self.playlist_cache.put(cache_key, entry)
+            if published and self.catalog_version is None:
+                # 게시하면 사용 이력이 바뀌므로 게시 후 버전으로도 저장 (다시 실행해도 같은 결과 반환)
+                self.playlist_cache.put(self.playlist_cache_key(), entry)
                 
-                # 다음 에피소드 폴더 생성 및 파일 복사
-                episode_result = self.create_next_episode_folder(playlist)
-                if episode_result:
-                    logging.info(f"다음 에피소드 준비 완료: {episode_result['folder_name']}")
-                    
-                return {
-                    'playlist': playlist,
-                    'content': content,
-                    'chapters': chapters,
-                    'next_episode': episode_result
-                }
+        return result
+        
+    def check_underfilled(self, playlist, target_duration_ms):
+        """사용 가능한 트랙이 부족해 목표 시간을 채우지 못했는지 (목표 시간 맞춤 모드는 허용 오차 포함)"""
+        shortfall_ms = target_duration_ms - sum(track['duration_ms'] for track in playlist)
+        if self.fill_mode == 'exact':
+            shortfall_ms -= self.duration_tolerance_seconds * 1000
+        if shortfall_ms > 0:
+            logging.error(f"목표 재생 시간을 채우지 못했습니다: {str(timedelta(milliseconds=shortfall_ms))} 부족")
+        return shortfall_ms > 0
+        
+    def publish_playlist(self, playlist, target_duration_ms, timestamp=None, chapters=None, content=None):
+        """선택한 플레이리스트로 챕터, 유튜브 콘텐츠, 사용 이력, 다음 에피소드 폴더 생성 (이미 만든 챕터/콘텐츠가 있으면 재사용)"""
+        timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M')
+        
+        # 챕터 생성
+        chapters = chapters or self.generate_chapters(playlist)
+        if chapters:
+            self.save_chapter_files(chapters, timestamp)
+            
+        # Bedrock 프롬프트 생성 및 응답 받기
+        if not content:
+            prompt = self.create_rag_prompt(playlist, target_duration_ms)
+            content = self.get_bedrock_response(prompt)
+        
+        if content:
+            # 결과 저장
+            self.save_results(playlist, content, timestamp)
+            
+            # 다음 에피소드 폴더 생성 및 파일 복사
+            episode_result = self.create_next_episode_folder(playlist)
+            if episode_result:
+                logging.info(f"다음 에피소드 준비 완료: {episode_result['folder_name']}")
                 
+            return {
+                'playlist': playlist,
+                'content': content,
+                'chapters': chapters,
+                'next_episode': episode_result
+            }
+            
         return None
         
+    def similar_track_rows(self, track_ids, k=None):
+        """기준 트랙들과 비슷한 트랙의 트랙 테이블 행 번호 (기준 트랙 포함, k-최근접 이웃 조회)"""
+        if self.similarity_index is None:
+            self.similarity_index = load_similarity_index(self.csv_dir, self.track_catalog)
+        rows = set()
+        for track_id in track_ids:
+            neighbors = self.similarity_index.neighbors(track_id, k or self.seed_neighbors, include_self=True)
+            if not neighbors:
+                logging.warning(f"유사도 인덱스에 없는 기준 트랙입니다: {track_id}")
+            for similar_id, _ in neighbors:
+                row = self.track_catalog.index_of(similar_id)
+                if row is not None:
+                    rows.add(row)
+        logging.info(f"기준 트랙 {len(track_ids)}곡과 비슷한 트랙 {len(rows)}곡")
+        return np.array(sorted(rows), dtype=np.int64)
+        
+    def append_track(self, playlist, track, usage_count, current_duration):
+        """선택한 트랙을 플레이리스트에 추가하고 진행 상황 로깅 (추가 후 재생 시간 반환)"""
+        logging.info(f"트랙 선택: {track['title']} (이전 사용: {usage_count}회, 길이: {str(timedelta(milliseconds=track['duration_ms']))})")
+        
+        playlist.append(track)
+        current_duration += track['duration_ms']
+        
+        # 현재 진행상황 로깅
+        progress_percent = (current_duration / self.target_duration_ms) * 100
+        logging.info(f"현재 진행률: {progress_percent:.1f}% ({str(timedelta(milliseconds=current_duration))} / {str(timedelta(milliseconds=self.target_duration_ms))})")
+        return current_duration
+        
     def load_tracks_from_csv(self):
-        """CSV에서 트랙 정보 로드"""
+        """CSV(또는 카탈로그)에서 트랙 정보 로드 (인덱스는 한 번만 생성)"""
         try:
-            tracks_df = pd.read_csv(os.path.join(self.csv_dir, 'tracks.csv'))
-            self.tracks = tracks_df.to_dict('records')
+            if self.track_catalog is None:
+                self.track_catalog = load_track_catalog(self.csv_dir, self.catalog)
+            self.tracks = self.track_catalog.tracks
             logging.info(f"로드된 트랙 수: {len(self.tracks)}")
             return True
         except Exception as e:
@@ -269,14 +457,15 @@ class PlaylistGenerator:
                 logging.error(f"상세 에러: {str(e)}")
                 return None
                 
-    def save_results(self, playlist, content):
+    def save_results(self, playlist, content, timestamp=None):
         """결과 저장"""
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+            timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M')
             
-            # 플레이리스트 저장
-            pd.DataFrame(playlist).to_csv(
-                os.path.join(self.csv_dir, f'playlist_tracks_{timestamp}.csv'),
+            # 플레이리스트 저장 (트랙 테이블 행 뷰는 딕셔너리로 변환)
+            playlist_file = f'playlist_tracks_{timestamp}.csv'
+            pd.DataFrame([dict(track) for track in playlist]).to_csv(
+                os.path.join(self.csv_dir, playlist_file),
                 index=False,
                 encoding='utf-8-sig'
             )
@@ -285,15 +474,6 @@ class PlaylistGenerator:
             with open(os.path.join(self.csv_dir, f'youtube_content_{timestamp}.txt'), 'w', encoding='utf-8') as f:
                 f.write(content)
                 
-            # 트랙 사용 이력 저장
-            history_file = os.path.join(self.csv_dir, 'track_usage_history.csv')
-            
-            # 기존 사용 이력 로드 또는 새로 생성
-            if os.path.exists(history_file):
-                history_df = pd.read_csv(history_file)
-            else:
-                history_df = pd.DataFrame(columns=['track_id', 'title', 'artist', 'used_at', 'playlist_id'])
-                
             # 새로운 사용 이력 추가
             new_records = []
             for track in playlist:
@@ -305,14 +485,10 @@ class PlaylistGenerator:
                     'playlist_id': timestamp
                 })
                 
-            # 기존 이력과 새로운 이력 합치기
-            updated_history = pd.concat([
-                history_df,
-                pd.DataFrame(new_records)
-            ], ignore_index=True)
-            
-                        # 사용 이력 저장
-            updated_history.to_csv(history_file, index=False, encoding='utf-8-sig')
+            # 사용 이력은 새 기록만 추가하고 해당 트랙의 집계만 갱신
+            self.usage_history.append(new_records)
+            # 이 플레이리스트는 이미 반영했으므로 사용 이력 재생성에서 다시 읽지 않음
+            self.usage_history.mark_ingested([playlist_file])
             
             logging.info("결과 저장 완료")
             logging.info(f"트랙 사용 이력 업데이트: {len(new_records)}곡")
@@ -421,9 +597,19 @@ class PlaylistGenerator:
     def update_episode_records(self, playlist, new_folder_name):
         """에피소드 및 트랙-에피소드 레코드 업데이트"""
         try:
+            if self.catalog is not None:
+                # 카탈로그에는 새 에피소드와 트랙 순서만 한 트랜잭션으로 추가
+                self.catalog.add_episode(
+                    new_folder_name,
+                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    [track['track_id'] for track in playlist]
+                )
+                logging.info(f"에피소드 레코드 업데이트 완료: {new_folder_name}")
+                return True
+                
             # 기존 레코드 로드
-            episodes_df = pd.read_csv(os.path.join(self.csv_dir, 'episodes.csv'))
-            track_episodes_df = pd.read_csv(os.path.join(self.csv_dir, 'track_episodes.csv'))
+            episodes_df = csv_files(self.csv_dir).frame('episodes.csv')
+            track_episodes_df = csv_files(self.csv_dir).frame('track_episodes.csv')
             
             # 새 에피소드 ID
             new_episode_id = max(episodes_df['episode_id']) + 1
@@ -483,10 +669,7 @@ class PlaylistGenerator:
             total_duration = 0
             
             for _, row in playlist_df.iterrows():
-                track_info = next(
-                    (t for t in self.tracks if t['track_id'] == row['track_id']),
-                    None
-                )
+                track_info = self.track_catalog.get(row['track_id'])
                 if track_info:
                     playlist.append(track_info)
                     total_duration += track_info['duration_ms']
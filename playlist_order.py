@@ -0,0 +1,210 @@
+import numpy as np
+
+from playlist_constraints import spacing_violations
+
+# 트랙 간 전환 비용 가중치 (숫자 특성은 플레이리스트 안의 값 범위로 나눈 차이, 장르는 다르면 1)
+TRANSITION_WEIGHTS = {
+    'bpm': 1.0,
+    'drum_intensity': 0.5,
+    'harmonic_complexity': 0.5,
+    'genre': 0.3
+}
+
+# Or-opt에서 한 번에 옮기는 최대 구간 길이
+OR_OPT_MAX_SEGMENT = 3
+
+# 제약이 있을 때 한 단계에서 제약 검사를 해 볼 최대 이동 수 (변화량이 작은 순서)
+CONSTRAINED_MOVES = 32
+
+# 개선량이 이보다 작으면 더 이상 바꾸지 않음 (부동소수점 오차로 인한 무한 반복 방지)
+MIN_IMPROVEMENT = 1e-9
+
+def numeric_feature(tracks, name):
+    """트랙 목록의 숫자 특성 배열 (값이 없으면 다른 트랙의 평균으로 채움)"""
+    values = np.array([track.get(name) for track in tracks], dtype=np.float64)
+    missing = np.isnan(values)
+    if missing.any():
+        values[missing] = 0.0 if missing.all() else values[~missing].mean()
+    return values
+
+def transition_matrix(tracks, start_bpm, end_bpm, weights=TRANSITION_WEIGHTS):
+    """시작/끝 가상 노드를 포함한 (n+2)×(n+2) 전환 비용 행렬
+
+    0번은 start_bpm, 마지막은 end_bpm인 가상 노드이며 가상 노드와의 전환은 BPM 차이만 계산한다.
+    """
+    n = len(tracks)
+    bpm = np.concatenate([[start_bpm], numeric_feature(tracks, 'bpm'), [end_bpm]])
+    bpm_scale = np.ptp(bpm) or 1.0
+    cost = weights['bpm'] * np.abs(bpm[:, None] - bpm[None, :]) / bpm_scale
+
+    inner = np.zeros((n + 2, n + 2))
+    for name in ('drum_intensity', 'harmonic_complexity'):
+        values = numeric_feature(tracks, name)
+        scale = np.ptp(values) or 1.0
+        inner[1:-1, 1:-1] += weights[name] * np.abs(values[:, None] - values[None, :]) / scale
+    genres = np.array([str(track.get('genre')) for track in tracks], dtype=object)
+    inner[1:-1, 1:-1] += weights['genre'] * (genres[:, None] != genres[None, :])
+    return cost + inner
+
+def path_cost(cost, path):
+    path = np.asarray(path)
+    return float(cost[path[:-1], path[1:]].sum())
+
+def nearest_neighbor_path(cost, artists=None, gap=0):
+    """시작 노드에서 가장 가까운 트랙을 차례로 이어 끝 노드까지 가는 초기 경로
+
+    gap이 있으면 최근 gap곡과 같은 아티스트는 다른 후보가 없을 때만 고른다.
+    """
+    size = len(cost)
+    path = [0]
+    visited = np.zeros(size, dtype=bool)
+    visited[0] = visited[-1] = True
+    for _ in range(size - 2):
+        row = np.where(visited, np.inf, cost[path[-1]])
+        if gap:
+            blocked = np.isin(artists, artists[path[-gap:]]) & (artists >= 0)
+            spaced = np.where(blocked, np.inf, row)
+            if np.isfinite(spaced).any():
+                row = spaced
+        node = int(np.argmin(row))
+        visited[node] = True
+        path.append(node)
+    path.append(size - 1)
+    return np.array(path)
+
+def improving_moves(delta, limit):
+    """변화량 행렬에서 비용이 줄어드는 이동을 변화량이 작은 순서로 최대 limit개 [(행, 열, 변화량)]"""
+    flat = delta.ravel()
+    if limit == 1:
+        order = [int(np.argmin(flat))]
+    else:
+        count = min(limit, flat.size)
+        order = np.argpartition(flat, count - 1)[:count]
+        order = order[np.argsort(flat[order], kind='stable')].tolist()
+    moves = []
+    for index in order:
+        if flat[index] >= -MIN_IMPROVEMENT:
+            break
+        row, column = np.unravel_index(index, delta.shape)
+        moves.append((int(row), int(column), float(flat[index])))
+    return moves
+
+def two_opt_step(cost, path, feasible=None):
+    """구간 하나를 뒤집어 비용이 가장 많이 줄어드는 경우 적용 (개선이 없으면 False)
+
+    path[i..j]를 뒤집으면 (path[i-1], path[i]), (path[j], path[j+1]) 두 전환만 바뀌므로
+    모든 (i, j) 쌍의 변화량을 행렬 하나로 계산한다. 양 끝 가상 노드는 움직이지 않는다.
+    feasible이 있으면 변화량이 작은 순서로 CONSTRAINED_MOVES개까지 제약을 만족하는 이동을 찾는다.
+    """
+    before = path[:-2]
+    first = path[1:-1]
+    after = path[2:]
+    # delta[i, j]: path[i+1..j+1]을 뒤집을 때의 비용 변화
+    delta = (
+        cost[before[:, None], first[None, :]]
+        + cost[first[:, None], after[None, :]]
+        - cost[before, first][:, None]
+        - cost[first, after][None, :]
+    )
+    delta = np.triu(delta, 1)
+    for i, j, _ in improving_moves(delta, 1 if feasible is None else CONSTRAINED_MOVES):
+        candidate = path.copy()
+        candidate[i + 1:j + 2] = candidate[i + 1:j + 2][::-1]
+        if feasible is None or feasible(candidate):
+            path[:] = candidate
+            return True
+    return False
+
+def moved_path(path, start, length, k, reverse):
+    """path[start:start+length] 구간을 전환 (path[k], path[k+1]) 사이로 옮긴 새 경로"""
+    segment = path[start:start + length]
+    if reverse:
+        segment = segment[::-1]
+    rest = np.concatenate([path[:start], path[start + length:]])
+    # 구간을 뺀 경로에서의 삽입 위치 (구간 뒤쪽이면 구간 길이만큼 앞당겨짐)
+    insert_at = k + 1 if k < start else k + 1 - length
+    return np.concatenate([rest[:insert_at], segment, rest[insert_at:]])
+
+def or_opt_step(cost, path, feasible=None):
+    """길이 1~OR_OPT_MAX_SEGMENT 구간을 다른 위치로 옮겨(뒤집기 포함) 비용이 가장 많이 줄어드는 경우 적용"""
+    size = len(path)
+    limit = 1 if feasible is None else CONSTRAINED_MOVES
+    moves = []
+    for length in range(1, min(OR_OPT_MAX_SEGMENT, size - 2) + 1):
+        # 구간 path[i..i+length-1] (i는 1부터, 끝 가상 노드 제외)
+        starts = np.arange(1, size - length)
+        heads = path[starts]
+        tails = path[starts + length - 1]
+        prev_nodes = path[starts - 1]
+        next_nodes = path[starts + length]
+        removal = cost[prev_nodes, heads] + cost[tails, next_nodes] - cost[prev_nodes, next_nodes]
+
+        # 삽입 위치: 전환 (path[k], path[k+1]) 사이
+        xs = path[:-1]
+        ys = path[1:]
+        base = cost[xs, ys]
+        forward = cost[xs[None, :], heads[:, None]] + cost[tails[:, None], ys[None, :]] - base[None, :]
+        backward = cost[xs[None, :], tails[:, None]] + cost[heads[:, None], ys[None, :]] - base[None, :]
+        # 구간과 맞닿은 위치(k가 i-1 ~ i+length-1)는 제외
+        ks = np.arange(size - 1)
+        invalid = (ks[None, :] >= starts[:, None] - 1) & (ks[None, :] <= starts[:, None] + length - 1)
+        for reverse, insertion in ((False, forward), (True, backward)):
+            delta = np.where(invalid, np.inf, insertion) - removal[:, None]
+            moves.extend(
+                (change, (int(starts[i]), length, k, reverse))
+                for i, k, change in improving_moves(delta, limit)
+            )
+
+    # 변화량이 같으면 짧은 구간, 뒤집지 않은 이동 순서
+    moves.sort(key=lambda move: move[0])
+    for _, move in moves[:limit]:
+        candidate = moved_path(path, *move)
+        if feasible is None or feasible(candidate):
+            path[:] = candidate
+            return True
+    return False
+
+def optimize_path(cost, max_rounds=None, artists=None, gap=0, initial=None):
+    """최근접 이웃 초기 경로를 2-opt / Or-opt로 더 이상 개선되지 않을 때까지 다듬음
+
+    gap이 있으면 같은 아티스트 간격 위반 수(spacing_violations)가 늘어나는 이동은 하지 않는다.
+    initial(예: 제약을 지키며 고른 선택 순서)의 위반이 더 적으면 그 순서에서 시작한다.
+    """
+    path = nearest_neighbor_path(cost, artists, gap)
+    if len(path) <= 3:
+        return path
+    feasible = None
+    if gap:
+        if initial is not None and spacing_violations(artists[initial], gap) < spacing_violations(artists[path], gap):
+            path = np.array(initial)
+        violations = spacing_violations(artists[path], gap)
+
+        def feasible(candidate):
+            nonlocal violations
+            count = spacing_violations(artists[candidate], gap)
+            if count > violations:
+                return False
+            violations = count
+            return True
+
+    max_rounds = max_rounds or 10 * len(path)
+    for _ in range(max_rounds):
+        if not two_opt_step(cost, path, feasible) and not or_opt_step(cost, path, feasible):
+            break
+    return path
+
+def order_tracks(tracks, start_bpm, end_bpm, weights=TRANSITION_WEIGHTS, artist_gap=0):
+    """start_bpm에서 end_bpm으로 BPM, 드럼 강도, 화성 복잡도, 장르가 부드럽게 이어지도록 트랙 순서 정렬
+
+    artist_gap이 있으면 같은 아티스트 트랙 사이 간격 위반이 입력 순서보다 늘어나지 않게 정렬한다.
+    """
+    tracks = list(tracks)
+    if len(tracks) < 2:
+        return tracks
+    cost = transition_matrix(tracks, start_bpm, end_bpm, weights)
+    artists = None
+    if artist_gap:
+        codes = {}
+        artists = np.array([-1] + [codes.setdefault(track.get('artist'), len(codes)) for track in tracks] + [-1])
+    path = optimize_path(cost, artists=artists, gap=artist_gap, initial=np.arange(len(tracks) + 2))
+    return [tracks[node - 1] for node in path[1:-1]]
@@ -0,0 +1,163 @@
+import numpy as np
+
+# 이 횟수 이상 사용된 트랙은 플레이리스트 후보에서 제외
+MAX_TRACK_USES = 3
+
+# 목표 시간 맞춤 선택의 기본 허용 오차 (초)
+DURATION_TOLERANCE_SECONDS = 10
+
+# 목표 시간 맞춤 선택에 쓰는 최대 후보 수 (사용 횟수 순 앞쪽부터, 테이블 크기 제한)
+EXACT_FILL_MAX_CANDIDATES = 5000
+
+def usage_bucket_order(usage, rng=None):
+    """사용 횟수별 버킷(0회, 1회, 2회 ...)을 차례로 이어 붙인 후보 순서
+
+    후보가 이미 BPM 순이면 각 버킷 안에서도 BPM 순이 유지되며, MAX_TRACK_USES 이상
+    사용된 트랙은 포함하지 않는다. rng(numpy Generator)를 주면 버킷 안의 순서를 섞는다.
+    """
+    usage = np.asarray(usage)
+    buckets = [np.flatnonzero(usage == count) for count in range(MAX_TRACK_USES)]
+    if rng is not None:
+        buckets = [rng.permutation(bucket) for bucket in buckets]
+    return np.concatenate(buckets)
+
+class DurationIndex:
+    """후보 위치별 재생 시간의 최솟값 세그먼트 트리
+
+    "남은 시간 이하인 첫 번째 후보"와 "가장 짧은 후보 중 첫 번째"를 모두 O(log n)에 찾고,
+    고른 후보는 무한대로 바꿔 다음 조회에서 빠지게 한다.
+    """
+    def __init__(self, durations):
+        durations = np.asarray(durations, dtype=np.float64)
+        # 재생 시간이 없는 후보는 고를 수 없으므로 처음부터 제외
+        durations = np.where(np.isnan(durations), np.inf, durations)
+        self.size = 1
+        while self.size < len(durations):
+            self.size *= 2
+        tree = np.full(2 * self.size, np.inf)
+        tree[self.size:self.size + len(durations)] = durations
+        # 아래 단계부터 부모 노드를 한 번에 계산
+        level = self.size
+        while level > 1:
+            parents = slice(level // 2, level)
+            tree[parents] = np.minimum(tree[level:2 * level:2], tree[level + 1:2 * level:2])
+            level //= 2
+        self.tree = tree.tolist()
+        self.remaining = int(np.isfinite(durations).sum())
+
+    def __len__(self):
+        return self.remaining
+
+    def shortest(self):
+        return self.tree[1]
+
+    def first_at_most(self, limit):
+        """재생 시간이 limit 이하인 가장 앞 후보 위치 (없으면 -1)"""
+        tree = self.tree
+        if tree[1] > limit:
+            return -1
+        node = 1
+        while node < self.size:
+            node = 2 * node if tree[2 * node] <= limit else 2 * node + 1
+        return node - self.size
+
+    def contains(self, position):
+        return self.tree[position + self.size] != float('inf')
+
+    def add(self, position, duration):
+        """비어 있는 위치에 후보 추가 (재생 시간이 없으면 추가하지 않음)"""
+        if np.isnan(duration):
+            return
+        self._update(position, float(duration))
+        self.remaining += 1
+
+    def remove(self, position):
+        self._update(position, float('inf'))
+        self.remaining -= 1
+
+    def _update(self, position, value):
+        tree = self.tree
+        node = position + self.size
+        tree[node] = value
+        node //= 2
+        while node:
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+class TrackSelector:
+    """정렬된 후보에서 남은 시간에 맞춰 트랙을 하나씩 고르는 선택 엔진
+
+    남은 시간 이하인 후보 중 가장 앞의 것을, 없으면 가장 짧은 후보 중 가장 앞의 것을
+    고른다. 매번 후보 목록을 다시 만들던 방식과 같은 결과를 선택당 O(log n)에 낸다.
+    """
+    def __init__(self, durations):
+        self.index = DurationIndex(durations)
+
+    def __len__(self):
+        return len(self.index)
+
+    def pick(self, remaining_ms):
+        """고른 후보 위치 (남은 후보가 없으면 None)"""
+        if not len(self.index):
+            return None
+        position = self.index.first_at_most(remaining_ms)
+        if position < 0:
+            # 남은 시간에 맞는 트랙이 없으면 가장 짧은 트랙 선택
+            position = self.index.first_at_most(self.index.shortest())
+        self.index.remove(position)
+        return position
+
+def exact_fill(durations, usage, target_ms, tolerance_ms=DURATION_TOLERANCE_SECONDS * 1000):
+    """재생 시간 합이 목표 시간 ± 허용 오차 안에 들도록 고른 후보 위치 (없으면 None)
+
+    재생 시간을 초 단위로 반올림한 0/1 부분집합 합 문제를 동적 계획법으로 푼다.
+    합이 s초가 되는 조합 중 사용 횟수 합이 가장 작은 것을 기록하고, 허용 범위 안에서
+    사용 횟수 합이 가장 작은(같으면 목표에 가장 가까운) 합을 고른다.
+    사용 횟수 합이 같은 조합 중에는 반올림 오차 합이 작은 것을 남기고, 그래도 실제 ms 합이
+    허용 범위를 벗어나는 조합은 건너뛰고 다음 후보 합을 확인한다.
+    테이블 크기는 후보 수 × 목표 초 수라서 앞쪽 EXACT_FILL_MAX_CANDIDATES개 후보만 사용하며,
+    위치는 후보 순서대로 반환한다.
+    """
+    seconds = np.rint(np.asarray(durations, dtype=np.float64)[:EXACT_FILL_MAX_CANDIDATES] / 1000)
+    usage = np.asarray(usage, dtype=np.float64)[:EXACT_FILL_MAX_CANDIDATES]
+    low = max(0, int(np.ceil((target_ms - tolerance_ms) / 1000)))
+    high = int((target_ms + tolerance_ms) // 1000)
+    if high < low or high <= 0:
+        return None
+
+    milliseconds = np.asarray(durations, dtype=np.float64)[:EXACT_FILL_MAX_CANDIDATES]
+    rounding = milliseconds - seconds * 1000
+
+    # cost[s]: 합이 s초인 조합의 최소 사용 횟수 합, error[s]: 그 조합의 반올림 오차 합(ms),
+    # took[i, s]: 후보 i를 넣어 cost[s]가 바뀌었는지
+    cost = np.full(high + 1, np.inf)
+    cost[0] = 0
+    error = np.zeros(high + 1)
+    took = np.zeros((len(seconds), high + 1), dtype=bool)
+    for i, (length, uses) in enumerate(zip(seconds, usage)):
+        if not 0 < length <= high:
+            continue
+        length = int(length)
+        # 이전 단계 값으로 계산한 뒤 한 번에 반영 (같은 후보를 두 번 쓰지 않음)
+        candidate = cost[:-length] + uses
+        candidate_error = error[:-length] + rounding[i]
+        # 사용 횟수 합이 같으면 반올림 오차가 작은 조합을 남김
+        better = (candidate < cost[length:]) | (
+            (candidate == cost[length:]) & (np.abs(candidate_error) < np.abs(error[length:]))
+        )
+        cost[length:][better] = candidate[better]
+        error[length:][better] = candidate_error[better]
+        took[i, length:] = better
+
+    window = np.arange(low, high + 1)
+    reachable = window[np.isfinite(cost[low:high + 1])]
+    # 트랙마다 반올림 오차가 최대 0.5초씩 쌓이므로 실제 ms 합이 허용 범위 안인 조합만 사용
+    for total in sorted(reachable.tolist(), key=lambda s: (cost[s], abs(s * 1000 - target_ms))):
+        positions = []
+        for i in range(len(seconds) - 1, -1, -1):
+            if took[i, total]:
+                positions.append(i)
+                total -= int(seconds[i])
+        if abs(milliseconds[positions].sum() - target_ms) <= tolerance_ms:
+            return positions[::-1]
+    return None
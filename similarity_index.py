@@ -0,0 +1,230 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+SIMILARITY_INDEX_FILE = 'similarity_index.npz'
+
+# 유사도 계산에 쓰는 트랙 특성 (tracks.csv 컬럼, 추가하면 다음 로드 때 인덱스를 다시 만듦)
+SIMILARITY_FEATURES = ['bpm', 'drum_intensity', 'harmonic_complexity']
+
+# 추가/변경된 트랙이 트리 크기의 이 비율을 넘으면 트리를 다시 만듦
+REBUILD_FRACTION = 0.1
+
+# 트리가 이보다 크면 이 개수까지는 다시 만들지 않고 추가 목록에 둠
+MIN_PENDING = 256
+
+def feature_arrays(tracks, features=SIMILARITY_FEATURES):
+    """트랙 목록(딕셔너리 목록 또는 데이터프레임)의 track_id 배열과 특성 행렬 (특성이 없는 트랙 제외)"""
+    df = tracks if isinstance(tracks, pd.DataFrame) else pd.DataFrame(list(tracks))
+    if df.empty or 'track_id' not in df.columns:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(features)))
+    points = np.column_stack([
+        pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64) if name in df.columns
+        else np.full(len(df), np.nan)
+        for name in features
+    ])
+    valid = np.isfinite(points).all(axis=1)
+    # 메타데이터만 등록된 트랙과 분석에 실패한 트랙(BPM 0)은 특성 값이 없으므로 제외
+    if 'analysis_profile' in df.columns:
+        valid &= (df['analysis_profile'] != 'metadata').to_numpy()
+    if 'bpm' in features:
+        valid &= points[:, features.index('bpm')] > 0
+    return df['track_id'].to_numpy(dtype=np.int64)[valid], points[valid]
+
+class SimilarityIndex:
+    """트랙 특성(정규화한 BPM, 드럼 강도, 화성 복잡도) k-최근접 이웃 인덱스
+
+    전체 트랙으로 만든 KD 트리(cKDTree)와, 이후 추가/변경된 트랙의 작은 추가 목록으로
+    구성한다. 변경된 트랙의 트리 안 기존 값은 삭제 표시만 하고, 조회는 트리 결과와
+    추가 목록 전체 비교 결과를 합친다. 추가 목록이 트리 크기의 REBUILD_FRACTION을 넘으면
+    트리를 다시 만들며, 정규화 기준(평균, 표준편차)도 이때 다시 계산한다.
+    """
+    def __init__(self, features, mean, std, track_ids, points, pending_ids=None, pending_points=None):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.track_ids = np.asarray(track_ids, dtype=np.int64)
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, len(self.features))
+        self.tree = cKDTree(self.normalize(self.points))
+        self.rows = {track_id: row for row, track_id in enumerate(self.track_ids.tolist())}
+        self.deleted = set()
+        # 트리 행별 삭제 여부 (조회 결과를 배열 연산으로 거르기 위해 deleted와 함께 유지)
+        self.alive = np.ones(len(self.track_ids), dtype=bool)
+        self.pending = {}
+        self._pending_matrix = None
+        if pending_ids is not None:
+            self.upsert_arrays(pending_ids, pending_points)
+
+    @classmethod
+    def build(cls, track_ids, points, features=SIMILARITY_FEATURES):
+        mean = points.mean(axis=0) if len(points) else np.zeros(len(features))
+        std = points.std(axis=0) if len(points) else np.ones(len(features))
+        std[std == 0] = 1.0
+        return cls(features, mean, std, track_ids, points)
+
+    @classmethod
+    def from_tracks(cls, tracks, features=SIMILARITY_FEATURES):
+        """트랙 목록(딕셔너리 목록 또는 데이터프레임)으로 새 인덱스 생성"""
+        return cls.build(*feature_arrays(tracks, features), features)
+
+    @classmethod
+    def load(cls, path):
+        """저장된 인덱스 로드 (파일이 없거나 읽을 수 없으면 None)"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(
+                    [str(name) for name in data['features']],
+                    data['mean'], data['std'],
+                    data['track_ids'], data['points'],
+                    data['pending_ids'], data['pending_points']
+                )
+        except Exception as e:
+            logging.warning(f"유사도 인덱스 로드 실패, 다시 만듭니다: {str(e)}")
+            return None
+
+    def save(self, path):
+        """인덱스 저장 (트리 밖으로 빠진 트랙은 저장하지 않고, 임시 파일에 쓴 뒤 교체)"""
+        keep = self.alive
+        pending_ids = np.array(list(self.pending), dtype=np.int64)
+        pending_points = np.array(list(self.pending.values()), dtype=np.float64).reshape(-1, len(self.features))
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(
+                f,
+                features=np.array(self.features),
+                mean=self.mean,
+                std=self.std,
+                track_ids=self.track_ids[keep],
+                points=self.points[keep],
+                pending_ids=pending_ids,
+                pending_points=pending_points
+            )
+        os.replace(temp_path, path)
+
+    def __len__(self):
+        return len(self.track_ids) - len(self.deleted) + len(self.pending)
+
+    def normalize(self, points):
+        return (points - self.mean) / self.std
+
+    def upsert(self, tracks):
+        """추가/변경된 트랙 반영 (특성이 없는 트랙은 인덱스에서 제외)"""
+        tracks = list(tracks)
+        track_ids, points = feature_arrays(tracks, self.features)
+        self.remove(track['track_id'] for track in tracks)
+        self.upsert_arrays(track_ids, points)
+
+    def upsert_arrays(self, track_ids, points):
+        for track_id, point in zip(np.asarray(track_ids).tolist(), np.asarray(points, dtype=np.float64)):
+            if track_id in self.rows:
+                self.deleted.add(track_id)
+                self.alive[self.rows[track_id]] = False
+            self.pending[track_id] = point
+        self._pending_matrix = None
+        # 작은 트리는 추가 목록이 트리보다 커지면 바로 다시 만듦 (정규화 기준이 너무 적은 트랙에 맞춰지지 않도록)
+        limit = min(len(self.track_ids), max(MIN_PENDING, REBUILD_FRACTION * len(self.track_ids)))
+        if len(self.pending) + len(self.deleted) > limit:
+            self.rebuild()
+
+    def remove(self, track_ids):
+        for track_id in track_ids:
+            if track_id in self.rows:
+                self.deleted.add(track_id)
+                self.alive[self.rows[track_id]] = False
+            self.pending.pop(track_id, None)
+        self._pending_matrix = None
+
+    def rebuild(self):
+        """삭제 표시와 추가 목록을 합쳐 트리와 정규화 기준을 다시 만듦"""
+        keep = self.alive
+        track_ids = np.concatenate([self.track_ids[keep], np.array(list(self.pending), dtype=np.int64)])
+        points = np.vstack([self.points[keep], np.array(list(self.pending.values())).reshape(-1, len(self.features))])
+        rebuilt = SimilarityIndex.build(track_ids, points, self.features)
+        self.__dict__.update(rebuilt.__dict__)
+        logging.info(f"유사도 인덱스 재생성: 트랙 {len(self.track_ids)}개")
+
+    def vector(self, track_id):
+        """인덱스에 있는 트랙의 특성 값 (없으면 None)"""
+        if track_id in self.pending:
+            return self.pending[track_id]
+        row = self.rows.get(track_id)
+        if row is None or track_id in self.deleted:
+            return None
+        return self.points[row]
+
+    def query(self, point, k=10):
+        """특성 값에 가장 가까운 트랙 k개 [(track_id, 거리)] (거리는 정규화한 특성 공간 기준)"""
+        target = self.normalize(np.asarray(point, dtype=np.float64))
+        results = []
+        size = len(self.track_ids)
+        count = min(size, k)
+        while count:
+            distances, rows = self.tree.query(target, k=count)
+            distances = np.atleast_1d(distances)
+            rows = np.atleast_1d(rows)
+            valid = self.alive[rows]
+            # 삭제 표시된 트랙 때문에 k개가 안 되면 더 넓게 다시 조회
+            if valid.sum() >= k or count == size:
+                results = list(zip(self.track_ids[rows[valid]].tolist(), distances[valid].tolist()))
+                break
+            count = min(size, 2 * count + len(self.deleted))
+        if self.pending:
+            if self._pending_matrix is None:
+                self._pending_ids = list(self.pending)
+                self._pending_matrix = self.normalize(np.array(list(self.pending.values())))
+            distances = np.sqrt(((self._pending_matrix - target) ** 2).sum(axis=1))
+            nearest = np.argsort(distances, kind='stable')[:k]
+            results.extend((self._pending_ids[i], distances[i].item()) for i in nearest.tolist())
+            results.sort(key=lambda item: item[1])
+        return results[:k]
+
+    def neighbors(self, track_id, k=10, include_self=False):
+        """track_id와 비슷한 트랙 k개 [(track_id, 거리)] (트랙이 인덱스에 없으면 빈 목록)"""
+        point = self.vector(track_id)
+        if point is None:
+            return []
+        results = self.query(point, k + (0 if include_self else 1))
+        if not include_self:
+            results = [item for item in results if item[0] != track_id]
+        return results[:k]
+
+def similarity_index_path(csv_dir):
+    return os.path.join(csv_dir, SIMILARITY_INDEX_FILE)
+
+def load_similarity_index(csv_dir, track_catalog):
+    """저장된 유사도 인덱스 로드 (없거나 트랙 카탈로그와 맞지 않으면 다시 만들어 저장)"""
+    path = similarity_index_path(csv_dir)
+    index = SimilarityIndex.load(path)
+    table = track_catalog.table
+    columns = {name: table.values(name) for name in ['track_id', 'analysis_profile'] + SIMILARITY_FEATURES if name in table.columns}
+    track_ids, points = feature_arrays(pd.DataFrame(columns))
+    if index is not None and index.features == SIMILARITY_FEATURES and len(index) == len(track_ids):
+        return index
+    index = SimilarityIndex.build(track_ids, points)
+    try:
+        index.save(path)
+    except OSError as e:
+        logging.warning(f"유사도 인덱스 저장 실패: {str(e)}")
+    logging.info(f"유사도 인덱스 생성: 트랙 {len(index)}개")
+    return index
+
+def update_similarity_index(csv_dir, tracks, changed_tracks):
+    """분석 결과 저장 후 유사도 인덱스 갱신 (인덱스가 없으면 전체 트랙으로 생성)"""
+    path = similarity_index_path(csv_dir)
+    try:
+        index = SimilarityIndex.load(path)
+        if index is None or index.features != SIMILARITY_FEATURES:
+            index = SimilarityIndex.from_tracks(tracks)
+        elif changed_tracks:
+            index.upsert(changed_tracks)
+        else:
+            return index
+        index.save(path)
+        return index
+    except Exception as e:
+        logging.warning(f"유사도 인덱스 갱신 실패: {str(e)}")
+        return None
@@ -0,0 +1,132 @@
+import numpy as np
+import librosa
+from numpy.lib.stride_tricks import sliding_window_view
+
+from metrics import NULL_METRICS
+
+# 공유 STFT 엔진과 기존 경로(beat_track + effects.hpss + chroma_stft)의 허용 오차
+# - BPM: 동일 (beat_track과 같은 로그 멜 온셋 포락선(대역 중앙값, aggregate=np.median)과 같은 템포 추정기를 사용)
+# - drum_intensity: 상대 오차 5% 이내 (역STFT 대신 Parseval 정리로 에너지 계산)
+# - harmonic_complexity: 절대 오차 0.005 이내 (재합성한 하모닉 신호 대신 마스킹된 스펙트로그램 사용)
+# - genre: drum_intensity가 판별 기준(0.1)의 ±5% 안에 있는 트랙을 제외하면 동일
+ENGINE_TOLERANCE = {
+    'bpm': 0.0,
+    'drum_intensity_rel': 0.05,
+    'harmonic_complexity_abs': 0.005
+}
+
+# HPSS 중앙값 필터 길이 (프레임 수, librosa.decompose.hpss 기본값)
+HPSS_KERNEL_SIZE = 31
+
+# 중앙값 필터를 나눠 처리할 블록 크기 (슬라이딩 윈도우 원소 수 기준, CPU 캐시에 들어가도록)
+MEDIAN_BLOCK_ELEMENTS = 1 << 16
+
+def median_filter_last_axis(S, kernel_size):
+    """마지막 축 방향 중앙값 필터 (scipy.ndimage.median_filter(mode='reflect')와 같은 결과)
+
+    슬라이딩 윈도우 뷰에 np.partition을 블록 단위로 적용하여
+    scipy의 범용 2차원 중앙값 필터보다 훨씬 빠르게 계산한다.
+    """
+    half = kernel_size // 2
+    shape = S.shape
+    rows = np.ascontiguousarray(S).reshape(-1, shape[-1])
+    padded = np.pad(rows, ((0, 0), (half, half)), mode='symmetric')
+    out = np.empty_like(rows)
+
+    # 윈도우 뷰는 한 번만 만들고 블록마다 슬라이스 (블록별 뷰 생성 비용 제거)
+    windows = sliding_window_view(padded, kernel_size, axis=1)
+    block = max(1, MEDIAN_BLOCK_ELEMENTS // (rows.shape[1] * kernel_size))
+    for start in range(0, rows.shape[0], block):
+        out[start:start + block] = np.partition(windows[start:start + block], half, axis=-1)[..., half]
+
+    return out.reshape(shape)
+
+def hpss_magnitude(S, kernel_size=HPSS_KERNEL_SIZE, power=2.0):
+    """크기 스펙트로그램의 하모닉/타악기 분리 (librosa.decompose.hpss와 같은 소프트 마스크)"""
+    harm = median_filter_last_axis(S, kernel_size)
+    perc = np.swapaxes(median_filter_last_axis(np.swapaxes(S, -1, -2), kernel_size), -1, -2)
+
+    mask_harm = librosa.util.softmask(harm, perc, power=power, split_zeros=True)
+    mask_perc = librosa.util.softmask(perc, harm, power=power, split_zeros=True)
+    return S * mask_harm, S * mask_perc
+
+def spectral_rms(S, n_fft, hop_length, n_samples):
+    """Parseval 정리로 크기 스펙트로그램에서 시간 영역 RMS 추정 (역STFT 불필요)
+
+    여러 트랙을 쌓은 배열이면 트랙별 RMS 배열을 반환한다.
+    """
+    power = S.astype(np.float64)**2
+    # 단측 스펙트럼을 양측 에너지로 변환 (DC와 나이퀴스트 성분은 한 번만)
+    energy = (2 * power.sum(axis=(-2, -1))
+              - power[..., 0, :].sum(axis=-1)
+              - power[..., -1, :].sum(axis=-1))
+    window_power = np.sum(librosa.filters.get_window('hann', n_fft, fftbins=True)**2)
+    total = energy * hop_length / (n_fft * window_power)
+    return np.sqrt(total / np.maximum(n_samples, 1))
+
+def onset_envelope(S, sr, n_fft, hop_length):
+    """beat_track 내부와 같은 로그 멜 스펙트로그램 기반 온셋 강도 (주파수 대역은 중앙값으로 합침)"""
+    mel = librosa.feature.melspectrogram(S=S**2, sr=sr, n_fft=n_fft, hop_length=hop_length)
+    return librosa.onset.onset_strength(S=librosa.power_to_db(mel), sr=sr, hop_length=hop_length, aggregate=np.median)
+
+def compute_spectral_features(y, sr, n_fft=2048, hop_length=512, kernel_size=HPSS_KERNEL_SIZE, metrics=NULL_METRICS):
+    """크기 스펙트로그램 한 번으로 온셋/템포, 타악기 에너지, 크로마 계산
+
+    기존 경로는 STFT를 네 번, 역STFT를 두 번 수행한다. 여기서는 STFT 한 번의
+    크기 스펙트로그램을 공유하고 HPSS 마스크를 스펙트로그램에 직접 적용하여
+    음원을 다시 만들지 않는다.
+    """
+    with metrics.stage('stft'):
+        S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
+
+    with metrics.stage('beat'):
+        onset_env = onset_envelope(S, sr, n_fft, hop_length)
+        tempo = float(librosa.feature.tempo(onset_envelope=onset_env, sr=sr, hop_length=hop_length)[0])
+
+    with metrics.stage('hpss'):
+        S_harmonic, S_percussive = hpss_magnitude(S, kernel_size)
+        percussive_rms = float(spectral_rms(S_percussive, n_fft, hop_length, len(y)))
+
+    with metrics.stage('chroma'):
+        chroma = librosa.feature.chroma_stft(S=S_harmonic**2, sr=sr, n_fft=n_fft, hop_length=hop_length)
+        chroma_complexity = float(np.std(chroma))
+
+    return {
+        'tempo': tempo,
+        'percussive_rms': percussive_rms,
+        'chroma_complexity': chroma_complexity
+    }
+
+def compute_spectral_features_batch(Y, sr, n_fft=2048, hop_length=512, kernel_size=HPSS_KERNEL_SIZE, metrics=NULL_METRICS):
+    """같은 길이로 자른 여러 트랙(트랙 수 × 샘플 수)의 특성을 한 번에 계산
+
+    STFT, 멜 스펙트로그램, 온셋 강도, 템포, HPSS, RMS를 배치 전체에 대해 벡터화된
+    호출 한 번씩으로 처리하고 트랙별 결과로 나눈다. 트랙마다 따로 정해야 하는 값
+    (dB 클리핑 기준, 크로마 튜닝)은 트랙별로 계산하므로 결과는 compute_spectral_features와 같다.
+    """
+    Y = np.asarray(Y)
+    with metrics.stage('stft'):
+        S = np.abs(librosa.stft(Y, n_fft=n_fft, hop_length=hop_length))
+
+    with metrics.stage('beat'):
+        # top_db=80 클리핑은 트랙별 최대 dB 기준 (배치 전체 최대값을 쓰면 조용한 트랙의 온셋이 달라짐)
+        mel = librosa.feature.melspectrogram(S=S**2, sr=sr, n_fft=n_fft, hop_length=hop_length)
+        mel_db = librosa.power_to_db(mel, top_db=None)
+        np.maximum(mel_db, mel_db.max(axis=(-2, -1), keepdims=True) - 80.0, out=mel_db)
+        onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr, hop_length=hop_length, aggregate=np.median)
+        tempos = librosa.feature.tempo(onset_envelope=onset_env, sr=sr, hop_length=hop_length)[..., 0]
+
+    with metrics.stage('hpss'):
+        S_harmonic, S_percussive = hpss_magnitude(S, kernel_size)
+        percussive_rms = spectral_rms(S_percussive, n_fft, hop_length, Y.shape[-1])
+
+    results = []
+    with metrics.stage('chroma'):
+        for i in range(Y.shape[0]):
+            chroma = librosa.feature.chroma_stft(S=S_harmonic[i]**2, sr=sr, n_fft=n_fft, hop_length=hop_length)
+            results.append({
+                'tempo': float(tempos[i]),
+                'percussive_rms': float(percussive_rms[i]),
+                'chroma_complexity': float(np.std(chroma))
+            })
+    return results
@@ -0,0 +1,213 @@
+import numpy as np
+import librosa
+import soundfile as sf
+
+from spectral import hpss_magnitude
+
+# 스트리밍 분석 블록 크기 (STFT 프레임 수, 22050Hz 기준 약 6초)
+STREAM_BLOCK_FRAMES = 256
+
+# 템포 추정 자기상관 창 길이 (librosa.feature.tempo 기본값과 같은 8초)
+TEMPO_AC_SECONDS = 8.0
+
+# HPSS 중앙값 필터 크기 (블록 경계에서 필요한 앞뒤 문맥 = kernel // 2 프레임)
+HPSS_KERNEL = 31
+
+def stream_params(sr, target_sr=22050):
+    """원본 샘플레이트에 맞춘 STFT 크기 (프레임 시간 간격을 22050Hz 분석과 비슷하게 유지)"""
+    scale = max(1, int(round(sr / target_sr)))
+    return 2048 * scale, 512 * scale
+
+class StreamingFeatureAccumulator:
+    """블록 단위로 들어오는 오디오에서 템포/온셋, RMS, 크로마 통계를 누적
+
+    누적 상태는 곡 길이와 무관한 고정 크기 (템포그램 합, 크로마 합계, 이전 블록의
+    몇 프레임)만 유지하므로 1시간짜리 믹스도 일정한 메모리로 분석할 수 있다.
+    """
+    def __init__(self, sr, n_fft, hop_length):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+        window = librosa.filters.get_window('hann', n_fft, fftbins=True)
+        self.energy_scale = hop_length / (n_fft * np.sum(window**2))
+
+        # 온셋 포락선 (직전 로그 멜 프레임과 전체 최대 dB)
+        self._prev_mel_db = None
+        self._db_max = -np.inf
+
+        # 자기상관 템포그램 (창 중앙 정렬을 위해 앞쪽에 win // 2개의 0을 채움)
+        self.tempo_win = int(librosa.time_to_frames(TEMPO_AC_SECONDS, sr=sr, hop_length=hop_length))
+        self._odf_buffer = np.zeros(self.tempo_win // 2, dtype=np.float64)
+        self._tempogram_sum = np.zeros(self.tempo_win, dtype=np.float64)
+        self._tempogram_frames = 0
+
+        # HPSS는 앞뒤 문맥을 붙여 한 블록씩 늦게 처리
+        self._hpss_context = None
+        self._hpss_pending = None
+        self._tuning = None
+
+        # 누적 통계
+        self.frames = 0
+        self.samples = 0
+        self._energy = 0.0
+        self._percussive_energy = 0.0
+        self._onset_sum = 0.0
+        self._onset_sumsq = 0.0
+        self._onset_count = 0
+        self._chroma_sum = np.zeros(12, dtype=np.float64)
+        self._chroma_sumsq = 0.0
+        self._chroma_frames = 0
+
+    def _frame_energy(self, S):
+        """단측 크기 스펙트로그램의 양측 에너지 합"""
+        power = S.astype(np.float64)**2
+        return 2 * power.sum() - power[0].sum() - power[-1].sum()
+
+    def update(self, y_block):
+        """오디오 블록 하나 처리 (librosa.stream 블록과 같이 프레임이 이어지는 블록)"""
+        # 연속된 블록은 n_fft - hop_length 샘플씩 겹침
+        overlap = self.n_fft - self.hop_length if self.samples else 0
+        self.samples += max(len(y_block) - overlap, 0)
+        if len(y_block) < self.n_fft:
+            return
+
+        S = np.abs(librosa.stft(y_block, n_fft=self.n_fft, hop_length=self.hop_length, center=False))
+        if S.shape[-1] == 0:
+            return
+
+        self.frames += S.shape[-1]
+        self._energy += self._frame_energy(S)
+        self._update_onsets(S)
+        self._update_hpss(S)
+
+    def _update_onsets(self, S):
+        mel_db = librosa.power_to_db(self.mel_basis @ (S**2), top_db=None)
+        # top_db=80 클리핑은 지금까지의 최대 dB 기준으로 적용
+        self._db_max = max(self._db_max, float(mel_db.max()))
+        np.maximum(mel_db, self._db_max - 80.0, out=mel_db)
+
+        if self._prev_mel_db is not None:
+            mel_db_ext = np.concatenate([self._prev_mel_db, mel_db], axis=1)
+        else:
+            mel_db_ext = np.concatenate([mel_db[:, :1], mel_db], axis=1)
+        onset = np.maximum(0.0, np.diff(mel_db_ext, axis=1)).mean(axis=0)
+        self._prev_mel_db = mel_db[:, -1:]
+
+        self._onset_sum += float(onset.sum())
+        self._onset_sumsq += float(np.sum(onset.astype(np.float64)**2))
+        self._onset_count += len(onset)
+        self._update_tempogram(onset)
+
+    def _update_tempogram(self, onset):
+        buffer = np.concatenate([self._odf_buffer, onset])
+        if len(buffer) >= self.tempo_win:
+            self._accumulate_tempogram(buffer)
+            buffer = buffer[-(self.tempo_win - 1):]
+        self._odf_buffer = buffer
+
+    def _accumulate_tempogram(self, buffer):
+        frames = librosa.util.frame(buffer, frame_length=self.tempo_win, hop_length=1)
+        window = librosa.filters.get_window('hann', self.tempo_win, fftbins=True)[:, np.newaxis]
+        tempogram = librosa.util.normalize(
+            librosa.autocorrelate(frames * window, axis=0), norm=np.inf, axis=0
+        )
+        self._tempogram_sum += tempogram.sum(axis=1)
+        self._tempogram_frames += tempogram.shape[1]
+
+    def _update_hpss(self, S):
+        if self._hpss_pending is not None:
+            self._process_hpss(lookahead=S[:, :HPSS_KERNEL // 2])
+        self._hpss_pending = S
+
+    def _process_hpss(self, lookahead=None):
+        """대기 중인 블록의 HPSS (앞뒤 kernel // 2 프레임을 붙여 블록 경계 오차 제거)"""
+        pending = self._hpss_pending
+        parts = [p for p in (self._hpss_context, pending, lookahead) if p is not None]
+        S_ext = np.concatenate(parts, axis=1) if len(parts) > 1 else pending
+        offset = 0 if self._hpss_context is None else self._hpss_context.shape[1]
+
+        S_harmonic, S_percussive = hpss_magnitude(S_ext, kernel_size=HPSS_KERNEL)
+        S_harmonic = S_harmonic[:, offset:offset + pending.shape[1]]
+        S_percussive = S_percussive[:, offset:offset + pending.shape[1]]
+        self._percussive_energy += self._frame_energy(S_percussive)
+
+        power = S_harmonic**2
+        if self._tuning is None:
+            self._tuning = float(librosa.estimate_tuning(S=power, sr=self.sr, n_fft=self.n_fft, bins_per_octave=12))
+        chroma = librosa.feature.chroma_stft(
+            S=power, sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length, tuning=self._tuning
+        )
+        self._chroma_sum += chroma.sum(axis=1)
+        self._chroma_sumsq += float(np.sum(chroma.astype(np.float64)**2))
+        self._chroma_frames += chroma.shape[1]
+
+        context = S_ext[:, :offset + pending.shape[1]]
+        self._hpss_context = context[:, -(HPSS_KERNEL // 2):]
+        self._hpss_pending = None
+
+    def finalize(self):
+        """누적 통계로 최종 특성 계산"""
+        if self._hpss_pending is not None:
+            self._process_hpss()
+
+        # 뒤쪽 win // 2개의 0을 채워 중앙 정렬 창의 마지막 프레임까지 처리
+        tail = np.concatenate([self._odf_buffer, np.zeros(self.tempo_win // 2)])
+        if len(tail) >= self.tempo_win:
+            self._accumulate_tempogram(tail)
+
+        if self.frames == 0 or self._tempogram_frames == 0:
+            raise ValueError("분석할 오디오 프레임이 부족합니다.")
+
+        mean_tempogram = (self._tempogram_sum / self._tempogram_frames)[:, np.newaxis]
+        tempo = float(librosa.feature.tempo(
+            tg=mean_tempogram, sr=self.sr, hop_length=self.hop_length, aggregate=None
+        )[0])
+
+        n_samples = max(self.samples, 1)
+        onset_mean = self._onset_sum / self._onset_count
+        onset_var = max(self._onset_sumsq / self._onset_count - onset_mean**2, 0.0)
+
+        chroma_count = self._chroma_frames * 12
+        chroma_mean = self._chroma_sum.sum() / chroma_count
+        chroma_var = max(self._chroma_sumsq / chroma_count - chroma_mean**2, 0.0)
+
+        return {
+            'tempo': tempo,
+            'percussive_rms': float(np.sqrt(self._percussive_energy * self.energy_scale / n_samples)),
+            'chroma_complexity': float(np.sqrt(chroma_var)),
+            'rms': float(np.sqrt(self._energy * self.energy_scale / n_samples)),
+            'onset_mean': float(onset_mean),
+            'onset_std': float(np.sqrt(onset_var)),
+            'chroma_profile': [round(float(v), 4) for v in self._chroma_sum / self._chroma_frames],
+            'duration_seconds': n_samples / self.sr
+        }
+
+def stream_spectral_features(source, block_frames=STREAM_BLOCK_FRAMES):
+    """파일 전체를 블록 단위로 디코딩하며 특성 추출 (원본 샘플레이트, 메모리 사용량 일정)
+
+    source는 파일 경로(또는 바이너리 파일 객체)나 이미 열려 있는 SoundFile이며,
+    경로 등으로 직접 연 파일은 분석이 끝나거나 실패하면 닫는다
+    """
+    if isinstance(source, sf.SoundFile):
+        return stream_sound_file(source, block_frames)
+    with sf.SoundFile(source) as sound_file:
+        return stream_sound_file(sound_file, block_frames)
+
+def stream_sound_file(sound_file, block_frames):
+    """열려 있는 SoundFile을 블록 단위로 디코딩하며 특성 추출"""
+    sr = sound_file.samplerate
+    n_fft, hop_length = stream_params(sr)
+    accumulator = StreamingFeatureAccumulator(sr, n_fft, hop_length)
+
+    stream = librosa.stream(
+        sound_file,
+        block_length=block_frames,
+        frame_length=n_fft,
+        hop_length=hop_length,
+        mono=True
+    )
+    for y_block in stream:
+        accumulator.update(y_block)
+
+    return accumulator.finalize()
@@ -0,0 +1,130 @@
+import os
+import json
+import subprocess
+import sys
+import pandas as pd
+
+from analysis_journal import AnalysisJournal, MAX_CRASH_ATTEMPTS
+from analyzer import LofiMusicAnalyzer
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def make_file(tmp_path, name='a.mp3', data=b'audio'):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def test_replays_finished_files(tmp_path):
+    path = make_file(tmp_path)
+    journal = AnalysisJournal(str(tmp_path / 'journal.jsonl'))
+    journal.start(path)
+    journal.record(path, {'bpm': 80.0})
+    journal.close()
+
+    replayed, crashed, suspects = AnalysisJournal(journal.path).load()
+
+    assert replayed == {path: {'bpm': 80.0}}
+    assert not crashed and not suspects
+
+def test_ignores_records_of_changed_files(tmp_path):
+    path = make_file(tmp_path)
+    journal = AnalysisJournal(str(tmp_path / 'journal.jsonl'))
+    journal.record(path, {'bpm': 80.0})
+    journal.close()
+    with open(path, 'ab') as f:
+        f.write(b'more')
+
+    replayed, _, _ = AnalysisJournal(journal.path).load()
+
+    assert replayed == {}
+
+def test_only_solo_starts_count_as_crashes(tmp_path):
+    solo, batched = make_file(tmp_path, 'solo.mp3'), make_file(tmp_path, 'batched.mp3')
+    journal = AnalysisJournal(str(tmp_path / 'journal.jsonl'))
+    for _ in range(MAX_CRASH_ATTEMPTS):
+        journal.start(solo, solo=True)
+        journal.start(batched, solo=False)
+    journal.close()
+
+    _, crashed, suspects = AnalysisJournal(journal.path).load()
+
+    assert crashed == {solo}
+    assert suspects == {batched}
+
+def test_skips_truncated_and_malformed_records(tmp_path):
+    path = make_file(tmp_path)
+    stat = os.stat(path)
+    entry = {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    lines = [
+        json.dumps(dict(entry, status='start')),  # solo 없음
+        json.dumps(dict(entry, status='start', solo='yes')),
+        json.dumps(dict(entry, status='done')),  # features 없음
+        '{"path": "' + path,  # 잘린 줄
+    ]
+    journal_path = tmp_path / 'journal.jsonl'
+    journal_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    replayed, crashed, suspects = AnalysisJournal(str(journal_path)).load()
+
+    assert replayed == {} and crashed == set() and suspects == set()
+
+CRASH_SCRIPT = '''
+import os, sys
+sys.path.insert(0, {repo!r})
+from analyzer import LofiMusicAnalyzer
+analyzer = LofiMusicAnalyzer({base!r}, workers=1, use_cache=False, prefetch={prefetch}, batch_size={batch_size})
+read_audio = analyzer.read_audio
+def crash(file_path):
+    if file_path.endswith({poison!r}) and ({always} or not os.path.exists('crashed')):
+        open('crashed', 'w').close()
+        os._exit(3)
+    return read_audio(file_path)
+analyzer.read_audio = crash
+analyzer.analyze_folders()
+'''
+
+def run_crashing(base, poison, always=False, prefetch=0, batch_size=1):
+    script = CRASH_SCRIPT.format(repo=REPO_DIR, base=str(base), poison=poison, always=always, prefetch=prefetch, batch_size=batch_size)
+    return subprocess.run([sys.executable, '-c', script], cwd=os.getcwd()).returncode
+
+def read_tracks():
+    return pd.read_csv(os.path.join('csv_output', 'tracks.csv'))
+
+def clean_tracks(base, tmp_path, monkeypatch):
+    clean = tmp_path / 'clean'
+    clean.mkdir()
+    monkeypatch.chdir(clean)
+    LofiMusicAnalyzer(str(base), workers=1, use_cache=False, prefetch=0).analyze_folders()
+    return read_tracks()
+
+def test_resume_after_crash_replays_journal(audio_tree, tmp_path, monkeypatch):
+    assert run_crashing(audio_tree, 'ES_Song 4 - Artist 3.mp3') == 3
+    journal = AnalysisJournal(os.path.join('csv_output', 'analysis_journal.jsonl'))
+    replayed, _, _ = journal.load()
+    assert len(replayed) == 4
+
+    decoded = []
+    analyzer = LofiMusicAnalyzer(str(audio_tree), workers=1, use_cache=False, prefetch=0)
+    read_audio = analyzer.read_audio
+    analyzer.read_audio = lambda file_path: decoded.append(os.path.basename(file_path)) or read_audio(file_path)
+    analyzer.analyze_folders()
+    resumed = read_tracks()
+
+    # 중단 전에 끝난 파일은 다시 디코딩하지 않음
+    assert not set(decoded) & {os.path.basename(path) for path in replayed}
+    assert not os.path.exists(journal.path)
+    expected = clean_tracks(audio_tree, tmp_path, monkeypatch)
+    pd.testing.assert_frame_equal(resumed, expected)
+
+def test_batch_mates_of_a_crashing_file_are_isolated(audio_tree, tmp_path, monkeypatch):
+    poison = 'ES_Song 4 - Artist 3.mp3'
+    # 첫 실행은 배치 중에 중단, 이후 실행은 같이 있던 파일을 하나씩 분석하다 이 파일에서만 중단
+    returncodes = [run_crashing(audio_tree, poison, always=True, prefetch=4, batch_size=2) for _ in range(MAX_CRASH_ATTEMPTS + 2)]
+    assert returncodes == [3] * (MAX_CRASH_ATTEMPTS + 1) + [0]
+    tracks = read_tracks()
+
+    failed = tracks[tracks['genre'] == 'Unknown']
+    assert failed['file_name'].tolist() == [poison]
+    expected = clean_tracks(audio_tree, tmp_path, monkeypatch)
+    ok = tracks['file_name'] != poison
+    pd.testing.assert_frame_equal(tracks[ok].reset_index(drop=True), expected[expected['file_name'] != poison].reset_index(drop=True))
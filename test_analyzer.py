@@ -0,0 +1,147 @@
+import os
+import pandas as pd
+import soundfile as sf
+
+import analyzer as analyzer_module
+from analyzer import LofiMusicAnalyzer
+from conftest import AUDIO_LAYOUT, SR, synth_track
+
+CSV_FILES = ['tracks.csv', 'episodes.csv', 'track_episodes.csv']
+
+def analyze(base, run_dir, **kwargs):
+    """run_dir에서 분석을 실행하고 CSV별 DataFrame 반환"""
+    os.makedirs(run_dir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        kwargs.setdefault('use_cache', False)
+        LofiMusicAnalyzer(str(base), **kwargs).analyze_folders()
+        return {name: pd.read_csv(os.path.join('csv_output', name)) for name in CSV_FILES}
+    finally:
+        os.chdir(cwd)
+
+def assert_same_csvs(actual, expected):
+    for name in CSV_FILES:
+        pd.testing.assert_frame_equal(actual[name], expected[name], obj=name)
+
+def test_parallel_analysis_matches_serial(audio_tree, tmp_path):
+    serial = analyze(audio_tree, tmp_path / 'serial', workers=1, prefetch=0)
+    parallel = analyze(audio_tree, tmp_path / 'parallel', workers=2)
+
+    assert len(serial['tracks.csv']) == 8
+    assert (serial['tracks.csv']['bpm'] > 0).all()
+    assert_same_csvs(parallel, serial)
+
+# 합성 음원의 실제 BPM (conftest.AUDIO_LAYOUT)
+def true_bpm(file_name):
+    return next(bpm for files in AUDIO_LAYOUT.values() for name, bpm, _ in files if name == file_name)
+
+def test_fast_profile_stays_close_to_default(audio_tree, tmp_path):
+    default = analyze(audio_tree, tmp_path / 'default', workers=1)['tracks.csv']
+    fast = analyze(audio_tree, tmp_path / 'fast', workers=1, profile='fast')['tracks.csv']
+
+    for _, row in fast.iterrows():
+        assert abs(row['bpm'] - true_bpm(row['file_name'])) <= 0.03 * true_bpm(row['file_name'])
+    # drum_scale 보정으로 기본 프로파일과 같은 척도 (장르 기준 0.1이 같은 의미)
+    ratio = fast['drum_intensity'] / default['drum_intensity']
+    assert ratio.between(0.9, 1.1).all()
+    assert (fast['genre'] == default['genre']).all()
+    assert (fast['harmonic_complexity'] - default['harmonic_complexity']).abs().max() <= 0.005
+
+def test_stream_profile_matches_default_on_short_tracks(audio_tree, tmp_path):
+    # 60초보다 짧은 곡은 기본 프로파일도 곡 전체를 분석하므로 템포가 같아야 함
+    default = analyze(audio_tree, tmp_path / 'default', workers=1)['tracks.csv']
+    stream = analyze(audio_tree, tmp_path / 'stream', workers=1, profile='stream')['tracks.csv']
+
+    assert (stream['bpm'] == default['bpm']).all()
+    assert (stream['duration_ms'] == default['duration_ms']).all()
+    assert (stream['genre'] == default['genre']).all()
+
+def run_recording_decodes(base, **kwargs):
+    """현재 디렉터리에서 분석하고 오디오를 디코딩한 파일명 목록 반환"""
+    analyzer = LofiMusicAnalyzer(str(base), workers=1, use_cache=False, prefetch=0, **kwargs)
+    decoded = []
+    read_audio = analyzer.read_audio
+    def record(file_path):
+        result = read_audio(file_path)
+        # 메타데이터 스캔이나 캐시 적중은 특성이 이미 채워져 있음
+        if result['features'] is None:
+            decoded.append(os.path.basename(file_path))
+        return result
+    analyzer.read_audio = record
+    analyzer.analyze_folders()
+    return decoded
+
+def read_csvs():
+    return {name: pd.read_csv(os.path.join('csv_output', name)) for name in CSV_FILES}
+
+def test_rescan_decodes_only_new_and_changed_files(audio_tree):
+    run_recording_decodes(audio_tree)
+    before = read_csvs()
+    sf.write(str(audio_tree / '2nd' / 'ES_Song 8 - Artist 5.mp3'), synth_track(110, 8, 99), SR, format='MP3')
+    sf.write(str(audio_tree / '1st' / 'ES_Song 2 - Artist 2.mp3'), synth_track(60, 10, 98), SR, format='MP3')
+
+    decoded = run_recording_decodes(audio_tree)
+    after = read_csvs()
+
+    assert sorted(decoded) == ['ES_Song 2 - Artist 2.mp3', 'ES_Song 8 - Artist 5.mp3']
+    # 기존 에피소드 행은 그대로 두고 새 파일만 뒤에 추가
+    old_rows = len(before['track_episodes.csv'])
+    pd.testing.assert_frame_equal(after['track_episodes.csv'].iloc[:old_rows], before['track_episodes.csv'])
+    added = after['track_episodes.csv'].iloc[old_rows:]
+    assert len(added) == 1 and added['track_episode_id'].iloc[0] == before['track_episodes.csv']['track_episode_id'].max() + 1
+    # 바뀐 파일은 같은 트랙 id에서 다시 분석
+    tracks = after['tracks.csv'].set_index('title')
+    assert tracks.loc['Song 2', 'track_id'] == before['tracks.csv'].set_index('title').loc['Song 2', 'track_id']
+    assert abs(tracks.loc['Song 2', 'bpm'] - 60) <= 2
+    assert len(tracks) == 9
+
+    assert run_recording_decodes(audio_tree) == []
+
+def test_prefetch_matches_serial_and_opens_each_file_once(audio_tree, tmp_path, monkeypatch):
+    serial = analyze(audio_tree, tmp_path / 'serial', workers=1, prefetch=0)
+
+    opened = []
+    builtin_open = open
+    def record_open(file, *args, **kwargs):
+        if str(file).endswith('.mp3'):
+            opened.append(os.path.basename(str(file)))
+        return builtin_open(file, *args, **kwargs)
+    # 파일 인덱스의 해시 계산을 제외한 분석 단계(read_audio)의 파일 열기만 기록
+    monkeypatch.setattr(analyzer_module, 'open', record_open, raising=False)
+    prefetched = analyze(audio_tree, tmp_path / 'prefetch', workers=1, prefetch=4, reader_threads=2)
+    monkeypatch.undo()
+
+    assert_same_csvs(prefetched, serial)
+    assert len(opened) == len(set(opened)) == 8
+
+def test_metadata_scan_then_pending_analysis_matches_full_analysis(audio_tree, tmp_path, monkeypatch):
+    full = analyze(audio_tree, tmp_path / 'full', workers=1, prefetch=0)
+
+    run_dir = tmp_path / 'metadata'
+    run_dir.mkdir()
+    monkeypatch.chdir(run_dir)
+    assert run_recording_decodes(audio_tree, profile='metadata') == []
+    scanned = read_csvs()
+    assert (scanned['tracks.csv']['analysis_profile'] == 'metadata').all()
+    assert (scanned['tracks.csv']['duration_ms'] == full['tracks.csv']['duration_ms']).all()
+
+    analyzer = LofiMusicAnalyzer(str(audio_tree), workers=1, use_cache=False, prefetch=0)
+    assert analyzer.analyze_pending() == 8
+    assert_same_csvs(read_csvs(), full)
+    assert LofiMusicAnalyzer(str(audio_tree), workers=1, use_cache=False).analyze_pending() == 0
+
+def test_batched_analysis_matches_single_track(audio_tree, tmp_path, monkeypatch):
+    single = analyze(audio_tree, tmp_path / 'single', workers=1, prefetch=0)
+
+    batch_sizes = []
+    compute_batch = analyzer_module.compute_spectral_features_batch
+    def record_batch(Y, *args, **kwargs):
+        batch_sizes.append(len(Y))
+        return compute_batch(Y, *args, **kwargs)
+    monkeypatch.setattr(analyzer_module, 'compute_spectral_features_batch', record_batch)
+    batched = analyze(audio_tree, tmp_path / 'batched', workers=1, prefetch=8, batch_size=4)
+
+    # 길이가 같은 클립끼리 묶여 실제로 배치 계산이 일어났는지 확인
+    assert max(batch_sizes) > 1
+    assert_same_csvs(batched, single)
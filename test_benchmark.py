@@ -0,0 +1,44 @@
+import os
+import json
+import subprocess
+import sys
+
+import benchmark
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def test_ordinal_folders_follow_analyzer_names():
+    assert [benchmark.ordinal_folder(i) for i in (1, 2, 3, 4, 11, 12, 13, 21, 22, 101, 111)] == [
+        '1st', '2nd', '3rd', '4th', '11th', '12th', '13th', '21st', '22nd', '101st', '111th'
+    ]
+
+def test_dataset_is_reused_and_copies_unique_tracks(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    files = benchmark.generate_dataset(data_dir, 4, unique=2, seconds=2)
+    mtimes = [os.path.getmtime(os.path.join(data_dir, entry['path'])) for entry in files]
+
+    again = benchmark.generate_dataset(data_dir, 3, unique=2, seconds=2)
+
+    assert again == files[:3]
+    assert [os.path.getmtime(os.path.join(data_dir, entry['path'])) for entry in files] == mtimes
+    assert [entry['unique'] for entry in files] == [True, True, False, False]
+    assert [entry['bpm'] for entry in files] == [70, 72, 70, 72]
+
+def test_runs_every_scenario_and_compares_with_baseline(tmp_path):
+    output = str(tmp_path / 'results.json')
+    command = [
+        sys.executable, 'benchmark.py', '--sizes', '3', '--seconds', '8', '--unique', '3',
+        '--data-dir', str(tmp_path / 'data'), '--output', output
+    ]
+    subprocess.run(command, cwd=REPO_DIR, check=True, capture_output=True)
+    subprocess.run(command + ['--baseline', output], cwd=REPO_DIR, check=True, capture_output=True)
+
+    with open(output, encoding='utf-8') as f:
+        results = json.load(f)['results']
+
+    assert [result['scenario'] for result in results] == benchmark.SCENARIOS
+    for result in results:
+        assert result['bpm']['accuracy'] == 1.0
+        assert result['tracks_per_second'] > 0
+        # 같은 코드로 다시 측정하면 BPM이 바뀌지 않음
+        assert result['baseline']['bpm_changed'] == []
@@ -0,0 +1,106 @@
+import os
+import shutil
+import sqlite3
+from multiprocessing import Pool
+
+from analyzer import LofiMusicAnalyzer
+from catalog_db import CatalogDB
+
+def make_track(track_id, title, artist='Artist', bpm=80.0):
+    return {
+        'track_id': track_id, 'title': title, 'artist': artist, 'bpm': bpm, 'duration_ms': 180000,
+        'file_name': f'ES_{title} - {artist}.mp3', 'folder_name': '1st', 'genre': 'Lo-fi Jazz',
+        'sub_genre': 'Chill Jazz', 'drum_intensity': 0.05, 'harmonic_complexity': 0.3,
+        'analysis_profile': 'default'
+    }
+
+def save_episode(db_path, episode_name, titles):
+    """다른 실행이 쓴 내용을 모르는 채로 ID 1번부터 임시 ID를 붙여 에피소드 하나 저장"""
+    catalog = CatalogDB(db_path)
+    tracks = [make_track(i, title) for i, title in enumerate(titles, 1)]
+    remapped = catalog.save_changes(
+        tracks=[(track, None) for track in tracks],
+        episodes=[{'episode_id': 1, 'episode_name': episode_name, 'created_at': '2024-01-01'}],
+        episode_tracks={1: [
+            {'track_episode_id': i, 'track_id': track['track_id'], 'episode_id': 1, 'order_in_episode': i}
+            for i, track in enumerate(tracks, 1)
+        ]}
+    )
+    catalog.close()
+    return remapped
+
+def episode_titles(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('''
+        SELECT e.episode_name, t.title FROM track_episodes te
+        JOIN tracks t USING (track_id) JOIN episodes e USING (episode_id)
+        ORDER BY e.episode_name, te.order_in_episode
+    ''').fetchall()
+    conn.close()
+    episodes = {}
+    for episode_name, title in rows:
+        episodes.setdefault(episode_name, []).append(title)
+    return episodes
+
+def test_upserts_tracks_on_title_and_artist(tmp_path):
+    catalog = CatalogDB(str(tmp_path / 'catalog.sqlite3'))
+    catalog.save_changes(tracks=[(make_track(1, 'Rain'), 'hash-1')])
+
+    remapped = catalog.save_changes(tracks=[(make_track(7, 'Rain', bpm=92.0), None)])
+
+    assert remapped['tracks'] == {7: 1}
+    tracks = catalog.tracks_frame()
+    assert tracks['track_id'].tolist() == [1] and tracks['bpm'].tolist() == [92.0]
+    conn = sqlite3.connect(catalog.db_path)
+    assert conn.execute('SELECT file_hash FROM tracks').fetchone() == ('hash-1',)
+    conn.close()
+
+def test_colliding_provisional_ids_get_new_ids(tmp_path):
+    db_path = str(tmp_path / 'catalog.sqlite3')
+    assert save_episode(db_path, '1st', ['Rain', 'Dawn']) == {'tracks': {}, 'episodes': {}, 'track_episodes': {}}
+
+    remapped = save_episode(db_path, '2nd', ['Cafe', 'Dawn'])
+
+    # Dawn은 기존 트랙 2번, Cafe는 새 ID, 에피소드와 트랙-에피소드 행도 새 ID
+    assert remapped['tracks'] == {1: 3}
+    assert remapped['episodes'] == {1: 2}
+    assert episode_titles(db_path) == {'1st': ['Rain', 'Dawn'], '2nd': ['Cafe', 'Dawn']}
+
+def test_concurrent_writers_keep_every_episode(tmp_path):
+    db_path = str(tmp_path / 'catalog.sqlite3')
+    CatalogDB(db_path).is_empty()
+    jobs = [(db_path, f'{n}th', [f'Song {n}-{i}' for i in range(20)] + ['Shared']) for n in range(4, 12)]
+
+    with Pool(4) as pool:
+        pool.starmap(save_episode, jobs)
+
+    episodes = episode_titles(db_path)
+    assert episodes == {episode_name: titles for _, episode_name, titles in jobs}
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM tracks').fetchone() == (8 * 20 + 1,)
+    conn.close()
+
+def test_overlapping_analyzer_runs_keep_both_episodes(audio_tree, tmp_path):
+    # 같은 카탈로그를 쓰는 두 실행: B가 카탈로그를 읽은 뒤 저장하기 전에 A가 끝남
+    for name, folders in (('a', ['1st', '2nd']), ('b', ['1st', '3rd'])):
+        for folder in folders:
+            shutil.copytree(audio_tree / folder, tmp_path / name / folder)
+    os.makedirs(tmp_path / 'base')
+    shutil.copytree(audio_tree / '1st', tmp_path / 'base' / '1st')
+    LofiMusicAnalyzer(str(tmp_path / 'base'), profile='metadata', catalog_db=True).analyze_folders()
+
+    a = LofiMusicAnalyzer(str(tmp_path / 'a'), profile='metadata', catalog_db=True)
+    b = LofiMusicAnalyzer(str(tmp_path / 'b'), profile='metadata', catalog_db=True)
+    save_b = b.save_to_catalog
+    def overlapped():
+        a.analyze_folders()
+        return save_b()
+    b.save_to_catalog = overlapped
+    b.analyze_folders()
+
+    episodes = episode_titles(os.path.join('csv_output', 'catalog.sqlite3'))
+    assert episodes == {
+        '1st': ['Song 0', 'Song 1', 'Song 2'],
+        '2nd': ['Song 3', 'Song 4', 'Song 5'],
+        '3rd': ['Song 1', 'Song 6', 'Song 7'],
+    }
@@ -0,0 +1,81 @@
+import os
+from datetime import datetime
+import pandas as pd
+
+from create_track import generate_track_history
+from usage_history import UsageHistory
+
+TRACKS = pd.DataFrame({
+    'track_id': [1, 2, 3, 4, 5],
+    'title': ['Rain', 'Dawn', 'Cafe', 'Moon', 'Bus'],
+    'artist': ['A', 'B', 'C', 'D', 'E'],
+    'folder_name': ['1st', '2nd', '2nd', '3rd', '3rd'],
+})
+
+def write_playlist(csv_dir, name, track_ids):
+    TRACKS[TRACKS['track_id'].isin(track_ids)].assign(bpm=80).to_csv(
+        os.path.join(csv_dir, f'playlist_tracks_{name}.csv'), index=False, encoding='utf-8-sig'
+    )
+
+def baseline_history(csv_dir, playlist_files):
+    """이전 구현(iterrows로 플레이리스트와 트랙을 한 행씩 처리)과 같은 기록"""
+    records = []
+    for playlist_file in playlist_files:
+        timestamp = playlist_file.replace('playlist_tracks_', '').replace('.csv', '')
+        for _, track in pd.read_csv(os.path.join(csv_dir, playlist_file)).iterrows():
+            records.append((track['track_id'], track['title'], track['artist'],
+                            datetime.strptime(timestamp, '%Y%m%d_%H%M').strftime('%Y-%m-%d %H:%M:%S'), timestamp))
+    used = set(record[0] for record in records)
+    for _, track in TRACKS.iterrows():
+        if track['track_id'] not in used and track['folder_name'] != '1st':
+            records.append((track['track_id'], track['title'], track['artist'], 'now', 'initial'))
+    return records
+
+def read_history(csv_dir):
+    history = pd.read_csv(os.path.join(csv_dir, 'track_usage_history.csv'), dtype={'used_at': str, 'playlist_id': str})
+    # 초기 기록의 사용 시각은 실행 시각이므로 비교에서 제외
+    history.loc[history['playlist_id'] == 'initial', 'used_at'] = 'now'
+    return list(history.itertuples(index=False, name=None))
+
+def test_first_build_matches_row_by_row_baseline(tmp_path):
+    TRACKS.to_csv(tmp_path / 'tracks.csv', index=False, encoding='utf-8-sig')
+    write_playlist(tmp_path, '20240101_1000', [1, 2])
+    write_playlist(tmp_path, '20240102_1000', [2])
+    playlist_files = [f for f in os.listdir(tmp_path) if f.startswith('playlist_tracks_')]
+
+    assert generate_track_history(str(tmp_path))
+
+    assert read_history(tmp_path) == baseline_history(tmp_path, playlist_files)
+    assert UsageHistory(str(tmp_path)).usage_counts() == {1: 1, 2: 2, 3: 1, 4: 1, 5: 1}
+
+def test_later_runs_ingest_only_new_playlists(tmp_path):
+    TRACKS.to_csv(tmp_path / 'tracks.csv', index=False, encoding='utf-8-sig')
+    write_playlist(tmp_path, '20240101_1000', [1, 2])
+    assert generate_track_history(str(tmp_path))
+    before = read_history(tmp_path)
+
+    # 배치 생성 파일은 타임스탬프 뒤에 에피소드 번호가 붙음
+    write_playlist(tmp_path, '20240103_0900_ep2', [2, 3])
+    assert generate_track_history(str(tmp_path))
+    assert generate_track_history(str(tmp_path))
+
+    history = read_history(tmp_path)
+    assert history[:len(before)] == before
+    assert history[len(before):] == [
+        (2, 'Dawn', 'B', '2024-01-03 09:00:00', '20240103_0900_ep2'),
+        (3, 'Cafe', 'C', '2024-01-03 09:00:00', '20240103_0900_ep2'),
+    ]
+    stats = UsageHistory(str(tmp_path)).load_stats()
+    assert stats[2]['use_count'] == 2 and stats[2]['last_playlist_id'] == '20240103_0900_ep2'
+
+def test_history_without_ingest_record_is_not_counted_twice(tmp_path):
+    TRACKS.to_csv(tmp_path / 'tracks.csv', index=False, encoding='utf-8-sig')
+    write_playlist(tmp_path, '20240101_1000', [1, 2])
+    assert generate_track_history(str(tmp_path))
+    before = read_history(tmp_path)
+    os.remove(tmp_path / 'playlist_ingest.json')
+
+    assert generate_track_history(str(tmp_path))
+
+    assert read_history(tmp_path) == before
+    assert UsageHistory(str(tmp_path)).ingested_playlists() == {'playlist_tracks_20240101_1000.csv'}
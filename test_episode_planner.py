@@ -0,0 +1,72 @@
+import json
+import os
+from collections import Counter
+
+from conftest import write_catalog
+from episode_planner import EpisodePlanner, load_episode_calendar
+from playlist_constraints import PlaylistConstraints
+from playlist_selection import MAX_TRACK_USES
+
+CALENDAR = [
+    {'start_bpm': 70, 'end_bpm': 85, 'play_minutes': 60},
+    {'start_bpm': 75, 'end_bpm': 90, 'play_minutes': 60},
+    {'start_bpm': 70, 'end_bpm': 80, 'play_minutes': 60},
+]
+
+def ids(playlist):
+    return [track['track_id'] for track in playlist]
+
+def test_single_episode_plan_matches_select_playlist(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=300)
+    generator = playlist_generator(70, 85, 60)
+
+    plans = EpisodePlanner(generator, CALENDAR[:1]).plan()
+
+    assert ids(plans[0]) == ids(generator.select_playlist())
+
+def test_batch_spreads_tracks_and_respects_usage_cap(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=300, uses=600)
+    generator = playlist_generator()
+    history = generator.usage_history.usage_counts()
+
+    plans = EpisodePlanner(generator, CALENDAR).plan()
+
+    picks = Counter(track_id for plan in plans for track_id in ids(plan))
+    assert all(history.get(track_id, 0) < MAX_TRACK_USES for track_id in picks)
+    assert all(history.get(track_id, 0) + count <= MAX_TRACK_USES for track_id, count in picks.items())
+    for plan, spec in zip(plans, CALENDAR):
+        assert len(set(ids(plan))) == len(plan)
+        assert all(spec['start_bpm'] <= track['bpm'] <= spec['end_bpm'] for track in plan)
+        assert sum(track['duration_ms'] for track in plan) >= spec['play_minutes'] * 60000
+
+def test_batch_applies_generator_settings(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=600)
+    constraints = PlaylistConstraints(genre_ratios={'Lo-fi Jazz': 0.8, 'Lo-fi Hip Hop': 0.2}, drum_range=(0.05, 0.2))
+    generator = playlist_generator(fill_mode='exact', duration_tolerance_seconds=5, constraints=constraints)
+
+    plans = EpisodePlanner(generator, [dict(spec, play_minutes=30) for spec in CALENDAR]).plan()
+
+    for plan in plans:
+        assert all(0.05 <= track['drum_intensity'] <= 0.2 for track in plan)
+        jazz = sum(track['genre'] == 'Lo-fi Jazz' for track in plan) / len(plan)
+        assert 0.7 <= jazz <= 0.9
+
+def test_run_publishes_each_episode(tmp_path, playlist_generator):
+    csv_dir = tmp_path / 'csv_output'
+    write_catalog(str(csv_dir), n=300)
+    generator = playlist_generator()
+
+    results = EpisodePlanner(generator, CALENDAR[:2]).run()
+
+    assert [result['underfilled'] for result in results] == [False, False]
+    playlist_files = sorted(f for f in os.listdir(csv_dir) if f.startswith('playlist_tracks_'))
+    assert len(playlist_files) == 2 and playlist_files[0].endswith('_01.csv') and playlist_files[1].endswith('_02.csv')
+
+def test_rejects_invalid_calendar(tmp_path):
+    path = tmp_path / 'calendar.json'
+    path.write_text(json.dumps(CALENDAR), encoding='utf-8')
+    assert load_episode_calendar(str(path)) == [{key: float(value) for key, value in spec.items()} for spec in CALENDAR]
+
+    for entry in ({'start_bpm': 90, 'end_bpm': 70, 'play_minutes': 60}, {'start_bpm': 70, 'end_bpm': 80, 'play_minutes': 0}, {'start_bpm': 70}):
+        path.write_text(json.dumps([entry]), encoding='utf-8')
+        assert load_episode_calendar(str(path)) is None
@@ -0,0 +1,62 @@
+import os
+
+from analyzer import LofiMusicAnalyzer
+from feature_cache import FeatureCache, content_hash
+
+PARAMS = {'version': 1, 'sr': 22050}
+
+def test_returns_stored_features(tmp_path):
+    cache = FeatureCache(str(tmp_path / 'cache'))
+    cache.put('abc', PARAMS, {'bpm': 80.0})
+
+    assert cache.get('abc', PARAMS) == {'bpm': 80.0}
+    assert cache.get('abc', dict(PARAMS, sr=44100)) is None
+    cache.close()
+
+def test_changed_content_misses(tmp_path):
+    path = tmp_path / 'a.mp3'
+    path.write_bytes(b'audio')
+    cache = FeatureCache(str(tmp_path / 'cache'))
+    cache.put(content_hash(str(path)), PARAMS, {'bpm': 80.0})
+
+    path.write_bytes(b'other audio')
+
+    assert cache.get(content_hash(str(path)), PARAMS) is None
+    cache.close()
+
+def test_prune_drops_least_recently_used(tmp_path):
+    cache = FeatureCache(str(tmp_path / 'cache'), max_bytes=200)
+    for index in range(5):
+        cache.put(f'file{index}', PARAMS, {'bpm': float(index), 'pad': 'x' * 40})
+    cache.get('file0', PARAMS)
+
+    assert cache.prune() > 0
+    assert cache.get('file0', PARAMS) is not None
+    assert cache.get('file1', PARAMS) is None
+    cache.close()
+
+def analyze_in(base, run_dir, cache_dir, monkeypatch):
+    """run_dir에서 분석을 실행하고 디코딩한 파일명 목록 반환 (기존 CSV 없이 처음부터 분석)"""
+    run_dir.mkdir()
+    monkeypatch.chdir(run_dir)
+    analyzer = LofiMusicAnalyzer(str(base), workers=1, prefetch=0, cache_dir=cache_dir)
+    decoded = []
+    read_audio_clip = analyzer.read_audio_clip
+    def record(entry):
+        entry = read_audio_clip(entry)
+        if 'y' in entry:
+            decoded.append(os.path.basename(entry['file_path']))
+        return entry
+    analyzer.read_audio_clip = record
+    analyzer.analyze_folders()
+    return decoded
+
+def test_second_run_reads_features_from_cache(audio_tree, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+
+    first = analyze_in(audio_tree, tmp_path / 'first', cache_dir, monkeypatch)
+    second = analyze_in(audio_tree, tmp_path / 'second', cache_dir, monkeypatch)
+
+    assert len(first) == 8
+    assert second == []
+    assert (tmp_path / 'first' / 'csv_output' / 'tracks.csv').read_bytes() == (tmp_path / 'second' / 'csv_output' / 'tracks.csv').read_bytes()
@@ -0,0 +1,98 @@
+import os
+import re
+import numpy as np
+import pytest
+import soundfile as sf
+
+import main_bedrock
+from feature_cache import FeatureCache
+from playlist_order import order_tracks
+
+# 파일명 → (BPM, 드럼 강도, 화성 복잡도)
+FEATURES = {
+    'ES_Rain - Artist A.mp3': (92, 0.12, 0.31),
+    'ES_Dawn - Artist B.mp3': (70, 0.05, 0.22),
+    'ES_Cafe - Artist C.mp3': (81, 0.09, 0.27),
+    'ES_Moon - Artist D.mp3': (75, 0.06, 0.24),
+    'ES_Bus - Artist E.mp3': (88, 0.11, 0.30),
+}
+
+def write_folder(folder, names):
+    folder.mkdir()
+    for name in names:
+        sf.write(str(folder / name), np.zeros(22050, dtype=np.float32), 22050, format='MP3')
+
+def run_main(tmp_path, monkeypatch, features):
+    folder = tmp_path / '12th'
+    write_folder(folder, features)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main_bedrock, 'get_aws_session', lambda: object())
+    monkeypatch.setattr(main_bedrock, 'generate_content', lambda prompt, session: None)
+    monkeypatch.setattr(main_bedrock, 'get_bpm', lambda file_path, feature_cache: dict(
+        zip(('bpm', 'drum_intensity', 'harmonic_complexity'), features[os.path.basename(file_path)])
+    ))
+    main_bedrock.main(str(folder), feature_cache=object())
+    return re.findall(r'🎵 (.*) 🎵', (tmp_path / 'output.srt').read_text(encoding='utf-8'))
+
+def test_main_writes_srt_in_flow_order(tmp_path, monkeypatch):
+    titles = run_main(tmp_path, monkeypatch, FEATURES)
+
+    tracks = [
+        {'title': name.replace('ES_', '').replace('.mp3', ''), 'bpm': bpm, 'drum_intensity': drum, 'harmonic_complexity': harmonic}
+        for name, (bpm, drum, harmonic) in sorted(FEATURES.items())
+    ]
+    expected = order_tracks(tracks, 70, 92)
+    assert titles == [track['title'] for track in expected]
+    assert titles != sorted(titles)
+
+def test_main_follows_bpm_when_other_features_match(tmp_path, monkeypatch):
+    features = {name: (bpm, 0.1, 0.3) for name, (bpm, _, _) in FEATURES.items()}
+    titles = run_main(tmp_path, monkeypatch, features)
+
+    by_title = {name.replace('ES_', '').replace('.mp3', ''): bpm for name, (bpm, _, _) in features.items()}
+    assert [by_title[title] for title in titles] == sorted(by_title.values())
+
+def test_metadata_only_keeps_file_name_order(tmp_path):
+    folder = tmp_path / 'meta'
+    write_folder(folder, FEATURES)
+
+    tracks = main_bedrock.get_music_info(str(folder), metadata_only=True)
+
+    assert [track['title'] for track in tracks] == [name.replace('ES_', '').replace('.mp3', '') for name in sorted(FEATURES)]
+    assert [track['start_time'] for track in tracks] == [0, 1, 2, 3, 4]
+
+def test_get_bpm_caches_streamed_features(tmp_path, monkeypatch):
+    path = tmp_path / 'ES_Tone - Artist.mp3'
+    sr = 22050
+    clicks = np.zeros(sr * 8, dtype=np.float32)
+    clicks[::sr // 2] = 1.0
+    sf.write(str(path), clicks, sr, format='MP3')
+    cache = FeatureCache(str(tmp_path / 'cache'))
+
+    first = main_bedrock.get_bpm(str(path), cache)
+    monkeypatch.setattr(main_bedrock, 'stream_spectral_features', lambda source: pytest.fail('캐시를 쓰지 않고 다시 분석함'))
+    second = main_bedrock.get_bpm(str(path), cache)
+
+    assert first == second
+    assert first['bpm'] > 0 and first['drum_intensity'] is not None
+
+def test_get_bpm_reports_unreadable_audio(tmp_path, capsys):
+    path = tmp_path / 'ES_Broken - Artist.mp3'
+    path.write_bytes(b'not audio')
+
+    features = main_bedrock.get_bpm(str(path), FeatureCache(str(tmp_path / 'cache')))
+
+    assert features['bpm'] == 0
+    assert 'BPM 분석 실패 ES_Broken - Artist.mp3' in capsys.readouterr().out
+
+@pytest.mark.parametrize('error', [KeyboardInterrupt, TypeError])
+def test_get_bpm_does_not_swallow_interrupts_or_bugs(tmp_path, monkeypatch, error):
+    path = tmp_path / 'ES_Tone - Artist.mp3'
+    path.write_bytes(b'data')
+
+    def fail(source):
+        raise error()
+    monkeypatch.setattr(main_bedrock, 'stream_spectral_features', fail)
+
+    with pytest.raises(error):
+        main_bedrock.get_bpm(str(path), FeatureCache(str(tmp_path / 'cache')))
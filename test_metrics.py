@@ -0,0 +1,45 @@
+import os
+import json
+import pytest
+
+from analyzer import LofiMusicAnalyzer
+from metrics import StageMetrics
+
+def read_records():
+    with open(os.path.join('csv_output', 'metrics.jsonl'), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_stage_records_exceptions_and_bytes(tmp_path):
+    metrics = StageMetrics(str(tmp_path))
+    with metrics.track('a.mp3'):
+        with metrics.stage('open') as stage:
+            stage['bytes_read'] = 10
+        with pytest.raises(ValueError):
+            with metrics.stage('decode'):
+                raise ValueError()
+
+    totals = metrics.report()
+
+    assert totals['open']['bytes_read'] == 10 and totals['decode']['calls'] == 1
+    assert metrics.file_totals.keys() == {'a.mp3'}
+    assert 'lofi_stage_calls_total{stage="decode"} 1' in (tmp_path / 'metrics.prom').read_text(encoding='utf-8')
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_analysis_exports_every_stage_per_file(audio_tree, workers):
+    LofiMusicAnalyzer(str(audio_tree), workers=workers, use_cache=False, metrics=True).analyze_folders()
+    records = read_records()
+
+    files = {}
+    for record in records:
+        files.setdefault(record['file'], set()).add(record['stage'])
+    analyzed = {path for path in files if path and path.endswith('.mp3')}
+    # 워커 프로세스에서 기록한 단계도 메인 프로세스로 모아서 내보냄
+    assert len(analyzed) == 8
+    if workers > 1:
+        assert {record['pid'] for record in records} - {os.getpid()}
+    for path in analyzed:
+        assert {'open', 'decode', 'resample', 'stft', 'beat', 'hpss', 'chroma'} <= files[path]
+
+    opened = sum(record['bytes_read'] for record in records if record['stage'] == 'open')
+    assert opened == sum(os.path.getsize(path) for path in analyzed)
+    assert any(record['stage'] == 'csv_write' for record in records)
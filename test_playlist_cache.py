@@ -0,0 +1,116 @@
+import os
+import pandas as pd
+
+from conftest import write_catalog
+from playlist_cache import PlaylistCache, catalog_version
+from track_catalog import TrackTable
+from usage_history import UsageHistory
+
+def ids(result):
+    return [track['track_id'] for track in result['playlist']]
+
+def forbid_selection(generator):
+    def select_playlist(*args, **kwargs):
+        raise AssertionError('캐시된 플레이리스트가 있으면 다시 고르지 않아야 함')
+    generator.select_playlist = select_playlist
+
+def forbid_bedrock(prompt):
+    raise AssertionError('게시한 플레이리스트의 콘텐츠는 다시 생성하지 않아야 함')
+
+def history_rows(csv_dir):
+    return len(pd.read_csv(os.path.join(csv_dir, 'track_usage_history.csv'), encoding='utf-8-sig'))
+
+def test_cache_round_trip_and_unreadable_entries(tmp_path):
+    cache = PlaylistCache(str(tmp_path))
+    assert cache.get('missing') is None
+
+    cache.put('key', {'track_ids': [3, 1, 2], 'published': False})
+
+    assert cache.get('key') == {'track_ids': [3, 1, 2], 'published': False}
+    with open(cache.path('key'), 'w', encoding='utf-8') as f:
+        f.write('{broken')
+    assert cache.get('key') is None
+
+def test_catalog_version_follows_table_and_usage():
+    frame = pd.DataFrame({'track_id': [1, 2, 3], 'bpm': [70.0, 80.0, 90.0], 'genre': ['Lo-fi Jazz', 'Chillhop', 'Lo-fi Jazz']})
+    table = TrackTable.from_frame(frame)
+    version = catalog_version(table, {1: 2, 3: 1})
+
+    assert catalog_version(TrackTable.from_frame(frame), {3: 1, 1: 2}) == version
+    assert catalog_version(table, {1: 2, 3: 2}) != version
+    assert catalog_version(table, {1: 2, 3: 1, 2: 1}) != version
+    assert catalog_version(TrackTable.from_frame(frame.assign(genre=['Lo-fi Jazz', 'Lo-fi Jazz', 'Chillhop'])), {1: 2, 3: 1}) != version
+
+def test_same_seed_returns_cached_playlist(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=400, uses=800)
+    first = playlist_generator(random_seed=7, dry_run=True).create_playlist()
+
+    generator = playlist_generator(random_seed=7, dry_run=True)
+    generator.load_tracks_from_csv()
+    forbid_selection(generator)
+    second = generator.create_playlist()
+
+    assert ids(second) == ids(first)
+    assert second['chapters'] == first['chapters']
+
+def test_different_seed_gives_different_order(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=400, uses=800)
+
+    first = playlist_generator(random_seed=7, dry_run=True).create_playlist()
+    second = playlist_generator(random_seed=8, dry_run=True).create_playlist()
+
+    assert ids(first) != ids(second)
+    assert len(os.listdir(tmp_path / 'csv_output' / 'playlist_cache')) == 2
+
+def test_usage_change_invalidates_cache(tmp_path, playlist_generator):
+    csv_dir = str(tmp_path / 'csv_output')
+    write_catalog(csv_dir, n=400, uses=800)
+    first = playlist_generator(random_seed=7, dry_run=True).create_playlist()
+
+    # 다른 플레이리스트로 사용 이력이 바뀌면 카탈로그 버전이 달라져 다시 고름
+    UsageHistory(csv_dir).append([
+        {'track_id': track_id, 'title': '', 'artist': '', 'used_at': '2026-02-01 00:00:00', 'playlist_id': 'other'}
+        for track_id in ids(first)[:3]
+    ])
+    generator = playlist_generator(random_seed=7, dry_run=True)
+    selected = []
+    select_playlist = generator.select_playlist
+    generator.select_playlist = lambda *args, **kwargs: selected.append(True) or select_playlist(*args, **kwargs)
+
+    second = generator.create_playlist()
+
+    assert selected
+    assert ids(second)[:3] != ids(first)[:3]
+
+def test_published_playlist_is_not_recorded_twice(tmp_path, playlist_generator, monkeypatch):
+    csv_dir = str(tmp_path / 'csv_output')
+    write_catalog(csv_dir, n=400, uses=800)
+    first = playlist_generator(random_seed=7).create_playlist()
+    rows = history_rows(csv_dir)
+    playlist_files = sorted(f for f in os.listdir(csv_dir) if f.startswith('playlist_tracks_'))
+    assert len(playlist_files) == 1
+
+    generator = playlist_generator(random_seed=7)
+    generator.load_tracks_from_csv()
+    forbid_selection(generator)
+    monkeypatch.setattr(generator, 'get_bedrock_response', forbid_bedrock)
+    second = generator.create_playlist()
+
+    assert ids(second) == ids(first) and second['content'] == first['content']
+    assert history_rows(csv_dir) == rows
+    assert sorted(f for f in os.listdir(csv_dir) if f.startswith('playlist_tracks_')) == playlist_files
+
+def test_dry_run_records_nothing(tmp_path, playlist_generator):
+    csv_dir = str(tmp_path / 'csv_output')
+    write_catalog(csv_dir, n=400, uses=800)
+    rows = history_rows(csv_dir)
+
+    result = playlist_generator(random_seed=7, dry_run=True).create_playlist()
+
+    assert result['playlist'] and result['chapters']
+    assert history_rows(csv_dir) == rows
+    assert not [f for f in os.listdir(csv_dir) if f.startswith('playlist_tracks_')]
+    # 시험 실행 결과는 게시하지 않은 항목으로 캐시되어, 같은 시드로 게시하면 그때 이력을 기록함
+    published = playlist_generator(random_seed=7).create_playlist()
+    assert ids(published) == ids(result)
+    assert history_rows(csv_dir) == rows + len(result['playlist'])
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from conftest import write_catalog
+from playlist_constraints import ConstrainedSelector, PlaylistConstraints, spacing_violations
+from playlist_selection import TrackSelector
+
+def make_candidates(n, artists, seed=0):
+    rng = np.random.default_rng(seed)
+    durations = rng.integers(90, 240, n) * 1000
+    artist_codes = rng.integers(0, artists, n)
+    genres = rng.choice(['Lo-fi Jazz', 'Lo-fi Hip Hop', 'Chillhop'], n)
+    return durations, artist_codes, genres
+
+def pick_all(selector, target_ms):
+    picks, current = [], 0
+    while current < target_ms:
+        position = selector.pick(target_ms - current)
+        if position is None:
+            break
+        picks.append(position)
+        current += selector.durations[position]
+    return picks
+
+def artist_codes(playlist):
+    codes = {}
+    return np.array([codes.setdefault(track['artist'], len(codes)) for track in playlist])
+
+def test_spacing_violations():
+    assert spacing_violations([0, 1, 0, 1], 1) == 0
+    assert spacing_violations([0, 1, 0, 1], 2) == 2
+    assert spacing_violations([0, 0, 0], 5) == 3
+    assert spacing_violations([-1, -1, 2], 3) == 0
+    assert spacing_violations([], 3) == 0 and spacing_violations([4], 3) == 0
+
+@pytest.mark.parametrize('seed', range(5))
+def test_artist_gap_is_kept_when_feasible(seed):
+    durations, artists, genres = make_candidates(300, 40, seed)
+
+    selector = ConstrainedSelector(durations, artists, genres, PlaylistConstraints(artist_gap=4))
+    picks = pick_all(selector, 3 * 3600000)
+
+    assert len(picks) == len(set(picks))
+    assert spacing_violations(artists[picks], 4) == 0
+    assert selector.relaxed == 0
+
+def test_gap_is_relaxed_instead_of_running_dry():
+    durations, _, genres = make_candidates(30, 1)
+    artists = np.arange(30) % 2
+
+    selector = ConstrainedSelector(durations, artists, genres, PlaylistConstraints(artist_gap=3))
+    picks = pick_all(selector, 10**9)
+
+    assert sorted(picks) == list(range(30))
+    assert selector.relaxed > 0
+    assert spacing_violations(artists[picks], 1) == 0
+
+@pytest.mark.parametrize('seed', range(3))
+def test_genre_ratios_are_followed_while_picking(seed):
+    durations, artists, genres = make_candidates(600, 60, seed)
+    ratios = {'Lo-fi Jazz': 0.5, 'Lo-fi Hip Hop': 0.3, 'Chillhop': 0.2}
+
+    selector = ConstrainedSelector(durations, artists, genres, PlaylistConstraints(artist_gap=2, genre_ratios=ratios))
+    picks = pick_all(selector, 5 * 3600000)
+
+    # 매 선택 시점의 장르별 개수가 목표 비율과 한 곡 넘게 차이 나지 않음
+    counts = dict.fromkeys(ratios, 0)
+    for total, position in enumerate(picks, 1):
+        counts[genres[position]] += 1
+        assert all(abs(counts[genre] - ratio * total) <= 1 for genre, ratio in ratios.items())
+
+def test_without_constraints_matches_plain_selector():
+    durations, artists, genres = make_candidates(200, 20)
+
+    constrained = pick_all(ConstrainedSelector(durations, artists, genres, PlaylistConstraints()), 4 * 3600000)
+
+    selector, plain, current = TrackSelector(durations), [], 0
+    while current < 4 * 3600000:
+        position = selector.pick(4 * 3600000 - current)
+        plain.append(position)
+        current += durations[position]
+    assert constrained == plain
+
+def test_candidate_mask_and_ratio_normalisation():
+    constraints = PlaylistConstraints(genre_ratios={'Lo-fi Jazz': 3, 'Lo-fi Hip Hop': 1, 'Chillhop': 0}, drum_range=(0.1, 0.2))
+
+    assert constraints.genre_ratios == {'Lo-fi Jazz': 0.75, 'Lo-fi Hip Hop': 0.25}
+    mask = constraints.candidate_mask(
+        np.array([0.05, 0.1, 0.15, 0.2, 0.25, 0.15]),
+        np.array(['Lo-fi Jazz', 'Lo-fi Jazz', 'Lo-fi Hip Hop', 'Lo-fi Jazz', 'Lo-fi Jazz', 'Chillhop'], dtype=object)
+    )
+    assert mask.tolist() == [False, True, True, True, False, False]
+    assert not PlaylistConstraints(drum_range=(0.1, 0.2)).selection_active()
+    assert PlaylistConstraints(artist_gap=1).selection_active()
+    with pytest.raises(ValueError):
+        PlaylistConstraints(genre_ratios={'Lo-fi Jazz': 0})
+
+def test_playlist_meets_constraints_and_target(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=800)
+    constraints = PlaylistConstraints(artist_gap=3, genre_ratios={'Lo-fi Jazz': 0.6, 'Lo-fi Hip Hop': 0.4}, drum_range=(0.05, 0.25))
+    generator = playlist_generator(65, 100, 120, constraints=constraints, dry_run=True)
+
+    result = generator.create_playlist()
+
+    playlist = result['playlist']
+    assert not result['underfilled']
+    assert spacing_violations(artist_codes(playlist), 3) == 0
+    assert all(0.05 <= track['drum_intensity'] <= 0.25 for track in playlist)
+    assert {track['genre'] for track in playlist} == {'Lo-fi Jazz', 'Lo-fi Hip Hop'}
+    jazz = sum(track['genre'] == 'Lo-fi Jazz' for track in playlist)
+    assert abs(jazz - 0.6 * len(playlist)) <= 1
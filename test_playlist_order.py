@@ -0,0 +1,78 @@
+import time
+from itertools import permutations
+import numpy as np
+import pytest
+
+from playlist_constraints import spacing_violations
+from playlist_order import nearest_neighbor_path, order_tracks, path_cost, transition_matrix
+
+def make_tracks(n, seed=0, artists=None):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'track_id': i + 1,
+            'bpm': float(rng.uniform(65, 100)),
+            'drum_intensity': float(rng.uniform(0.01, 0.3)),
+            'harmonic_complexity': float(rng.uniform(0.2, 0.4)),
+            'genre': rng.choice(['Lo-fi Jazz', 'Lo-fi Hip Hop']),
+            'artist': f'Artist {rng.integers(0, artists or n)}',
+        }
+        for i in range(n)
+    ]
+
+def ordered_cost(tracks, ordered, start_bpm, end_bpm):
+    cost = transition_matrix(tracks, start_bpm, end_bpm)
+    index = {id(track): i + 1 for i, track in enumerate(tracks)}
+    return path_cost(cost, [0] + [index[id(track)] for track in ordered] + [len(tracks) + 1])
+
+@pytest.mark.parametrize('seed', range(5))
+def test_order_is_a_permutation_no_worse_than_nearest_neighbor(seed):
+    tracks = make_tracks(40, seed)
+
+    ordered = order_tracks(tracks, 70, 90)
+
+    assert sorted(track['track_id'] for track in ordered) == list(range(1, 41))
+    cost = transition_matrix(tracks, 70, 90)
+    assert ordered_cost(tracks, ordered, 70, 90) <= path_cost(cost, nearest_neighbor_path(cost)) + 1e-9
+
+def test_small_orders_are_optimal():
+    tracks = make_tracks(6, 1)
+
+    ordered = order_tracks(tracks, 70, 90)
+
+    best = min(ordered_cost(tracks, list(order), 70, 90) for order in permutations(tracks))
+    assert ordered_cost(tracks, ordered, 70, 90) == pytest.approx(best)
+
+def test_follows_bpm_when_other_features_match():
+    tracks = [{'track_id': i, 'bpm': bpm, 'drum_intensity': 0.1, 'harmonic_complexity': 0.3, 'genre': 'Lo-fi Jazz'}
+              for i, bpm in enumerate([88, 70, 81, 75, 92])]
+
+    assert [track['bpm'] for track in order_tracks(tracks, 70, 92)] == [70, 75, 81, 88, 92]
+    assert [track['bpm'] for track in order_tracks(tracks, 92, 70)] == [92, 88, 81, 75, 70]
+
+def test_artist_gap_never_adds_violations():
+    tracks = make_tracks(60, 2, artists=6)
+    codes = {}
+    def violations(order):
+        return spacing_violations(np.array([codes.setdefault(track['artist'], len(codes)) for track in order]), 3)
+
+    ordered = order_tracks(tracks, 70, 90, artist_gap=3)
+
+    assert violations(ordered) <= violations(tracks)
+    assert violations(ordered) < violations(order_tracks(tracks, 70, 90))
+
+def test_missing_features_and_tiny_inputs():
+    tracks = make_tracks(5, 3)
+    tracks[2]['drum_intensity'] = None
+    assert len(order_tracks(tracks, 70, 90)) == 5
+    assert order_tracks(tracks[:1], 70, 90) == tracks[:1]
+    assert order_tracks([], 70, 90) == []
+
+def test_orders_two_hundred_tracks_quickly():
+    tracks = make_tracks(200, 4)
+
+    start = time.perf_counter()
+    ordered = order_tracks(tracks, 70, 90)
+
+    assert time.perf_counter() - start < 1.0
+    assert len(ordered) == 200
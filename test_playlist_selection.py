@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from benchmark_selection import list_select, synth_candidates, tree_select
+from conftest import write_catalog
+from playlist_selection import MAX_TRACK_USES, DurationIndex, TrackSelector, exact_fill, usage_bucket_order
+
+def baseline_playlist(tracks, usage_counts, start_bpm, end_bpm, target_ms):
+    """이전 create_playlist의 선택 (고를 때마다 남은 후보 전체를 다시 훑음)"""
+    candidates = tracks[tracks['bpm'].between(start_bpm, end_bpm)].sort_values('bpm', kind='stable')
+    candidates = candidates.assign(usage=candidates['track_id'].map(usage_counts).fillna(0))
+    candidates = candidates.sort_values('usage', kind='stable')
+    available = candidates[candidates['usage'] < MAX_TRACK_USES].to_dict('records')
+    playlist, current = [], 0
+    while current < target_ms and available:
+        suitable = [t for t in available if t['duration_ms'] <= target_ms - current]
+        track = suitable[0] if suitable else min(available, key=lambda t: t['duration_ms'])
+        available.remove(track)
+        playlist.append(track['track_id'])
+        current += track['duration_ms']
+    return playlist
+
+@pytest.mark.parametrize('start_bpm, end_bpm, minutes', [(70, 85, 120), (80, 90, 60), (65, 100, 240), (90, 91, 30), (60, 70, 600)])
+def test_selection_matches_baseline(tmp_path, playlist_generator, start_bpm, end_bpm, minutes):
+    tracks = write_catalog(str(tmp_path / 'csv_output'), n=600, uses=1200)
+    generator = playlist_generator(start_bpm, end_bpm, minutes, order_mode='selection')
+    assert generator.load_tracks_from_csv()
+
+    playlist = generator.select_playlist()
+
+    expected = baseline_playlist(tracks, generator.usage_history.usage_counts(), start_bpm, end_bpm, minutes * 60000)
+    assert [track['track_id'] for track in playlist] == expected
+
+@pytest.mark.parametrize('seed', range(5))
+def test_selector_matches_list_scan(seed):
+    tracks = synth_candidates(2000, seed)
+    for hours in (0.5, 24, 200):
+        assert tree_select(tracks, int(hours * 3600000)) == list_select(tracks, int(hours * 3600000))
+
+def test_duration_index_tracks_removals_and_missing_durations():
+    rng = np.random.default_rng(0)
+    durations = rng.integers(1, 50, 37).astype(float)
+    durations[[3, 8]] = np.nan
+    index = DurationIndex(durations)
+    remaining = {i: d for i, d in enumerate(durations) if not np.isnan(d)}
+    assert len(index) == len(remaining)
+
+    for _ in range(20):
+        limit = int(rng.integers(1, 50))
+        fits = [i for i, d in remaining.items() if d <= limit]
+        assert index.first_at_most(limit) == (fits[0] if fits else -1)
+        assert index.shortest() == min(remaining.values())
+        position = int(rng.choice(list(remaining)))
+        index.remove(position)
+        del remaining[position]
+        assert not index.contains(position)
+    index.add(3, 0.5)
+    assert index.first_at_most(1) == 3 and len(index) == len(remaining) + 1
+
+def test_selector_picks_shortest_when_nothing_fits():
+    selector = TrackSelector([300, 200, 250, 200])
+
+    assert selector.pick(100) == 1
+    assert selector.pick(260) == 2
+    assert selector.pick(100) == 3
+    assert selector.pick(1000) == 0
+    assert selector.pick(1000) is None
+
+def test_usage_buckets_match_stable_sort():
+    usage = np.random.default_rng(0).integers(0, 5, 200)
+
+    order = usage_bucket_order(usage)
+
+    expected = np.argsort(usage, kind='stable')
+    np.testing.assert_array_equal(order, expected[usage[expected] < MAX_TRACK_USES])
+    shuffled = usage_bucket_order(usage, np.random.default_rng(1))
+    assert sorted(shuffled) == sorted(order)
+    np.testing.assert_array_equal(usage[shuffled], usage[order])
+
+def brute_force_fill(durations, usage, target_ms, tolerance_ms):
+    """허용 범위 안인 조합 중 최소 사용 횟수 합 (없으면 None)"""
+    best = None
+    for mask in range(1, 1 << len(durations)):
+        picked = [i for i in range(len(durations)) if mask >> i & 1]
+        if abs(sum(durations[i] for i in picked) - target_ms) <= tolerance_ms:
+            cost = sum(usage[i] for i in picked)
+            best = cost if best is None else min(best, cost)
+    return best
+
+@pytest.mark.parametrize('seed', range(40))
+def test_exact_fill_finds_cheapest_combination(seed):
+    rng = np.random.default_rng(seed)
+    durations = (rng.integers(60, 300, 12) * 1000).tolist()
+    usage = rng.integers(0, 3, 12).tolist()
+    target_ms = int(rng.integers(300, 1500)) * 1000
+
+    positions = exact_fill(durations, usage, target_ms, tolerance_ms=5000)
+
+    best = brute_force_fill(durations, usage, target_ms, 5000)
+    if best is None:
+        assert positions is None
+    else:
+        assert positions == sorted(set(positions))
+        assert abs(sum(durations[i] for i in positions) - target_ms) <= 5000
+        assert sum(usage[i] for i in positions) == best
+
+@pytest.mark.parametrize('seed', range(40))
+def test_exact_fill_stays_within_tolerance_with_millisecond_durations(seed):
+    # 초 단위 반올림 오차가 쌓여도 실제 ms 합이 허용 범위를 벗어나지 않음
+    rng = np.random.default_rng(seed)
+    durations = (rng.integers(60, 300, 40) * 1000 + rng.choice([-499, 499, 500, -500], 40)).tolist()
+    target_ms = int(rng.integers(1000, 4000)) * 1000
+
+    positions = exact_fill(durations, [0] * 40, target_ms, tolerance_ms=1000)
+
+    if positions is not None:
+        assert abs(sum(durations[i] for i in positions) - target_ms) <= 1000
+
+def test_exact_fill_returns_none_when_target_is_out_of_reach():
+    assert exact_fill([100000, 200000], [0, 0], 1000000, tolerance_ms=10000) is None
+    assert exact_fill([100000, 200000], [0, 0], 150000, tolerance_ms=10000) is None
+    assert exact_fill([100000], [0], 0, tolerance_ms=0) is None
+
+@pytest.mark.parametrize('minutes', [30, 60, 120])
+def test_exact_mode_playlist_hits_target(tmp_path, playlist_generator, minutes):
+    write_catalog(str(tmp_path / 'csv_output'), n=600, uses=1200)
+    generator = playlist_generator(70, 85, minutes, fill_mode='exact', duration_tolerance_seconds=3, dry_run=True)
+
+    result = generator.create_playlist()
+
+    total = sum(track['duration_ms'] for track in result['playlist'])
+    assert abs(total - minutes * 60000) <= 3000
+    assert not result['underfilled']
@@ -0,0 +1,138 @@
+import os
+import numpy as np
+import pandas as pd
+
+from conftest import write_catalog
+from similarity_index import SIMILARITY_FEATURES, SimilarityIndex, feature_arrays, load_similarity_index, similarity_index_path
+from track_catalog import load_track_catalog
+
+def make_tracks(n, seed=0, first_id=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'track_id': np.arange(first_id, first_id + n),
+        'bpm': rng.uniform(65, 100, n),
+        'drum_intensity': rng.uniform(0.01, 0.3, n),
+        'harmonic_complexity': rng.uniform(0.2, 0.4, n),
+    })
+
+def brute_force(index, points, track_id, k, include_self):
+    """인덱스와 같은 정규화 기준으로 전체 트랙과의 거리를 계산한 k-최근접 이웃"""
+    ids = list(points)
+    matrix = index.normalize(np.array([points[i] for i in ids]))
+    distances = np.sqrt(((matrix - index.normalize(points[track_id])) ** 2).sum(axis=1))
+    ranked = [(ids[i], distances[i]) for i in np.argsort(distances, kind='stable')]
+    if not include_self:
+        ranked = [item for item in ranked if item[0] != track_id]
+    return ranked[:k]
+
+def assert_matches_brute_force(index, points, k=7):
+    for track_id in list(points)[::13]:
+        for include_self in (True, False):
+            result = index.neighbors(track_id, k, include_self=include_self)
+            expected = brute_force(index, points, track_id, k, include_self)
+            assert [i for i, _ in result] == [i for i, _ in expected]
+            np.testing.assert_allclose([d for _, d in result], [d for _, d in expected], atol=1e-9)
+
+def test_neighbors_match_brute_force():
+    tracks = make_tracks(500)
+    index = SimilarityIndex.from_tracks(tracks)
+
+    points = dict(zip(*feature_arrays(tracks)))
+    assert len(index) == 500
+    assert_matches_brute_force(index, {int(i): p for i, p in points.items()})
+    assert index.neighbors(1, 3, include_self=True)[0] == (1, 0.0)
+    assert index.neighbors(10**6, 3) == []
+
+def test_upserts_and_removals_match_brute_force():
+    tracks = make_tracks(500)
+    index = SimilarityIndex.from_tracks(tracks)
+    points = {int(i): p for i, p in zip(*feature_arrays(tracks))}
+
+    # 변경 트랙과 새 트랙은 트리를 다시 만들지 않고 추가 목록에 둠
+    changed = make_tracks(20, seed=1, first_id=1).assign(track_id=np.arange(1, 400, 20))
+    added = make_tracks(10, seed=2, first_id=1001)
+    index.upsert(pd.concat([changed, added]).to_dict('records'))
+    index.remove([2, 3, 1005])
+    assert index.pending and index.deleted
+    for i, p in zip(*feature_arrays(pd.concat([changed, added]))):
+        points[int(i)] = p
+    for i in (2, 3, 1005):
+        del points[i]
+
+    assert len(index) == len(points)
+    assert_matches_brute_force(index, points)
+    assert index.neighbors(2, 3) == []
+
+def test_many_changes_rebuild_the_tree():
+    tracks = make_tracks(100)
+    index = SimilarityIndex.from_tracks(tracks)
+
+    index.upsert(make_tracks(150, seed=1, first_id=101).to_dict('records'))
+
+    assert not index.pending and not index.deleted
+    assert len(index.track_ids) == 250
+    assert_matches_brute_force(index, {int(i): p for i, p in zip(index.track_ids, index.points)})
+
+def test_save_and_load_keep_pending_tracks(tmp_path):
+    index = SimilarityIndex.from_tracks(make_tracks(500))
+    index.upsert(make_tracks(5, seed=1, first_id=1001).to_dict('records'))
+    index.remove([1, 2])
+    path = str(tmp_path / 'index.npz')
+
+    index.save(path)
+    loaded = SimilarityIndex.load(path)
+
+    assert len(loaded) == len(index) == 503
+    for track_id in (3, 1001, 1004):
+        assert loaded.neighbors(track_id, 5) == index.neighbors(track_id, 5)
+    (tmp_path / 'broken.npz').write_bytes(b'not an index')
+    assert SimilarityIndex.load(str(tmp_path / 'broken.npz')) is None
+    assert SimilarityIndex.load(str(tmp_path / 'missing.npz')) is None
+
+def test_tracks_without_features_are_left_out():
+    tracks = make_tracks(6).assign(analysis_profile='default')
+    tracks.loc[1, 'analysis_profile'] = 'metadata'
+    tracks.loc[2, 'bpm'] = 0
+    tracks.loc[3, 'drum_intensity'] = np.nan
+
+    track_ids, points = feature_arrays(tracks)
+
+    assert track_ids.tolist() == [1, 5, 6]
+    assert points.shape == (3, len(SIMILARITY_FEATURES))
+
+def test_index_is_rebuilt_when_catalog_changes(tmp_path):
+    csv_dir = str(tmp_path)
+    write_catalog(csv_dir, n=200)
+    first = load_similarity_index(csv_dir, load_track_catalog(csv_dir))
+    assert len(first) == 200 and os.path.exists(similarity_index_path(csv_dir))
+    saved_at = os.path.getmtime(similarity_index_path(csv_dir))
+
+    # 카탈로그와 트랙 수가 같으면 저장된 인덱스를 그대로 씀
+    assert len(load_similarity_index(csv_dir, load_track_catalog(csv_dir))) == 200
+    assert os.path.getmtime(similarity_index_path(csv_dir)) == saved_at
+
+    write_catalog(csv_dir, n=240, seed=1)
+    rebuilt = load_similarity_index(csv_dir, load_track_catalog(csv_dir))
+
+    assert len(rebuilt) == 240
+    tracks = pd.read_csv(os.path.join(csv_dir, 'tracks.csv'), encoding='utf-8-sig')
+    assert_matches_brute_force(rebuilt, {int(i): p for i, p in zip(*feature_arrays(tracks))})
+
+def test_seed_tracks_limit_playlist_to_neighbors(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=400)
+    generator = playlist_generator(65, 100, 30, seed_track_ids=[5, 50], seed_neighbors=20)
+    assert generator.load_tracks_from_csv()
+
+    playlist = generator.select_playlist()
+
+    index = generator.similarity_index
+    allowed = {i for seed in (5, 50) for i, _ in index.neighbors(seed, 20, include_self=True)}
+    assert playlist and {track['track_id'] for track in playlist} <= allowed
+
+def test_unknown_seed_track_gives_no_playlist(tmp_path, playlist_generator):
+    write_catalog(str(tmp_path / 'csv_output'), n=100)
+
+    generator = playlist_generator(65, 100, 30, seed_track_ids=[10**6])
+    assert generator.load_tracks_from_csv()
+
+    assert generator.select_playlist() is None
@@ -0,0 +1,64 @@
+import numpy as np
+import librosa
+import pytest
+import scipy.ndimage
+
+from analyzer import LofiMusicAnalyzer
+from conftest import SR, synth_track
+from spectral import (
+    ENGINE_TOLERANCE, compute_spectral_features, compute_spectral_features_batch,
+    hpss_magnitude, median_filter_last_axis, onset_envelope
+)
+
+def spectrogram(bpm=90, seconds=6, seed=0):
+    return np.abs(librosa.stft(synth_track(bpm, seconds, seed), n_fft=2048, hop_length=512))
+
+@pytest.mark.parametrize('kernel_size', [3, 31])
+def test_median_filter_matches_scipy(kernel_size):
+    S = np.random.default_rng(0).random((2, 40, 90)).astype(np.float32)
+
+    expected = scipy.ndimage.median_filter(S, size=(1, 1, kernel_size), mode='reflect')
+
+    np.testing.assert_array_equal(median_filter_last_axis(S, kernel_size), expected)
+
+def test_hpss_matches_librosa():
+    S = spectrogram()
+
+    harmonic, percussive = hpss_magnitude(S)
+    expected_harmonic, expected_percussive = librosa.decompose.hpss(S)
+
+    np.testing.assert_allclose(harmonic, expected_harmonic, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(percussive, expected_percussive, rtol=1e-5, atol=1e-6)
+
+def test_onset_envelope_matches_beat_track():
+    y = synth_track(100, 6, 1)
+    S = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+
+    # beat_track은 onset_strength(y=...)의 기본 설정(로그 멜, aggregate=np.median)을 사용
+    expected = librosa.onset.onset_strength(y=y, sr=SR, hop_length=512, aggregate=np.median)
+
+    np.testing.assert_allclose(onset_envelope(S, SR, 2048, 512), expected, rtol=1e-5, atol=1e-5)
+
+def test_batch_matches_single_track():
+    # 조용한 트랙을 섞어 트랙별 dB 클리핑 기준이 지켜지는지 확인
+    Y = np.stack([synth_track(bpm, 6, seed) * gain for seed, (bpm, gain) in enumerate([(70, 1.0), (95, 0.01), (120, 0.5)])])
+
+    batch = compute_spectral_features_batch(Y, SR)
+
+    for y, features in zip(Y, batch):
+        single = compute_spectral_features(y, SR)
+        assert features['tempo'] == single['tempo']
+        assert features['percussive_rms'] == pytest.approx(single['percussive_rms'], rel=1e-5)
+        assert features['chroma_complexity'] == pytest.approx(single['chroma_complexity'], rel=1e-5)
+
+def test_shared_engine_within_tolerance_of_legacy(tmp_path):
+    analyzer = LofiMusicAnalyzer(str(tmp_path), workers=1, use_cache=False)
+    for seed, bpm in enumerate([72, 88, 118]):
+        y = synth_track(bpm, 10, seed)
+
+        legacy = analyzer.analyze_genre_legacy(y, SR)
+        shared = analyzer.classify_genre(**compute_spectral_features(y, SR))
+
+        assert abs(analyzer.adjust_bpm(shared['tempo']) - analyzer.adjust_bpm(legacy['tempo'])) <= ENGINE_TOLERANCE['bpm']
+        assert abs(shared['drum_intensity'] - legacy['drum_intensity']) <= ENGINE_TOLERANCE['drum_intensity_rel'] * max(legacy['drum_intensity'], 1e-3)
+        assert abs(shared['harmonic_complexity'] - legacy['harmonic_complexity']) <= ENGINE_TOLERANCE['harmonic_complexity_abs']
@@ -0,0 +1,57 @@
+import tracemalloc
+import pytest
+import soundfile as sf
+
+from conftest import SR, synth_track
+from spectral import compute_spectral_features
+from streaming import stream_spectral_features
+
+def write_wav(tmp_path, name, bpm, seconds, seed=0):
+    path = str(tmp_path / name)
+    sf.write(path, synth_track(bpm, seconds, seed), SR)
+    return path
+
+def test_matches_whole_track_analysis(tmp_path):
+    y = synth_track(92, 20, 0)
+    path = str(tmp_path / 'a.wav')
+    sf.write(path, y, SR, subtype='FLOAT')
+
+    streamed = stream_spectral_features(path)
+    whole = compute_spectral_features(y, SR)
+
+    assert streamed['tempo'] == whole['tempo']
+    assert streamed['percussive_rms'] == pytest.approx(whole['percussive_rms'], rel=0.02)
+    assert streamed['chroma_complexity'] == pytest.approx(whole['chroma_complexity'], abs=0.005)
+    assert streamed['duration_seconds'] == pytest.approx(20)
+
+def test_block_size_does_not_change_results(tmp_path):
+    path = write_wav(tmp_path, 'a.wav', 80, 20)
+
+    small = stream_spectral_features(path, block_frames=32)
+    large = stream_spectral_features(path, block_frames=1024)
+
+    assert small['tempo'] == large['tempo']
+    for key in ('percussive_rms', 'rms', 'onset_mean', 'onset_std', 'chroma_complexity', 'duration_seconds'):
+        assert small[key] == pytest.approx(large[key], rel=5e-3), key
+
+def test_leaves_caller_owned_file_open(tmp_path):
+    path = write_wav(tmp_path, 'a.wav', 80, 10)
+
+    with sf.SoundFile(path) as sound_file:
+        stream_spectral_features(sound_file)
+        assert not sound_file.closed
+
+def test_memory_does_not_grow_with_track_length(tmp_path):
+    short = write_wav(tmp_path, 'short.wav', 90, 30)
+    long = write_wav(tmp_path, 'long.wav', 90, 240)
+
+    def peak(path):
+        tracemalloc.start()
+        try:
+            stream_spectral_features(path)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # 곡 길이가 8배여도 최대 메모리는 거의 같음 (곡 전체를 올리면 240초 float32만 21MB)
+    assert peak(long) < peak(short) * 1.5
@@ -0,0 +1,118 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+from track_catalog import TrackCatalog, TrackTable, load_track_catalog
+
+def make_frames(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    tracks = pd.DataFrame({
+        'track_id': rng.permutation(np.arange(1, n + 1) * 3),
+        'title': [f'Song {i}' for i in range(n)],
+        'artist': [f'Artist {i}' for i in rng.integers(0, 20, n)],
+        'bpm': rng.integers(60, 100, n).astype(float),
+        'duration_ms': rng.integers(60000, 240000, n),
+        'folder_name': [f'{i}th' for i in rng.integers(4, 14, n)],
+        'genre': rng.choice(['Lo-fi Jazz', 'Lo-fi Hip Hop'], n),
+    })
+    tracks.loc[::17, 'bpm'] = np.nan
+    episodes = pd.DataFrame({'episode_id': [1, 2], 'episode_name': ['1st', '2nd'], 'created_at': ['', '']})
+    order = rng.permutation(10)
+    track_episodes = pd.DataFrame({
+        'track_episode_id': range(1, 11),
+        'track_id': tracks['track_id'].iloc[:10],
+        'episode_id': [1] * 5 + [2] * 5,
+        'order_in_episode': order,
+    })
+    return tracks, episodes, track_episodes
+
+def ids(rows):
+    return [row['track_id'] for row in rows]
+
+@pytest.fixture
+def frames():
+    return make_frames()
+
+@pytest.fixture
+def catalog(frames):
+    return TrackCatalog(*frames)
+
+def test_lookups_match_linear_scan(frames, catalog):
+    tracks = frames[0]
+    for _, track in tracks.sample(30, random_state=0).iterrows():
+        assert catalog.get(track['track_id'])['title'] == track['title']
+        assert catalog.find(track['title'], track['artist'])['track_id'] == track['track_id']
+    assert catalog.get(2) is None and catalog.get(10**6) is None
+    assert catalog.find('Song 0', 'Nobody') is None
+
+    for artist in tracks['artist'].unique():
+        assert ids(catalog.artist_tracks(artist)) == tracks[tracks['artist'] == artist]['track_id'].tolist()
+    assert ids(catalog.folder_tracks('5th')) == tracks[tracks['folder_name'] == '5th']['track_id'].tolist()
+    assert catalog.folder_tracks('99th') == []
+
+def test_range_queries_match_sorted_filter(frames, catalog):
+    tracks = frames[0]
+
+    expected = tracks[tracks['bpm'].between(70, 85)].sort_values('bpm', kind='stable')
+    assert ids(catalog.bpm_range(70, 85)) == expected['track_id'].tolist()
+
+    expected = tracks[tracks['duration_ms'] <= 120000].sort_values('duration_ms', kind='stable')
+    assert ids(catalog.duration_at_most(120000)) == expected['track_id'].tolist()
+    assert catalog.shortest()['duration_ms'] == tracks['duration_ms'].min()
+
+def test_episode_tracks_follow_play_order(frames, catalog):
+    _, _, track_episodes = frames
+
+    for episode_id, name in ((1, '1st'), (2, '2nd')):
+        rows = track_episodes[track_episodes['episode_id'] == episode_id].sort_values('order_in_episode')
+        assert ids(catalog.episode_tracks(name)) == rows['track_id'].tolist()
+    assert catalog.episode_tracks('3rd') == []
+
+def test_shared_catalog_is_rebuilt_only_when_csv_changes(tmp_path):
+    tracks, episodes, track_episodes = make_frames(20)
+    for name, df in (('tracks.csv', tracks), ('episodes.csv', episodes), ('track_episodes.csv', track_episodes)):
+        df.to_csv(tmp_path / name, index=False, encoding='utf-8-sig')
+
+    first = load_track_catalog(str(tmp_path))
+    assert load_track_catalog(str(tmp_path)) is first
+
+    tracks.iloc[:10].to_csv(tmp_path / 'tracks.csv', index=False, encoding='utf-8-sig')
+    assert len(load_track_catalog(str(tmp_path))) == 10
+
+def test_rows_read_back_the_frame_values():
+    tracks, _, _ = make_frames(50)
+    tracks.loc[3, 'genre'] = None
+    table = TrackTable.from_frame(tracks)
+
+    for index, expected in enumerate(tracks.to_dict('records')):
+        row = dict(table.row(index))
+        assert row.keys() == expected.keys()
+        for key, value in expected.items():
+            if pd.isna(value):
+                assert pd.isna(row[key]), key
+            else:
+                assert row[key] == value and type(row[key]) is type(value), key
+    np.testing.assert_array_equal(table.values('artist', [0, 5]), tracks['artist'].to_numpy()[[0, 5]])
+    assert table.code('artist', 'Nobody') == -1
+
+def test_track_rows_behave_like_a_list():
+    tracks, _, _ = make_frames(10)
+    catalog = TrackCatalog(tracks)
+
+    assert len(catalog.tracks) == 10
+    assert catalog.tracks[-1]['title'] == 'Song 9'
+    assert [row['title'] for row in catalog.tracks[2:4]] == ['Song 2', 'Song 3']
+    assert [row['track_id'] for row in catalog] == tracks['track_id'].tolist()
+    with pytest.raises(IndexError):
+        catalog.tracks[10]
+    with pytest.raises(KeyError):
+        catalog.tracks[0]['missing']
+
+def test_table_is_smaller_than_row_dicts():
+    tracks, _, _ = make_frames(5000)
+    table = TrackTable.from_frame(tracks)
+
+    records = tracks.to_dict('records')
+    dict_bytes = sum(sys.getsizeof(record) + sum(sys.getsizeof(v) for v in record.values()) for record in records)
+    assert table.nbytes() * 3 < dict_bytes
@@ -0,0 +1,51 @@
+import os
+import pytest
+
+from catalog_db import CatalogDB
+from usage_history import UsageHistory
+
+RECORDS = [
+    {'track_id': 1, 'title': 'Rain', 'artist': 'A', 'used_at': '2024-01-02 10:00:00', 'playlist_id': 'p2'},
+    {'track_id': 2, 'title': 'Dawn', 'artist': 'B', 'used_at': '2024-01-01 10:00:00', 'playlist_id': 'p1'},
+    # 더 이전 시각의 기록이 나중에 추가되어도 마지막 사용은 바뀌지 않음
+    {'track_id': 1, 'title': 'Rain', 'artist': 'A', 'used_at': '2024-01-01 10:00:00', 'playlist_id': 'p1'},
+    # 같은 시각이면 나중에 추가된 기록
+    {'track_id': 2, 'title': 'Dawn', 'artist': 'B', 'used_at': '2024-01-01 10:00:00', 'playlist_id': 'p3'},
+]
+
+EXPECTED = {
+    1: {'track_id': 1, 'use_count': 2, 'last_used_at': '2024-01-02 10:00:00', 'last_playlist_id': 'p2'},
+    2: {'track_id': 2, 'use_count': 2, 'last_used_at': '2024-01-01 10:00:00', 'last_playlist_id': 'p3'},
+}
+
+@pytest.fixture(params=['csv', 'catalog'])
+def history(request, tmp_path):
+    catalog = CatalogDB(str(tmp_path / 'catalog.sqlite3')) if request.param == 'catalog' else None
+    yield UsageHistory(str(tmp_path), catalog)
+    if catalog is not None:
+        catalog.close()
+
+def test_appends_keep_aggregates_in_sync(history):
+    for record in RECORDS:
+        history.append([record])
+
+    assert history.load_stats() == EXPECTED
+    assert history.usage_counts() == {1: 2, 2: 2}
+
+def test_incremental_aggregates_match_full_rebuild(tmp_path):
+    history = UsageHistory(str(tmp_path))
+    history.append(RECORDS[:2])
+    history.append(RECORDS[2:])
+
+    assert history.rebuild_stats() == history.load_stats() == EXPECTED
+
+def test_rebuilds_stale_aggregates(tmp_path):
+    history = UsageHistory(str(tmp_path))
+    history.append(RECORDS[:2])
+    # 집계 저장 전에 중단된 것처럼 이력만 직접 추가
+    with open(history.history_path, 'a', encoding='utf-8') as f:
+        f.write('1,Rain,A,2024-01-03 10:00:00,p4\n')
+    stat = os.stat(history.stats_path)
+    os.utime(history.history_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert history.load_stats()[1] == {'track_id': 1, 'use_count': 2, 'last_used_at': '2024-01-03 10:00:00', 'last_playlist_id': 'p4'}
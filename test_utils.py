@@ -0,0 +1,61 @@
+import os
+import pytest
+
+from utils import CsvFileSet, REQUIRED_CSV_COLUMNS
+
+def write_csvs(csv_dir, rows=1):
+    csv_dir.mkdir(exist_ok=True)
+    for file_name, columns in REQUIRED_CSV_COLUMNS.items():
+        lines = [','.join(columns)] + [','.join(str(i + 1) for i in range(len(columns)))] * rows
+        (csv_dir / file_name).write_text('﻿' + '\n'.join(lines) + '\n', encoding='utf-8')
+
+def test_accepts_complete_csvs(tmp_path):
+    write_csvs(tmp_path)
+
+    assert CsvFileSet(str(tmp_path)).validate()
+
+@pytest.mark.parametrize('content', [
+    '',
+    'track_id,title\n1,Rain\n',
+    ','.join(REQUIRED_CSV_COLUMNS['tracks.csv']) + '\n',
+])
+def test_rejects_empty_incomplete_or_header_only_files(tmp_path, content):
+    write_csvs(tmp_path)
+    (tmp_path / 'tracks.csv').write_text(content, encoding='utf-8')
+
+    assert not CsvFileSet(str(tmp_path)).validate()
+
+def test_rejects_missing_file(tmp_path):
+    write_csvs(tmp_path)
+    os.remove(tmp_path / 'episodes.csv')
+
+    assert not CsvFileSet(str(tmp_path)).validate()
+
+def test_unchanged_files_are_not_reopened(tmp_path, monkeypatch):
+    write_csvs(tmp_path)
+    assert CsvFileSet(str(tmp_path)).validate()
+
+    monkeypatch.setattr(CsvFileSet, 'read_head', lambda self, file_name: pytest.fail(f'{file_name}을 다시 읽음'))
+
+    assert CsvFileSet(str(tmp_path)).validate()
+
+def test_changed_file_is_checked_again(tmp_path):
+    write_csvs(tmp_path)
+    assert CsvFileSet(str(tmp_path)).validate()
+
+    (tmp_path / 'episodes.csv').write_text('episode_id,episode_name\n1,1st\n', encoding='utf-8')
+
+    assert not CsvFileSet(str(tmp_path)).validate()
+
+def test_frame_is_reparsed_only_after_change(tmp_path):
+    write_csvs(tmp_path, rows=2)
+    files = CsvFileSet(str(tmp_path))
+    assert files.validate()
+
+    first = files.frame('tracks.csv')
+    assert files.frame('tracks.csv') is first
+    assert files.load_manifest()['tracks.csv']['row_count'] == 2
+
+    write_csvs(tmp_path, rows=3)
+    os.utime(tmp_path / 'tracks.csv', ns=(0, os.stat(tmp_path / 'tracks.csv').st_mtime_ns + 10**9))
+    assert len(files.frame('tracks.csv')) == 3
@@ -0,0 +1,243 @@
+import os
+import logging
+from collections.abc import Mapping, Sequence
+import numpy as np
+import pandas as pd
+
+from catalog_db import open_catalog
+from utils import csv_files
+
+class TrackTable:
+    """열(column) 단위 numpy 배열로 저장한 트랙 테이블
+
+    숫자 컬럼은 numpy 배열 하나로, 문자열 컬럼(제목, 아티스트, 장르 등)은 고유값 목록과
+    int32 코드 배열로 저장한다. 행마다 딕셔너리를 만들지 않으므로 키 문자열이 반복되지 않고,
+    필터링은 배열 연산으로 처리한다.
+    """
+    def __init__(self, columns, vocab, length):
+        self.columns = columns
+        self.vocab = vocab
+        self.length = length
+        self.column_names = list(columns)
+        self._codes = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        columns = {}
+        vocab = {}
+        for name in df.columns:
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                columns[name] = series.to_numpy()
+            else:
+                # 같은 문자열은 코드 하나로 저장 (값이 없으면 -1)
+                codes, uniques = pd.factorize(series)
+                columns[name] = codes.astype(np.int32)
+                vocab[name] = np.asarray(uniques, dtype=object)
+        return cls(columns, vocab, len(df))
+
+    def __len__(self):
+        return self.length
+
+    def value(self, name, index):
+        """한 칸의 값 (파이썬 기본 타입, 문자열 값이 없으면 NaN)"""
+        value = self.columns[name][index]
+        if name in self.vocab:
+            return self.vocab[name][value] if value >= 0 else float('nan')
+        return value.item()
+
+    def values(self, name, indices=None):
+        """컬럼 값 배열 (문자열 컬럼은 코드를 풀어서 반환)"""
+        column = self.columns[name] if indices is None else self.columns[name][indices]
+        if name not in self.vocab:
+            return column
+        decoded = np.empty(len(column), dtype=object)
+        valid = column >= 0
+        decoded[valid] = self.vocab[name][column[valid]]
+        decoded[~valid] = float('nan')
+        return decoded
+
+    def code(self, name, value):
+        """문자열 값의 코드 (없으면 -1)"""
+        if name not in self._codes:
+            self._codes[name] = {v: code for code, v in enumerate(self.vocab[name])}
+        return self._codes[name].get(value, -1)
+
+    def row(self, index):
+        return TrackRow(self, int(index))
+
+    def rows(self, indices):
+        return [TrackRow(self, int(index)) for index in indices]
+
+    def nbytes(self):
+        """배열과 고유 문자열이 차지하는 대략적인 메모리 (바이트)"""
+        total = sum(column.nbytes for column in self.columns.values())
+        for uniques in self.vocab.values():
+            total += uniques.nbytes + sum(len(str(v)) + 49 for v in uniques)
+        return total
+
+class TrackRow(Mapping):
+    """트랙 테이블 한 행의 읽기 전용 딕셔너리 형태 뷰 (track['bpm']처럼 사용)"""
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key):
+        if key not in self.table.columns:
+            raise KeyError(key)
+        return self.table.value(key, self.index)
+
+    def __iter__(self):
+        return iter(self.table.column_names)
+
+    def __len__(self):
+        return len(self.table.column_names)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class TrackRows(Sequence):
+    """트랙 테이블 전체 행 뷰 (필요할 때만 행 객체 생성)"""
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.table.rows(range(len(self.table))[index])
+        if index < 0:
+            index += len(self.table)
+        if not 0 <= index < len(self.table):
+            raise IndexError(index)
+        return self.table.row(index)
+
+class TrackCatalog:
+    """트랙/에피소드 정보를 한 번 읽어 만든 메모리 인덱스 (TrackTable 기반)
+
+    track_id는 정렬된 ID 배열의 이진 탐색으로, 제목+아티스트, 폴더, 아티스트,
+    에피소드는 처음 조회할 때 만드는 인덱스로, BPM과 재생 시간은 정렬된 배열의
+    구간 조회로 찾는다. 조회 결과는 TrackRow 뷰이며 읽기 전용이다.
+    """
+    def __init__(self, tracks_df, episodes_df=None, track_episodes_df=None):
+        self.table = TrackTable.from_frame(tracks_df)
+        self.tracks = TrackRows(self.table)
+
+        ids = self.table.columns['track_id']
+        self._id_order = np.argsort(ids, kind='stable')
+        self._sorted_ids = ids[self._id_order]
+
+        # 정렬 인덱스 (값이 같으면 tracks 순서 유지, 값이 없는 트랙은 제외)
+        self._bpm_keys, self._bpm_order = self._sorted_index('bpm')
+        self._duration_keys, self._duration_order = self._sorted_index('duration_ms')
+
+        self._key_index = None
+        self._groups = {}
+
+        # 에피소드 이름 → 재생 순서대로 정렬한 트랙 ID 배열
+        self.episode_track_ids = {}
+        if episodes_df is not None and track_episodes_df is not None and len(track_episodes_df):
+            entries = track_episodes_df.merge(episodes_df[['episode_id', 'episode_name']], on='episode_id')
+            entries = entries.sort_values('order_in_episode', kind='stable')
+            self.episode_track_ids = {
+                name: group.to_numpy()
+                for name, group in entries.groupby('episode_name', sort=False)['track_id']
+            }
+
+    def _sorted_index(self, name):
+        values = self.table.columns[name].astype(np.float64)
+        valid = np.flatnonzero(~np.isnan(values))
+        order = valid[np.argsort(values[valid], kind='stable')]
+        return values[order], order
+
+    def __len__(self):
+        return len(self.table)
+
+    def __iter__(self):
+        return iter(self.tracks)
+
+    def index_of(self, track_id):
+        """track_id의 행 번호 (없으면 None)"""
+        position = np.searchsorted(self._sorted_ids, track_id)
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == track_id:
+            return int(self._id_order[position])
+        return None
+
+    def get(self, track_id):
+        index = self.index_of(track_id)
+        return None if index is None else self.table.row(index)
+
+    def find(self, title, artist):
+        if self._key_index is None:
+            titles = self.table.values('title')
+            artists = self.table.values('artist')
+            self._key_index = {key: index for index, key in enumerate(zip(titles, artists))}
+        index = self._key_index.get((title, artist))
+        return None if index is None else self.table.row(index)
+
+    def _group_indices(self, name, value):
+        """문자열 컬럼 값이 같은 행 번호 (tracks 순서)"""
+        if name not in self._groups:
+            codes = self.table.columns[name]
+            order = np.argsort(codes, kind='stable')
+            self._groups[name] = (codes[order], order)
+        sorted_codes, order = self._groups[name]
+        code = self.table.code(name, value)
+        if code < 0:
+            return order[:0]
+        return order[np.searchsorted(sorted_codes, code, 'left'):np.searchsorted(sorted_codes, code, 'right')]
+
+    def folder_tracks(self, folder_name):
+        return self.table.rows(self._group_indices('folder_name', folder_name))
+
+    def artist_tracks(self, artist):
+        return self.table.rows(self._group_indices('artist', artist))
+
+    def episode_tracks(self, episode_name):
+        """에피소드 트랙을 재생 순서대로 반환 (트랙 수만큼의 조회)"""
+        indices = (self.index_of(track_id) for track_id in self.episode_track_ids.get(episode_name, ()))
+        return [self.table.row(index) for index in indices if index is not None]
+
+    def bpm_indices(self, start_bpm, end_bpm):
+        """start_bpm <= BPM <= end_bpm인 행 번호 배열 (BPM 순)"""
+        return self._bpm_order[
+            np.searchsorted(self._bpm_keys, start_bpm, 'left'):np.searchsorted(self._bpm_keys, end_bpm, 'right')
+        ]
+
+    def bpm_range(self, start_bpm, end_bpm):
+        """start_bpm <= BPM <= end_bpm인 트랙 (BPM 순)"""
+        return self.table.rows(self.bpm_indices(start_bpm, end_bpm))
+
+    def duration_at_most(self, max_ms):
+        """재생 시간이 max_ms 이하인 트랙 (짧은 순)"""
+        return self.table.rows(self._duration_order[:np.searchsorted(self._duration_keys, max_ms, 'right')])
+
+    def shortest(self):
+        return self.table.row(self._duration_order[0]) if len(self._duration_order) else None
+
+# csv_dir별 공유 카탈로그 (같은 CSV 데이터프레임으로 만든 것은 다시 만들지 않음)
+_shared_catalogs = {}
+
+def load_track_catalog(csv_dir, catalog=None):
+    """SQLite 카탈로그 또는 CSV에서 TrackCatalog 생성 (CSV가 바뀌지 않았으면 이전 것을 재사용)"""
+    catalog = catalog or open_catalog(csv_dir)
+    if catalog is not None:
+        return TrackCatalog(catalog.tracks_frame(), catalog.episodes_frame(), catalog.track_episodes_frame())
+
+    files = csv_files(csv_dir)
+    frames = [files.frame('tracks.csv')]
+    for file_name in ('episodes.csv', 'track_episodes.csv'):
+        if os.path.exists(os.path.join(csv_dir, file_name)):
+            frames.append(files.frame(file_name))
+    key = os.path.abspath(csv_dir)
+    shared = _shared_catalogs.get(key)
+    if shared is not None and len(shared[0]) == len(frames) and all(a is b for a, b in zip(shared[0], frames)):
+        return shared[1]
+
+    track_catalog = TrackCatalog(*frames)
+    _shared_catalogs[key] = (frames, track_catalog)
+    logging.info(f"트랙 카탈로그 인덱스 생성: 트랙 {len(track_catalog)}개, 에피소드 {len(track_catalog.episode_track_ids)}개")
+    return track_catalog
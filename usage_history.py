@@ -0,0 +1,134 @@
+import os
+import json
+import logging
+import pandas as pd
+
+from catalog_db import USAGE_COLUMNS, USAGE_STATS_COLUMNS
+
+HISTORY_FILE = 'track_usage_history.csv'
+STATS_FILE = 'track_usage_stats.csv'
+# 사용 이력에 이미 반영한 플레이리스트 파일 목록
+INGESTED_FILE = 'playlist_ingest.json'
+
+def latest_usage(old, used_at, playlist_id):
+    """기존 집계와 새 사용 기록 중 더 최근 것 (같은 시각이면 나중에 추가된 기록)"""
+    if old is None or str(used_at) >= str(old['last_used_at']):
+        return used_at, playlist_id
+    return old['last_used_at'], old['last_playlist_id']
+
+class UsageHistory:
+    """추가 전용(append-only) 트랙 사용 이력과 트랙별 사용 집계
+
+    이력은 새 기록만 파일 끝에 추가하고, 트랙별 사용 횟수/마지막 사용 시각/마지막
+    플레이리스트는 작은 집계 파일(track_usage_stats.csv)에서 바뀐 트랙만 갱신한다.
+    플레이리스트 생성은 집계만 읽는다. 집계가 없거나 이력보다 오래되었으면
+    (이력을 직접 수정했거나 집계 저장 전에 중단된 경우) 이력 전체로 한 번 다시 만든다.
+    catalog가 있으면 카탈로그의 usage_history/track_usage_stats 테이블을 사용한다.
+    """
+    def __init__(self, csv_dir, catalog=None):
+        self.csv_dir = csv_dir
+        self.catalog = catalog
+        self.history_path = os.path.join(csv_dir, HISTORY_FILE)
+        self.stats_path = os.path.join(csv_dir, STATS_FILE)
+        self.ingested_path = os.path.join(csv_dir, INGESTED_FILE)
+
+    def exists(self):
+        if self.catalog is not None:
+            return self.catalog.has_usage()
+        return os.path.exists(self.history_path)
+
+    def append(self, records):
+        """사용 기록 추가 (이력 끝에 추가하고 해당 트랙의 집계만 갱신)"""
+        if self.catalog is not None:
+            self.catalog.append_usage(records)
+            return
+        stats = self.load_stats()
+        pd.DataFrame(records, columns=USAGE_COLUMNS).to_csv(
+            self.history_path,
+            mode='a',
+            header=not os.path.exists(self.history_path),
+            index=False,
+            encoding='utf-8-sig'
+        )
+        for record in records:
+            old = stats.get(record['track_id'])
+            last_used_at, last_playlist_id = latest_usage(old, record['used_at'], record['playlist_id'])
+            stats[record['track_id']] = {
+                'track_id': record['track_id'],
+                'use_count': (old['use_count'] if old else 0) + 1,
+                'last_used_at': last_used_at,
+                'last_playlist_id': last_playlist_id
+            }
+        self.save_stats(stats)
+
+    def write(self, records):
+        """이력 전체를 새로 쓰고 집계 다시 만들기 (기존 플레이리스트로 이력을 처음 생성할 때)"""
+        if self.catalog is not None:
+            self.catalog.append_usage(records)
+            return
+        pd.DataFrame(records, columns=USAGE_COLUMNS).to_csv(self.history_path, index=False, encoding='utf-8-sig')
+        self.save_stats(self.rebuild_stats())
+
+    def usage_counts(self):
+        """트랙 ID → 사용 횟수 (집계만 읽음)"""
+        if self.catalog is not None:
+            return self.catalog.usage_counts()
+        return {track_id: row['use_count'] for track_id, row in self.load_stats().items()}
+
+    def load_stats(self):
+        """트랙 ID → 집계 행 (집계가 없거나 이력보다 오래되었으면 다시 만듦)"""
+        if self.catalog is not None:
+            return self.catalog.usage_stats()
+        if not os.path.exists(self.history_path):
+            return {}
+        if os.path.exists(self.stats_path) and os.path.getmtime(self.stats_path) >= os.path.getmtime(self.history_path):
+            try:
+                stats_df = pd.read_csv(self.stats_path, dtype={'last_used_at': str, 'last_playlist_id': str})
+                return {row['track_id']: row for row in stats_df.to_dict('records')}
+            except Exception as e:
+                logging.warning(f"사용 집계 로드 실패, 이력에서 다시 만듭니다: {str(e)}")
+        logging.info("트랙 사용 이력에서 사용 집계를 다시 만듭니다.")
+        stats = self.rebuild_stats()
+        self.save_stats(stats)
+        return stats
+
+    def rebuild_stats(self):
+        """이력 전체에서 트랙별 집계 계산"""
+        if not os.path.exists(self.history_path):
+            return {}
+        history_df = pd.read_csv(self.history_path, dtype={'used_at': str, 'playlist_id': str})
+        if history_df.empty:
+            return {}
+        history_df['use_count'] = history_df.groupby('track_id')['track_id'].transform('size')
+        # 트랙별로 사용 시각이 가장 늦은 기록 (같은 시각이면 나중에 추가된 기록)
+        latest = history_df.sort_values('used_at', kind='stable').groupby('track_id').tail(1)
+        latest = latest.rename(columns={'used_at': 'last_used_at', 'playlist_id': 'last_playlist_id'})
+        return {row['track_id']: row for row in latest[USAGE_STATS_COLUMNS].to_dict('records')}
+
+    def ingested_playlists(self):
+        """사용 이력에 반영한 플레이리스트 파일명 집합 (기록이 없으면 None)"""
+        if not os.path.exists(self.ingested_path):
+            return None
+        try:
+            with open(self.ingested_path, 'r', encoding='utf-8') as f:
+                return set(json.load(f)['playlist_files'])
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"플레이리스트 반영 기록 로드 실패: {str(e)}")
+            return None
+
+    def mark_ingested(self, playlist_files):
+        """플레이리스트 파일을 사용 이력에 반영한 것으로 기록"""
+        ingested = (self.ingested_playlists() or set()) | set(playlist_files)
+        temp_path = self.ingested_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'playlist_files': sorted(ingested)}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.ingested_path)
+
+    def save_stats(self, stats):
+        """집계 저장 (임시 파일에 쓴 뒤 교체하여 중간에 중단되어도 이전 집계 유지)"""
+        temp_path = self.stats_path + '.tmp'
+        pd.DataFrame(
+            [stats[track_id] for track_id in sorted(stats)],
+            columns=USAGE_STATS_COLUMNS
+        ).to_csv(temp_path, index=False, encoding='utf-8-sig')
+        os.replace(temp_path, self.stats_path)
@@ -1,7 +1,31 @@
 import os
+import csv
+import json
+import hashlib
 import logging
 import pandas as pd
 
+# 필수 CSV 파일과 필수 컬럼 (analysis_profile은 이전 버전 CSV에 없으므로 선택)
+REQUIRED_CSV_COLUMNS = {
+    'tracks.csv': [
+        'track_id', 'title', 'artist', 'bpm', 'duration_ms', 'file_name', 'folder_name',
+        'genre', 'sub_genre', 'drum_intensity', 'harmonic_complexity'
+    ],
+    'episodes.csv': ['episode_id', 'episode_name', 'created_at'],
+    'track_episodes.csv': ['track_episode_id', 'track_id', 'episode_id', 'order_in_episode']
+}
+
+# 검사를 통과한 파일의 크기/수정 시각/행 수/스키마 해시 기록
+CSV_MANIFEST_FILE = 'csv_manifest.json'
+
+def schema_hash(columns):
+    return hashlib.sha1(','.join(columns).encode()).hexdigest()[:16]
+
+# 필수 컬럼 정의가 바뀌면 이전 매니페스트는 사용하지 않음
+SCHEMA_VERSION = schema_hash(
+    f"{file_name}:{'|'.join(columns)}" for file_name, columns in sorted(REQUIRED_CSV_COLUMNS.items())
+)
+
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
@@ -12,40 +36,163 @@ def setup_logging():
         ]
     )
 
-def check_csv_files(csv_dir):
-    required_files = ['tracks.csv', 'episodes.csv', 'track_episodes.csv']
-    try:
-        if not os.path.exists(csv_dir):
-            logging.info(f"CSV 디렉토리를 생성합니다: {csv_dir}")
-            os.makedirs(csv_dir, exist_ok=True)
-            return False
-            
-        for file_name in required_files:
-            file_path = os.path.join(csv_dir, file_name)
-            if not os.path.isfile(file_path):
-                logging.info(f"필요한 CSV 파일이 없습니다: {file_name}")
-                return False
-                
-            if os.path.getsize(file_path) == 0:
-                logging.info(f"CSV 파일이 비어 있습니다: {file_name}")
-                return False
-                
-            if not os.access(file_path, os.R_OK):
-                logging.error(f"CSV 파일에 대한 읽기 권한이 없습니다: {file_name}")
-                return False
-                
+class CsvFileSet:
+    """csv_output의 필수 CSV 검사와 파싱한 데이터프레임 공유
+
+    검사는 헤더와 첫 데이터 행만 읽고, 통과한 파일의 크기/수정 시각/스키마 해시를
+    매니페스트(csv_manifest.json)에 남겨 다음 실행에서 파일이 그대로면 stat 한 번으로 끝낸다.
+    frame()으로 읽은 데이터프레임은 파일이 바뀌기 전까지 같은 프로세스의 다른 호출자가 재사용한다.
+    """
+    def __init__(self, csv_dir, required_columns=REQUIRED_CSV_COLUMNS):
+        self.csv_dir = csv_dir
+        self.required_columns = required_columns
+        self.manifest_path = os.path.join(csv_dir, CSV_MANIFEST_FILE)
+        self.manifest = None
+        self._frames = {}
+
+    def _stat(self, file_name):
+        stat = os.stat(os.path.join(self.csv_dir, file_name))
+        return stat.st_size, stat.st_mtime_ns
+
+    def load_manifest(self):
+        if self.manifest is None:
+            self.manifest = {'schema_version': SCHEMA_VERSION, 'files': {}}
             try:
-                df = pd.read_csv(file_path)
-                if len(df) == 0:
-                    logging.info(f"CSV 파일에 데이터가 없습니다: {file_name}")
-                    return False
-            except Exception as e:
-                logging.error(f"CSV 파일 읽기 실패: {file_name} - {str(e)}")
-                return False
-                
-        logging.info("모든 CSV 파일이 정상적으로 존재합니다.")
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('schema_version') == SCHEMA_VERSION:
+                    self.manifest = manifest
+            except (OSError, ValueError):
+                pass
+        return self.manifest['files']
+
+    def save_manifest(self):
+        try:
+            temp_path = self.manifest_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            logging.warning(f"CSV 매니페스트 저장 실패: {str(e)}")
+
+    def read_head(self, file_name):
+        """헤더와 첫 데이터 행만 읽기: (컬럼 목록, 데이터 행 존재 여부)"""
+        with open(os.path.join(self.csv_dir, file_name), 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return None, False
+            has_rows = any(any(value.strip() for value in row) for row in reader)
+            return [column.strip() for column in header], has_rows
+
+    def check_file(self, file_name):
+        """파일 하나 검사 (매니페스트와 크기/수정 시각이 같으면 파일을 열지 않음)"""
+        files = self.load_manifest()
+        size, mtime_ns = self._stat(file_name)
+        entry = files.get(file_name)
+        if entry and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+            return True
+
+        columns, has_rows = self.read_head(file_name)
+        if not columns:
+            logging.info(f"CSV 파일이 비어 있습니다: {file_name}")
+            return False
+        missing = [column for column in self.required_columns[file_name] if column not in columns]
+        if missing:
+            logging.error(f"CSV 파일에 필요한 컬럼이 없습니다: {file_name} - {', '.join(missing)}")
+            return False
+        if not has_rows:
+            logging.info(f"CSV 파일에 데이터가 없습니다: {file_name}")
+            return False
+
+        frame = self._frames.get(file_name)
+        files[file_name] = {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            # 행 수는 frame()으로 전체를 파싱했을 때만 기록
+            'row_count': len(frame[1]) if frame is not None and frame[0] == (size, mtime_ns) else None,
+            'schema_hash': schema_hash(columns)
+        }
         return True
-        
-    except Exception as e:
-        logging.error(f"CSV 파일 검사 중 오류 발생: {str(e)}")
-        return False
\ No newline at end of file
+
+    def validate(self):
+        """필수 CSV 파일이 모두 있고 헤더와 데이터 행이 있는지 검사"""
+        try:
+            if not os.path.exists(self.csv_dir):
+                logging.info(f"CSV 디렉토리를 생성합니다: {self.csv_dir}")
+                os.makedirs(self.csv_dir, exist_ok=True)
+                return False
+
+            before = json.dumps(self.load_manifest(), sort_keys=True)
+            valid = True
+            for file_name in self.required_columns:
+                file_path = os.path.join(self.csv_dir, file_name)
+                if not os.path.isfile(file_path):
+                    logging.info(f"필요한 CSV 파일이 없습니다: {file_name}")
+                    valid = False
+                    break
+
+                if not os.access(file_path, os.R_OK):
+                    logging.error(f"CSV 파일에 대한 읽기 권한이 없습니다: {file_name}")
+                    valid = False
+                    break
+
+                try:
+                    if not self.check_file(file_name):
+                        valid = False
+                        break
+                except Exception as e:
+                    logging.error(f"CSV 파일 읽기 실패: {file_name} - {str(e)}")
+                    valid = False
+                    break
+
+            if json.dumps(self.manifest['files'], sort_keys=True) != before:
+                self.save_manifest()
+            if valid:
+                logging.info("모든 CSV 파일이 정상적으로 존재합니다.")
+            return valid
+
+        except Exception as e:
+            logging.error(f"CSV 파일 검사 중 오류 발생: {str(e)}")
+            return False
+
+    def record_written(self, written):
+        """직접 저장한 CSV를 매니페스트에 기록 (파일명 → 데이터프레임, 다음 검사에서 다시 읽지 않음)"""
+        files = self.load_manifest()
+        for file_name, df in written.items():
+            size, mtime_ns = self._stat(file_name)
+            files[file_name] = {
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'row_count': len(df),
+                'schema_hash': schema_hash([str(column) for column in df.columns])
+            }
+        self.save_manifest()
+
+    def frame(self, file_name):
+        """CSV 데이터프레임 (파일이 바뀌지 않았으면 이미 파싱한 것을 반환, 수정하지 말 것)"""
+        stat = self._stat(file_name)
+        cached = self._frames.get(file_name)
+        if cached is not None and cached[0] == stat:
+            return cached[1]
+
+        df = pd.read_csv(os.path.join(self.csv_dir, file_name))
+        self._frames[file_name] = (stat, df)
+        entry = self.load_manifest().get(file_name)
+        if entry and (entry['size'], entry['mtime_ns']) == stat and entry['row_count'] != len(df):
+            entry['row_count'] = len(df)
+            self.save_manifest()
+        return df
+
+# csv_dir별로 공유하는 CsvFileSet (검사한 파일과 파싱한 데이터프레임을 여러 호출자가 재사용)
+_csv_file_sets = {}
+
+def csv_files(csv_dir):
+    key = os.path.abspath(csv_dir)
+    if key not in _csv_file_sets:
+        _csv_file_sets[key] = CsvFileSet(csv_dir)
+    return _csv_file_sets[key]
+
+def check_csv_files(csv_dir):
+    """필수 CSV 파일 검사 (헤더와 첫 데이터 행만 읽고, 바뀌지 않은 파일은 매니페스트로 확인)"""
+    return csv_files(csv_dir).validate()